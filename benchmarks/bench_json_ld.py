@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+JSON-LD 提取基准：文本快速路径 (extract_json_ld) 对比 parsel 选择器路径
+
+用法:
+    python benchmarks/bench_json_ld.py [--repeat 50]
+"""
+import argparse
+import time
+
+from common import FixtureResponse, load_text
+from scripts.linkedin_scraper import extract_json_ld, extract_json_ld_selector
+
+PAGES = ['company_overview.html', 'profile.html']
+
+def best_of(func, repeat: int) -> float:
+    """多次执行取最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON-LD extraction benchmark')
+    parser.add_argument('--repeat', type=int, default=50, help='每个页面的重复次数 (默认: 50)')
+    args = parser.parse_args()
+
+    print(f"{'page':<24}{'size':>10}{'selector ms':>14}{'fast ms':>10}{'speedup':>10}")
+    for page in PAGES:
+        html = load_text(page)
+
+        # 两条路径的结果必须一致
+        if extract_json_ld(html) != extract_json_ld_selector(FixtureResponse(html)):
+            raise SystemExit(f"{page}: fast path and selector path disagree")
+
+        # 每次都用新的response，避免selector的缓存掩盖DOM构建成本
+        slow = best_of(lambda: extract_json_ld_selector(FixtureResponse(html)), args.repeat)
+        fast = best_of(lambda: extract_json_ld(html), args.repeat)
+        print(f"{page:<24}{len(html):>10}{slow * 1000:>14.3f}{fast * 1000:>10.3f}{slow / fast:>9.1f}x")
+
+if __name__ == "__main__":
+    main()
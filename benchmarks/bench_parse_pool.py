@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+解析执行器吞吐基准：同时提交一批页面给 ParseExecutor，统计不同执行器和进程数下的每秒解析页数，
+以及解析期间事件循环的最大延迟（inline 模式下解析会阻塞事件循环，其他在途请求无法被处理）
+
+用法:
+    python benchmarks/bench_parse_pool.py [--pages 300] [--workers 1 2 4] [--output results.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import time
+from typing import Any, Dict, List, Optional
+
+from common import FixtureResponse, load_text
+from scripts.linkedin_scraper import parse_company_life, parse_company_overview, parse_profile
+from scripts.parse_pool import INLINE, PROCESS, THREAD, ParseExecutor, free_threaded
+
+# 事件循环延迟的采样间隔（秒）
+TICK = 0.005
+
+def build_pages(count: int) -> List[tuple]:
+    """按 overview / life / profile 轮流生成待解析的页面"""
+    fixtures = [
+        (parse_company_overview, load_text('company_overview.html')),
+        (parse_company_life, load_text('company_life.html')),
+        (parse_profile, load_text('profile.html')),
+    ]
+    return [fixtures[i % len(fixtures)] for i in range(count)]
+
+async def measure_loop_lag(stop: asyncio.Event) -> float:
+    """定时唤醒，返回实际唤醒时间比预期晚的最大值（毫秒）"""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        worst = max(worst, time.perf_counter() - started - TICK)
+    return worst * 1000
+
+async def run_case(kind: str, workers: int, pages: List[tuple]) -> Dict[str, Any]:
+    """用一种执行器配置解析全部页面"""
+    executor = ParseExecutor(kind, workers)
+    try:
+        # 预热：启动进程池并在每个子进程中导入解析模块，不计入吞吐
+        await asyncio.gather(*(executor.parse(parse, FixtureResponse(html)) for parse, html in pages[:max(1, workers) * 3]))
+
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(measure_loop_lag(stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(executor.parse(parse, FixtureResponse(html)) for parse, html in pages))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        max_lag = await lag_task
+    finally:
+        executor.shutdown()
+
+    return {
+        'executor': kind,
+        'workers': workers if kind != INLINE else 0,
+        'pages': len(pages),
+        'seconds': round(elapsed, 3),
+        'pages_per_second': round(len(pages) / elapsed, 1),
+        'max_loop_lag_ms': round(max_lag, 1),
+    }
+
+async def run(page_count: int, worker_counts: List[int], threads: bool) -> Dict[str, Any]:
+    """依次执行 inline 和各进程数（可选线程池）的用例"""
+    pages = build_pages(page_count)
+    cases = [await run_case(INLINE, 0, pages)]
+    for workers in worker_counts:
+        cases.append(await run_case(PROCESS, workers, pages))
+        if threads:
+            cases.append(await run_case(THREAD, workers, pages))
+    return {
+        'python': platform.python_version(),
+        'free_threaded': free_threaded(),
+        'cpu_count': os.cpu_count(),
+        'cases': cases,
+    }
+
+def print_report(report: Dict[str, Any]) -> None:
+    baseline: Optional[float] = None
+    print(f"python {report['python']} (free-threaded: {report['free_threaded']}), {report['cpu_count']} CPUs")
+    print(f"{'executor':<10}{'workers':>8}{'pages/s':>10}{'speedup':>9}{'max lag ms':>12}")
+    for case in report['cases']:
+        if baseline is None:
+            baseline = case['pages_per_second']
+        speedup = case['pages_per_second'] / baseline if baseline else 0.0
+        print(f"{case['executor']:<10}{case['workers']:>8}{case['pages_per_second']:>10.1f}"
+              f"{speedup:>8.2f}x{case['max_loop_lag_ms']:>12.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Parse executor throughput benchmark')
+    parser.add_argument('--pages', type=int, default=300, help='每个用例解析的页面数 (默认: 300)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='进程池大小 (默认: 1 2 4)')
+    parser.add_argument('--threads', action='store_true', help='同时测试线程池（在无GIL的Python上才有意义）')
+    parser.add_argument('--output', default=None, help='结果JSON写入路径')
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.pages, args.workers, args.threads))
+    print_report(report)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+解析函数微基准：逐函数统计每页耗时、保留的内存分配和峰值内存，结果写入JSON以便在提交之间对比
+
+用法:
+    python benchmarks/bench_parsers.py --output benchmarks/results/latest.json
+    python benchmarks/bench_parsers.py --compare benchmarks/baseline.json --max-regression 20
+
+基线 benchmarks/baseline.json 随代码提交（make bench-baseline 重新记录），benchmarks/results/ 下的输出不提交
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+
+from common import PROJECT_ROOT, FixtureResponse, load_json, load_text
+from scripts.linkedin_scraper import (
+    extract_json_ld,
+    parse_company_life,
+    parse_company_overview,
+    parse_profile,
+    refine_profile,
+)
+from scripts.candidate_ranking import select_candidates, unique_candidates
+
+# (名称, fixture, 每次调用前准备参数(不计时), 被测函数)
+Case = Tuple[str, str, Callable[[], tuple], Callable[..., Any]]
+
+def build_cases() -> List[Case]:
+    """构建基准用例，每次调用都使用新的response，保证DOM构建成本被计入"""
+    overview_html = load_text('company_overview.html')
+    life_html = load_text('company_life.html')
+    profile_html = load_text('profile.html')
+    profile_json_ld = extract_json_ld(profile_html)
+    google_items = load_json('google_cse_company.json')['items']
+
+    return [
+        ('parse_company_overview', 'company_overview.html',
+         lambda: (FixtureResponse(overview_html),), parse_company_overview),
+        ('parse_company_life', 'company_life.html',
+         lambda: (FixtureResponse(life_html),), parse_company_life),
+        ('parse_profile', 'profile.html',
+         lambda: (FixtureResponse(profile_html),), parse_profile),
+        # refine_profile 会修改输入，因此每次传入副本
+        ('refine_profile', 'profile.html',
+         lambda: (copy.deepcopy(profile_json_ld),), refine_profile),
+        ('unique_candidates[company]', 'google_cse_company.json',
+         lambda: (google_items, 'company'), unique_candidates),
+        ('unique_candidates[person]', 'google_cse_company.json',
+         lambda: (google_items, 'person'), unique_candidates),
+        ('select_candidates[company]', 'google_cse_company.json',
+         lambda: (google_items, 'company', 'Example Diagnostics', 'https://example-diagnostics.com'),
+         select_candidates),
+    ]
+
+def measure_time(make_args: Callable[[], tuple], func: Callable[..., Any], repeat: int) -> Dict[str, float]:
+    """多次调用统计耗时（毫秒）"""
+    timings = []
+    for _ in range(repeat):
+        args = make_args()
+        started = time.perf_counter()
+        func(*args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'min_ms': round(min(timings), 4),
+        'median_ms': round(statistics.median(timings), 4),
+        'mean_ms': round(statistics.fmean(timings), 4),
+    }
+
+def measure_memory(make_args: Callable[[], tuple], func: Callable[..., Any]) -> Dict[str, float]:
+    """
+    用tracemalloc统计一次调用的内存
+
+    - peak_kib: 调用期间相对调用前的峰值增长
+    - retained_blocks / retained_kib: 调用结束后仍被结果持有的分配块数和大小
+    """
+    args = make_args()
+    tracemalloc.start()
+    try:
+        before_snapshot = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+        after_snapshot = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    diff = after_snapshot.compare_to(before_snapshot, 'filename')
+    retained_blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    retained_bytes = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+    del result
+    return {
+        'peak_kib': round((peak - before) / 1024, 1),
+        'retained_blocks': retained_blocks,
+        'retained_kib': round(retained_bytes / 1024, 1),
+    }
+
+def git_commit() -> str:
+    """当前提交哈希，不在git仓库中时返回空字符串"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+def run(repeat: int) -> Dict[str, Any]:
+    """执行全部用例并返回可序列化的结果"""
+    results = {}
+    for name, fixture, make_args, func in build_cases():
+        # 预热一次，排除首次调用的导入/编译开销
+        func(*make_args())
+        entry = {'fixture': fixture, 'repeat': repeat}
+        entry.update(measure_time(make_args, func, repeat))
+        entry.update(measure_memory(make_args, func))
+        results[name] = entry
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+def print_report(report: Dict[str, Any], baseline: Dict[str, Any] = None) -> List[Tuple[str, float]]:
+    """
+    打印结果表，有基线时附带中位耗时和峰值内存的变化百分比
+
+    Returns:
+        变化百分比列表用于回归判断: [(函数名, 耗时变化%), ...]
+    """
+    base_results = (baseline or {}).get('results', {})
+    header = f"{'function':<42}{'median ms':>11}{'min ms':>10}{'peak KiB':>10}{'blocks':>8}{'KiB':>9}"
+    if baseline:
+        header += f"{'Δ time':>9}{'Δ peak':>9}"
+    print(header)
+
+    deltas = []
+    for name, entry in report['results'].items():
+        line = (f"{name:<42}{entry['median_ms']:>11.3f}{entry['min_ms']:>10.3f}{entry['peak_kib']:>10.1f}"
+                f"{entry['retained_blocks']:>8}{entry['retained_kib']:>9.1f}")
+        base = base_results.get(name)
+        if base:
+            time_delta = (entry['median_ms'] / base['median_ms'] - 1) * 100 if base['median_ms'] else 0.0
+            peak_delta = (entry['peak_kib'] / base['peak_kib'] - 1) * 100 if base['peak_kib'] else 0.0
+            line += f"{time_delta:>+8.1f}%{peak_delta:>+8.1f}%"
+            deltas.append((name, time_delta))
+        print(line)
+    return deltas
+
+def main():
+    parser = argparse.ArgumentParser(description='LinkedIn/Google parser micro-benchmarks')
+    parser.add_argument('--repeat', type=int, default=30, help='每个函数的调用次数 (默认: 30)')
+    parser.add_argument('--output', default=None, help='结果JSON写入路径')
+    parser.add_argument('--compare', default=None, help='用于对比的基线JSON')
+    parser.add_argument('--max-regression', type=float, default=None,
+                        help='中位耗时相对基线增长超过该百分比时以非零状态退出')
+    args = parser.parse_args()
+
+    report = run(args.repeat)
+
+    baseline = None
+    if args.compare:
+        if os.path.exists(args.compare):
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            print(f"comparing against {args.compare} (commit {baseline.get('commit') or 'unknown'})")
+        else:
+            print(f"baseline {args.compare} not found: record it first with `make bench-baseline` "
+                  f"(or --output {args.compare}) and commit it", file=sys.stderr)
+            if args.max_regression is not None:
+                sys.exit(2)
+
+    deltas = print_report(report, baseline)
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"results written to {args.output}")
+
+    if args.max_regression is not None:
+        regressions = [(name, delta) for name, delta in deltas if delta > args.max_regression]
+        for name, delta in regressions:
+            print(f"regression: {name} median time +{delta:.1f}%", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
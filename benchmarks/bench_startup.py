@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+启动开销报告：基于 -X importtime 统计导入 crawler 的耗时，并检查重量级依赖是否被提前导入
+
+用法:
+    python benchmarks/bench_startup.py [--budget-ms 150] [--runs 5] [--output results.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(PROJECT_ROOT, 'scripts')
+
+# 这些模块只应在真正发请求/解析页面时导入
+LAZY_MODULES = ['scrapfly', 'aiohttp', 'jmespath', 'toml', 'parsel', 'lxml', 'requests', 'orjson', 'sqlite3']
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def import_profile() -> List[Tuple[str, int, int, int]]:
+    """
+    在新解释器中以 -X importtime 导入 crawler
+
+    Returns:
+        [(模块名, 自身耗时us, 累计耗时us, 层级), ...]
+    """
+    code = f"import sys; sys.path.insert(0, {SCRIPTS_DIR!r}); import crawler"
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def cli_wall_time(runs: int) -> Dict[str, float]:
+    """多次执行 crawler.py --help 统计进程启动到退出的墙钟时间（毫秒）"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, 'crawler.py'), '--help'],
+                       cwd=PROJECT_ROOT, capture_output=True, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return {'min_ms': round(min(timings), 2), 'median_ms': round(statistics.median(timings), 2)}
+
+def main():
+    parser = argparse.ArgumentParser(description='crawler.py startup/import-time report')
+    parser.add_argument('--budget-ms', type=float, default=150,
+                        help='导入 crawler 的累计耗时预算，超出时以非零状态退出 (默认: 150)')
+    parser.add_argument('--runs', type=int, default=5, help='导入和CLI计时的重复次数 (默认: 5)')
+    parser.add_argument('--top', type=int, default=15, help='列出累计耗时最高的模块数 (默认: 15)')
+    parser.add_argument('--output', default=None, help='结果JSON写入路径')
+    args = parser.parse_args()
+
+    # 多次测量取中位数，最后一次的明细用于展示
+    totals = []
+    for _ in range(args.runs):
+        entries = import_profile()
+        totals.append(next(cum for name, _, cum, _ in entries if name == 'crawler'))
+    import_ms = statistics.median(totals) / 1000
+
+    print(f"import crawler: {import_ms:.1f} ms (median of {args.runs}, budget {args.budget_ms:.0f} ms)")
+    print(f"{'module':<48}{'self ms':>10}{'cumulative ms':>16}")
+    for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]:
+        print(f"{name:<48}{self_us / 1000:>10.2f}{cumulative_us / 1000:>16.2f}")
+
+    imported = {name for name, _, _, _ in entries}
+    eager = [module for module in LAZY_MODULES if module in imported]
+    if eager:
+        print(f"heavy modules imported eagerly: {', '.join(eager)}")
+
+    wall = cli_wall_time(args.runs)
+    print(f"crawler.py --help wall time: median {wall['median_ms']} ms, min {wall['min_ms']} ms")
+
+    report: Dict[str, Any] = {
+        'import_ms': round(import_ms, 2),
+        'budget_ms': args.budget_ms,
+        'eager_heavy_modules': eager,
+        'cli_help': wall,
+        'top_modules': [
+            {'module': name, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+            for name, self_us, cumulative_us, _ in sorted(entries, key=lambda e: e[2], reverse=True)[:args.top]
+        ],
+    }
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+
+    if import_ms > args.budget_ms or eager:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
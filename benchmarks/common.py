@@ -0,0 +1,35 @@
+"""基准测试共用的fixture加载和模拟响应"""
+import json
+import os
+import sys
+from functools import cached_property
+
+# 添加项目根目录到 Python 路径，以便能够找到 scripts 模块
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# crawler.py 位于 scripts 目录下，以脚本形式导入
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'scripts')):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from parsel import Selector
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+class FixtureResponse:
+    """模拟 ScrapeApiResponse，只提供解析函数用到的 content 和 selector"""
+
+    def __init__(self, content: str):
+        self.content = content
+
+    @cached_property
+    def selector(self) -> Selector:
+        return Selector(text=self.content)
+
+def load_text(name: str) -> str:
+    """读取fixtures目录下的文本文件"""
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def load_json(name: str):
+    """读取fixtures目录下的JSON文件"""
+    return json.loads(load_text(name))
@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+端到端压测：以目标速率把N个任务推给 crawler.py，上游由 benchmarks/upstream_stub.py 替代，
+报告每个并发度下的任务延迟 p50/p95/p99、吞吐（tasks/s）、CPU时间和峰值RSS
+
+- worker 模式：启动一个 crawler.py --worker --concurrency C，通过stdin发送任务（与Go侧常驻worker相同）
+- single 模式：每个任务启动一次 crawler.py（与Go侧 python_workers = 0 相同），最多同时运行C个
+- 任务按目标速率开环发送，延迟从计划发送时间算起，包含排队时间
+- 默认关闭搜索缓存、解析结果缓存和LinkedIn索引，并放开key限速和 [scrapfly] concurrency，测的是爬虫本身而不是限速配置
+- CPU时间为所有已退出子进程（含解析进程池）的用户态+内核态时间；RSS为运行期间爬虫进程树的峰值（需要 /proc）
+
+用法:
+    python benchmarks/load_test.py [--tasks 200] [--rate 20] [--concurrency 4 16 64] [--mode worker]
+        [--upstream http://127.0.0.1:8765] [--stub-arg=--scrapfly-error-rate=0.02] [--output results.json]
+    python benchmarks/load_test.py --upstream http://127.0.0.1:8765 --write-config /tmp/cy_crawler_load.toml
+        只写出压测配置，配合 go run ./cmd/loadtest 经由 Processor.ProcessTask 压测
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import socket
+import sys
+import tempfile
+import time
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+import toml
+
+from common import PROJECT_ROOT
+
+CRAWLER = os.path.join(PROJECT_ROOT, 'scripts', 'crawler.py')
+STUB = os.path.join(PROJECT_ROOT, 'benchmarks', 'upstream_stub.py')
+CONFIG = os.path.join(PROJECT_ROOT, 'configs', 'config.toml')
+
+# RSS采样间隔（秒）
+SAMPLE_INTERVAL = 0.1
+# worker输出的单行结果上限
+LINE_LIMIT = 64 * 1024 * 1024
+# 不保留限速时使用的 [scrapfly] concurrency
+SCRAPFLY_CONCURRENCY = 256
+
+def percentile(values: List[float], q: float) -> float:
+    """最近秩百分位数，values 为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+def process_tree(pid: int) -> List[int]:
+    """pid 及其所有子孙进程（读取 /proc/<pid>/task/*/children）"""
+    pids = [pid]
+    for current in pids:
+        try:
+            for tid in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{tid}/children') as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+def rss_bytes(pid: int) -> int:
+    """进程的常驻内存（字节），进程已退出时为0"""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+async def sample_peak_rss(roots: Callable[[], List[int]], stop: asyncio.Event) -> Optional[int]:
+    """定时统计爬虫进程树的RSS总和，返回峰值；没有 /proc 时返回None"""
+    if not os.path.isdir('/proc/self/task'):
+        return None
+    peak = 0
+    while not stop.is_set():
+        peak = max(peak, sum(rss_bytes(pid) for root in roots() for pid in process_tree(root)))
+        try:
+            await asyncio.wait_for(stop.wait(), SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+    return peak
+
+def children_cpu_seconds() -> float:
+    """已退出并被回收的子孙进程的CPU时间总和"""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def build_tasks(count: int) -> List[Dict[str, Any]]:
+    """生成互不相同的公司/个人任务，名称唯一，替身服务为每个名称返回不同的LinkedIn页面"""
+    tasks = []
+    for i in range(count):
+        if i % 2 == 0:
+            tasks.append({'id': str(i), 'type': 'company', 'name': f'Load Test Company {i:05d}',
+                          'url': f'https://loadtest-{i:05d}.example.com', 'country': 'US'})
+        else:
+            tasks.append({'id': str(i), 'type': 'person', 'name': f'Load Tester {i:05d}',
+                          'url': f'https://loadtest-{i:05d}.example.com', 'email': f'tester{i}@loadtest-{i:05d}.example.com'})
+    return tasks
+
+def write_config(upstream: str, keep_caches: bool, keep_rate_limits: bool, path: Optional[str] = None) -> str:
+    """
+    基于 configs/config.toml 生成压测配置，返回文件路径
+
+    Args:
+        upstream: 替身服务地址
+        keep_caches: 保留缓存和LinkedIn索引
+        keep_rate_limits: 保留key限速
+        path: 写入路径，不指定时写入临时文件
+    """
+    config = toml.load(CONFIG)
+    google = config.setdefault('google_search', {})
+    scrapfly = config.setdefault('scrapfly', {})
+    google['base_url'] = f"{upstream}/customsearch/v1"
+    scrapfly['host'] = upstream
+    if not keep_caches:
+        google.setdefault('cache', {})['enabled'] = False
+        scrapfly.setdefault('cache', {})['enabled'] = False
+        config.setdefault('linkedin_index', {})['enabled'] = False
+    if not keep_rate_limits:
+        for section in (google, scrapfly):
+            # 不限速时也不需要多进程共享的用量表
+            section.update(rate_per_second=1e6, burst=1e6, daily_quota=0, usage_path='')
+        # Scrapfly并发不成为瓶颈，吞吐随 --concurrency 变化
+        scrapfly['concurrency'] = SCRAPFLY_CONCURRENCY
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            toml.dump(config, f)
+        return path
+    fd, path = tempfile.mkstemp(prefix='cy_crawler_load_', suffix='.toml')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        toml.dump(config, f)
+    return path
+
+def crawler_env(config_path: str, upstream: str) -> Dict[str, str]:
+    """爬虫子进程的环境变量：压测配置、替身服务地址和占位key"""
+    env = dict(os.environ)
+    env.update(
+        CY_CRAWLER_CONFIG=config_path,
+        GOOGLE_SEARCH_BASE_URL=f"{upstream}/customsearch/v1",
+        SCRAPFLY_HOST=upstream,
+        GOOGLE_SEARCH_API_KEY='load-test',
+        GOOGLE_SEARCH_ENGINE_ID='load-test',
+        SCRAPFLY_API_KEY='load-test',
+    )
+    return env
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def fetch_stats(upstream: str) -> Optional[Dict[str, Any]]:
+    """读取替身服务的请求计数，不可用时返回None"""
+    try:
+        with urllib.request.urlopen(f"{upstream}/stats", timeout=1) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+async def start_stub(stub_args: List[str]):
+    """在空闲端口上启动替身服务，返回 (进程, 地址)"""
+    port = free_port()
+    upstream = f"http://127.0.0.1:{port}"
+    proc = await asyncio.create_subprocess_exec(sys.executable, STUB, '--port', str(port), *stub_args,
+                                                stdout=asyncio.subprocess.DEVNULL, cwd=PROJECT_ROOT)
+    for _ in range(100):
+        if proc.returncode is not None:
+            raise RuntimeError(f"upstream stub exited with code {proc.returncode}")
+        if await asyncio.to_thread(fetch_stats, upstream) is not None:
+            return proc, upstream
+        await asyncio.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("upstream stub did not start")
+
+async def pace(started: float, index: int, rate: float) -> float:
+    """等到第index个任务的计划发送时间，返回该时间"""
+    scheduled = started + index / rate if rate > 0 else started
+    delay = scheduled - time.monotonic()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    return scheduled
+
+async def run_worker_level(tasks: List[Dict[str, Any]], rate: float, concurrency: int, env: Dict[str, str]) -> Dict[str, Any]:
+    """worker模式：一个常驻crawler进程，通过stdin发送任务"""
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, CRAWLER, '--worker', '--concurrency', str(concurrency),
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        env=env, cwd=PROJECT_ROOT, limit=LINE_LIMIT,
+    )
+    scheduled: Dict[str, float] = {}
+    latencies: List[float] = []
+    outcomes = {'errors': 0, 'partial': 0}
+
+    async def read_results() -> None:
+        while len(latencies) < len(tasks):
+            line = await proc.stdout.readline()
+            if not line:
+                raise RuntimeError(f"crawler worker exited after {len(latencies)} of {len(tasks)} results")
+            result = json.loads(line)
+            latencies.append(time.monotonic() - scheduled[result['id']])
+            if result.get('error'):
+                outcomes['errors'] += 1
+            elif result.get('partial'):
+                outcomes['partial'] += 1
+
+    stop = asyncio.Event()
+    rss_task = asyncio.create_task(sample_peak_rss(lambda: [proc.pid], stop))
+    reader = asyncio.create_task(read_results())
+    started = time.monotonic()
+    for index, task in enumerate(tasks):
+        scheduled[task['id']] = await pace(started, index, rate)
+        proc.stdin.write(json.dumps(task).encode() + b'\n')
+        await proc.stdin.drain()
+    await reader
+    elapsed = time.monotonic() - started
+    stop.set()
+    peak_rss = await rss_task
+    proc.stdin.close()
+    await proc.wait()
+    return {'elapsed': elapsed, 'latencies': latencies, 'peak_rss': peak_rss, **outcomes}
+
+async def run_single_level(tasks: List[Dict[str, Any]], rate: float, concurrency: int, env: Dict[str, str]) -> Dict[str, Any]:
+    """single模式：每个任务启动一次crawler.py，最多同时运行 concurrency 个"""
+    semaphore = asyncio.Semaphore(concurrency)
+    running = set()
+    latencies: List[float] = []
+    outcomes = {'errors': 0, 'partial': 0}
+
+    async def run_one(task: Dict[str, Any], scheduled: float) -> None:
+        async with semaphore:
+            args = [CRAWLER, '--type', task['type'], '--name', task['name'], '--url', task['url'],
+                    '--email', task.get('email', ''), '--country', task.get('country', '')]
+            proc = await asyncio.create_subprocess_exec(sys.executable, *args, stdout=asyncio.subprocess.PIPE,
+                                                        stderr=asyncio.subprocess.DEVNULL, env=env, cwd=PROJECT_ROOT,
+                                                        limit=LINE_LIMIT)
+            running.add(proc.pid)
+            try:
+                output, _ = await proc.communicate()
+            finally:
+                running.discard(proc.pid)
+        latencies.append(time.monotonic() - scheduled)
+        try:
+            result = json.loads(output)
+        except ValueError:
+            outcomes['errors'] += 1
+            return
+        if result.get('partial'):
+            outcomes['partial'] += 1
+
+    stop = asyncio.Event()
+    rss_task = asyncio.create_task(sample_peak_rss(lambda: list(running), stop))
+    jobs = []
+    started = time.monotonic()
+    for index, task in enumerate(tasks):
+        scheduled = await pace(started, index, rate)
+        jobs.append(asyncio.create_task(run_one(task, scheduled)))
+    await asyncio.gather(*jobs)
+    elapsed = time.monotonic() - started
+    stop.set()
+    return {'elapsed': elapsed, 'latencies': latencies, 'peak_rss': await rss_task, **outcomes}
+
+async def run(args) -> Dict[str, Any]:
+    """依次执行各并发度"""
+    stub = None
+    upstream = args.upstream
+    if upstream is None:
+        stub, upstream = await start_stub(args.stub_arg)
+    config_path = write_config(upstream, args.keep_caches, args.keep_rate_limits)
+    env = crawler_env(config_path, upstream)
+    run_level = run_worker_level if args.mode == 'worker' else run_single_level
+    levels = []
+    print_header()
+    try:
+        for concurrency in args.concurrency:
+            tasks = build_tasks(args.tasks)
+            upstream_before = await asyncio.to_thread(fetch_stats, upstream)
+            cpu_before = children_cpu_seconds()
+            outcome = await run_level(tasks, args.rate, concurrency, env)
+            cpu = children_cpu_seconds() - cpu_before
+            upstream_after = await asyncio.to_thread(fetch_stats, upstream)
+
+            latencies = [latency * 1000 for latency in outcome['latencies']]
+            level = {
+                'concurrency': concurrency,
+                'tasks': len(latencies),
+                'errors': outcome['errors'],
+                'partial': outcome['partial'],
+                'seconds': round(outcome['elapsed'], 3),
+                'tasks_per_second': round(len(latencies) / outcome['elapsed'], 2) if outcome['elapsed'] > 0 else 0.0,
+                'p50_ms': round(percentile(latencies, 50), 1),
+                'p95_ms': round(percentile(latencies, 95), 1),
+                'p99_ms': round(percentile(latencies, 99), 1),
+                'cpu_seconds': round(cpu, 2),
+                'cpu_percent': round(cpu / outcome['elapsed'] * 100, 1) if outcome['elapsed'] > 0 else 0.0,
+                'peak_rss_mb': round(outcome['peak_rss'] / 1024 / 1024, 1) if outcome['peak_rss'] is not None else None,
+            }
+            if upstream_before and upstream_after:
+                level['upstream_requests'] = {name: upstream_after[name]['requests'] - upstream_before[name]['requests']
+                                              for name in upstream_after}
+            levels.append(level)
+            print_level(level)
+    finally:
+        os.remove(config_path)
+        if stub is not None:
+            stub.terminate()
+            await stub.wait()
+    return {'mode': args.mode, 'rate': args.rate, 'tasks': args.tasks, 'cpu_count': os.cpu_count(), 'levels': levels}
+
+def print_header() -> None:
+    print(f"{'conc':>5}{'tasks':>7}{'err':>5}{'part':>6}{'tasks/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'cpu s':>8}{'cpu %':>7}{'rss MB':>8}")
+
+def print_level(level: Dict[str, Any]) -> None:
+    rss = f"{level['peak_rss_mb']:.1f}" if level['peak_rss_mb'] is not None else '-'
+    print(f"{level['concurrency']:>5}{level['tasks']:>7}{level['errors']:>5}{level['partial']:>6}"
+          f"{level['tasks_per_second']:>9.2f}{level['p50_ms']:>9.1f}{level['p95_ms']:>9.1f}{level['p99_ms']:>9.1f}"
+          f"{level['cpu_seconds']:>8.2f}{level['cpu_percent']:>7.1f}{rss:>8}", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description='End-to-end crawler load test against the upstream stub')
+    parser.add_argument('--tasks', type=int, default=200, help='每个并发度发送的任务数 (默认: 200)')
+    parser.add_argument('--rate', type=float, default=20, help='目标发送速率 tasks/s，0表示一次性全部发送 (默认: 20)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4, 16, 64], help='并发度 (默认: 4 16 64)')
+    parser.add_argument('--mode', choices=['worker', 'single'], default='worker',
+                        help='worker: 常驻 crawler.py --worker；single: 每个任务一个进程 (默认: worker)')
+    parser.add_argument('--upstream', default=None, help='已运行的替身服务地址，不指定时自动启动')
+    parser.add_argument('--stub-arg', action='append', default=[],
+                        help='传给自动启动的替身服务的参数，可重复，如 --stub-arg=--scrapfly-error-rate=0.02')
+    parser.add_argument('--keep-caches', action='store_true', help='保留搜索缓存、解析结果缓存和LinkedIn索引')
+    parser.add_argument('--keep-rate-limits', action='store_true', help='保留配置中的key限速')
+    parser.add_argument('--output', default=None, help='结果JSON写入路径')
+    parser.add_argument('--write-config', default=None, metavar='PATH',
+                        help='只写出压测配置（需要 --upstream）后退出，供 go run ./cmd/loadtest -crawler-config 使用')
+    args = parser.parse_args()
+
+    if args.write_config:
+        if not args.upstream:
+            parser.error('--write-config requires --upstream')
+        print(write_config(args.upstream, args.keep_caches, args.keep_rate_limits, args.write_config))
+        return
+
+    print(f"{args.mode} mode, {args.tasks} tasks per level at {args.rate} tasks/s")
+    report = asyncio.run(run(args))
+
+    if args.output:
+        directory = os.path.dirname(args.output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+上游替身服务：用 fixtures 中录制的响应模拟 Google CSE（/customsearch/v1）和 Scrapfly（/scrape），
+可以为每个上游配置延迟分布、错误率和周期性的429突发，离线压测时不消耗Google配额和Scrapfly额度
+
+- Google：按查询中的名称改写录制的搜索结果，每个名称对应不同的LinkedIn slug，缓存和索引不会互相命中
+- Scrapfly：按URL路径返回公司主页 / 公司life页面 / 个人资料的录制HTML，响应为Scrapfly API的JSON信封
+- GET /stats 返回各上游的请求数和各类响应数
+
+用法:
+    python benchmarks/upstream_stub.py [--port 8765] [--google-latency lognormal:150:0.4]
+        [--scrapfly-latency lognormal:1200:0.5] [--scrapfly-error-rate 0.02]
+        [--google-burst-interval 60 --google-burst-duration 5]
+
+爬虫侧设置 GOOGLE_SEARCH_BASE_URL=http://127.0.0.1:8765/customsearch/v1 和 SCRAPFLY_HOST=http://127.0.0.1:8765，
+或使用 benchmarks/load_test.py 自动启动本服务
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from typing import Any, Callable, Dict
+
+from aiohttp import web
+
+from common import load_json, load_text
+
+# 录制结果中被替换为查询名称的公司名称和slug
+FIXTURE_NAME = 'Example Diagnostics'
+FIXTURE_SLUG = 'example-diagnostics'
+
+# 一次请求的结果
+OK = 'ok'
+ERROR = 'error'
+THROTTLED = 'throttled'
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    解析延迟分布，返回每次调用采样一个延迟（秒）的函数
+
+    Args:
+        spec: "fixed:毫秒" / "uniform:最小毫秒:最大毫秒" / "lognormal:中位数毫秒:sigma" / "exp:平均毫秒"
+
+    Returns:
+        采样函数
+    """
+    kind, *values = spec.split(':')
+    try:
+        numbers = [float(value) for value in values]
+        if kind == 'fixed' and len(numbers) == 1:
+            return lambda: numbers[0] / 1000
+        if kind == 'uniform' and len(numbers) == 2:
+            return lambda: random.uniform(*numbers) / 1000
+        if kind == 'lognormal' and len(numbers) == 2:
+            mu = math.log(max(numbers[0], 1e-3))
+            return lambda: random.lognormvariate(mu, numbers[1]) / 1000
+        if kind == 'exp' and len(numbers) == 1:
+            return lambda: random.expovariate(1 / numbers[0]) / 1000 if numbers[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise argparse.ArgumentTypeError(f"invalid latency distribution {spec!r}")
+
+class UpstreamProfile:
+    """
+    一个上游的行为：延迟分布、随机5xx比例和429突发窗口
+
+    Args:
+        name: 上游名称
+        latency: 延迟采样函数
+        error_rate: 返回5xx的请求比例
+        burst_interval: 每隔多少秒出现一次429突发，0表示不出现
+        burst_duration: 每次突发持续的秒数，期间所有请求返回429
+    """
+
+    def __init__(self, name: str, latency: Callable[[], float], error_rate: float = 0.0,
+                 burst_interval: float = 0.0, burst_duration: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.burst_interval = burst_interval
+        self.burst_duration = burst_duration
+        self.started = time.monotonic()
+        self.counters = {'requests': 0, OK: 0, ERROR: 0, THROTTLED: 0}
+
+    def throttled(self) -> bool:
+        """当前是否处于429突发窗口内"""
+        if self.burst_interval <= 0 or self.burst_duration <= 0:
+            return False
+        return (time.monotonic() - self.started) % self.burst_interval < self.burst_duration
+
+    async def respond(self) -> str:
+        """等待采样的延迟，返回本次请求的结果（OK / ERROR / THROTTLED）"""
+        self.counters['requests'] += 1
+        await asyncio.sleep(self.latency())
+        if self.throttled():
+            outcome = THROTTLED
+        elif random.random() < self.error_rate:
+            outcome = ERROR
+        else:
+            outcome = OK
+        self.counters[outcome] += 1
+        return outcome
+
+def slugify(name: str) -> str:
+    """名称转为LinkedIn风格的slug，如 "Acme Corp 0001" -> "acme-corp-0001" """
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-') or 'unknown'
+
+def google_items(query: str, fixture: str) -> Dict[str, Any]:
+    """
+    根据查询改写录制的搜索结果
+
+    Args:
+        query: 查询字符串，如 "Acme Corp site:linkedin.com/company"
+        fixture: 录制的Google CSE公司搜索响应（JSON文本）
+
+    Returns:
+        Google CSE响应
+    """
+    name = re.sub(r'\s*site:\S*', '', query.replace('+', ' ')).strip() or FIXTURE_NAME
+    slug = slugify(name)
+    response = json.loads(fixture.replace(FIXTURE_SLUG, slug).replace(FIXTURE_NAME, name))
+    if 'site:linkedin.com/in' in query:
+        # 个人搜索：排在前面的结果为同名的个人资料
+        response['items'] = [{
+            'kind': 'customsearch#result',
+            'title': f"{name} - Engineer - {FIXTURE_NAME} | LinkedIn",
+            'link': f"https://www.linkedin.com/in/{slug}-{index}",
+            'snippet': f"{name}. Engineer at {FIXTURE_NAME}.",
+        } for index in range(3)] + response.get('items', [])
+    return response
+
+async def handle_google(request: web.Request) -> web.Response:
+    """模拟 GET /customsearch/v1"""
+    profile: UpstreamProfile = request.app['google']
+    outcome = await profile.respond()
+    if outcome == THROTTLED:
+        return web.json_response({'error': {'code': 429, 'message': 'Rate Limit Exceeded', 'status': 'RESOURCE_EXHAUSTED'}},
+                                 status=429, headers={'Retry-After': '1'})
+    if outcome == ERROR:
+        return web.json_response({'error': {'code': 503, 'message': 'Backend Error', 'status': 'UNAVAILABLE'}}, status=503)
+    return web.json_response(google_items(request.query.get('q', ''), request.app['google_fixture']))
+
+def scrapfly_error(status: int, code: str, message: str, retryable: bool) -> web.Response:
+    """Scrapfly API错误信封"""
+    return web.json_response({
+        'error_id': str(uuid.uuid4()),
+        'code': code,
+        'message': message,
+        'http_code': status,
+        'retryable': retryable,
+        'links': {},
+    }, status=status, headers={'Retry-After': '1'} if status == 429 else None)
+
+async def handle_scrapfly(request: web.Request) -> web.Response:
+    """模拟 GET /scrape，按URL路径返回录制的页面"""
+    profile: UpstreamProfile = request.app['scrapfly']
+    outcome = await profile.respond()
+    if outcome == THROTTLED:
+        return scrapfly_error(429, 'ERR::THROTTLE::MAX_REQUEST_RATE_EXCEEDED', 'Max request rate exceeded', True)
+    if outcome == ERROR:
+        return scrapfly_error(502, 'ERR::SCRAPE::UPSTREAM_TIMEOUT', 'Upstream website took too long to respond', True)
+
+    url = request.query.get('url', '')
+    pages = request.app['pages']
+    if '/life' in url:
+        content = pages['life']
+    elif '/in/' in url:
+        content = pages['profile']
+    else:
+        content = pages['overview']
+    config = {key: value for key, value in request.query.items() if key != 'key'}
+    config.update(url=url, headers={})
+    return web.json_response({
+        'config': config,
+        'context': {},
+        'result': {
+            'url': url,
+            'status': 'DONE',
+            'success': True,
+            'status_code': 200,
+            'reason': 'OK',
+            'format': 'text',
+            'content': content,
+            'request_headers': {},
+            'response_headers': {'content-type': 'text/html; charset=utf-8'},
+            'duration': 0,
+            'log_url': '',
+            'error': None,
+        },
+    })
+
+async def handle_stats(request: web.Request) -> web.Response:
+    """各上游的请求计数"""
+    return web.json_response({name: request.app[name].counters for name in ('google', 'scrapfly')})
+
+def build_app(google: UpstreamProfile, scrapfly: UpstreamProfile) -> web.Application:
+    """创建替身服务"""
+    app = web.Application()
+    app['google'] = google
+    app['scrapfly'] = scrapfly
+    app['google_fixture'] = json.dumps(load_json('google_cse_company.json'))
+    app['pages'] = {
+        'overview': load_text('company_overview.html'),
+        'life': load_text('company_life.html'),
+        'profile': load_text('profile.html'),
+    }
+    app.router.add_get('/customsearch/v1', handle_google)
+    app.router.add_get('/scrape', handle_scrapfly)
+    app.router.add_get('/stats', handle_stats)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline Google CSE / Scrapfly stand-in')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址 (默认: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口 (默认: 8765)')
+    parser.add_argument('--seed', type=int, default=None, help='随机数种子，便于复现')
+    defaults = {'google': 'lognormal:150:0.4', 'scrapfly': 'lognormal:1200:0.5'}
+    for name, latency in defaults.items():
+        parser.add_argument(f'--{name}-latency', type=parse_latency, default=parse_latency(latency),
+                            help=f'{name} 延迟分布：fixed:ms / uniform:min:max / lognormal:median:sigma / exp:mean (默认: {latency})')
+        parser.add_argument(f'--{name}-error-rate', type=float, default=0.0, help=f'{name} 返回5xx的比例 (默认: 0)')
+        parser.add_argument(f'--{name}-burst-interval', type=float, default=0.0,
+                            help=f'{name} 每隔多少秒出现一次429突发，0表示不出现 (默认: 0)')
+        parser.add_argument(f'--{name}-burst-duration', type=float, default=0.0, help=f'{name} 每次429突发持续的秒数 (默认: 0)')
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    profiles = {
+        name: UpstreamProfile(
+            name,
+            getattr(args, f'{name}_latency'),
+            getattr(args, f'{name}_error_rate'),
+            getattr(args, f'{name}_burst_interval'),
+            getattr(args, f'{name}_burst_duration'),
+        )
+        for name in defaults
+    }
+    print(f"upstream stub listening on http://{args.host}:{args.port}", flush=True)
+    web.run_app(build_app(profiles['google'], profiles['scrapfly']), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
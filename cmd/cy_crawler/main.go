@@ -6,9 +6,11 @@ import (
 	"cy_crawler/internal/mq"
 	"cy_crawler/internal/processor"
 	"cy_crawler/internal/types"
+	"fmt"
 	"os"
 	"os/signal"
 	"syscall"
+	"time"
 
 	"github.com/sirupsen/logrus"
 )
@@ -25,17 +27,31 @@ func main() {
 		panic("Failed to initialize logger: " + err.Error())
 	}
 
-	// 启动心跳日志
-	go logger.StartHeartbeatLogger(cfg.Application.HeartbeatInterval)
-
 	// 初始化处理器
 	proc := processor.NewProcessor(cfg.Application.PythonScriptPath)
+	proc.SetTaskTimeout(
+		time.Duration(cfg.Application.TaskTimeout)*time.Second,
+		time.Duration(cfg.Application.MinTaskBudget)*time.Second,
+		time.Duration(cfg.Application.TaskKillGrace)*time.Second,
+	)
 
 	// 验证Python环境
 	if err := proc.ValidatePythonEnvironment(); err != nil {
 		logger.Logger.WithError(err).Fatal("Python environment validation failed")
 	}
 
+	// 结果以长度前缀帧写到专用描述符，需要在启动worker池之前设置
+	proc.SetFramedResults(cfg.Application.FramedResults, cfg.Application.ResultCompressThreshold)
+
+	// 启动常驻Python worker池
+	if cfg.Application.PythonWorkers > 0 {
+		if err := proc.StartWorkerPool(cfg.Application.WorkerScriptPath,
+			cfg.Application.PythonWorkers, cfg.Application.WorkerConcurrency); err != nil {
+			logger.Logger.WithError(err).Fatal("Failed to start python worker pool")
+		}
+		defer proc.Shutdown()
+	}
+
 	// 初始化生产者
 	producer, err := mq.NewProducer(cfg)
 	if err != nil {
@@ -43,6 +59,10 @@ func main() {
 	}
 	defer producer.Shutdown()
 
+	// 常驻worker的流式结果，可选地把部分结果先发出去
+	proc.SetStreamResults(cfg.Application.StreamResults, cfg.Application.ForwardPartialResults)
+	proc.SetPartialHandler(producer.SendResult)
+
 	// 消息处理函数
 	messageHandler := func(task *types.TaskMessage) error {
 		result, err := proc.ProcessTask(task)
@@ -79,6 +99,29 @@ func main() {
 	}
 	defer consumer.Shutdown()
 
+	// 启动心跳日志，带上任务池的排队深度和worker利用率，以及结果发送的延迟和spool深度
+	go logger.StartHeartbeatLogger(cfg.Application.HeartbeatInterval, func() logrus.Fields {
+		stats := consumer.Stats()
+		sendStats := producer.Stats()
+		return logrus.Fields{
+			"workers":          stats.Workers,
+			"inFlight":         stats.InFlight,
+			"queueDepth":       stats.QueueDepth,
+			"utilization":      fmt.Sprintf("%.2f", stats.Utilization),
+			"completed":        stats.Completed,
+			"failed":           stats.Failed,
+			"throttled":        stats.Throttled,
+			"sendQueueDepth":   sendStats.QueueDepth,
+			"spoolDepth":       sendStats.SpoolDepth,
+			"sent":             sendStats.Sent,
+			"spooled":          sendStats.Spooled,
+			"sendRetries":      sendStats.Retries,
+			"sendLatencyP50Ms": sendStats.LatencyP50,
+			"sendLatencyP95Ms": sendStats.LatencyP95,
+			"sendLatencyMaxMs": sendStats.LatencyMax,
+		}
+	})
+
 	logger.Logger.Info("CyCrawler application started successfully")
 
 	// 等待中断信号
@@ -0,0 +1,335 @@
+// loadtest 端到端压测：不经过RocketMQ，直接以目标速率调用 Processor.ProcessTask，
+// 上游由 benchmarks/upstream_stub.py 替代，报告每个并发度下的延迟分位数、吞吐、CPU时间和峰值RSS
+//
+// 用法:
+//
+//	python benchmarks/upstream_stub.py --port 8765 &
+//	python benchmarks/load_test.py --upstream http://127.0.0.1:8765 --write-config /tmp/cy_crawler_load.toml
+//	go run ./cmd/loadtest -upstream http://127.0.0.1:8765 -crawler-config /tmp/cy_crawler_load.toml -concurrency 4,16,64
+package main
+
+import (
+	"cy_crawler/internal/config"
+	"cy_crawler/internal/logger"
+	"cy_crawler/internal/processor"
+	"cy_crawler/internal/types"
+	"encoding/json"
+	"flag"
+	"fmt"
+	"os"
+	"path/filepath"
+	"sort"
+	"strconv"
+	"strings"
+	"sync"
+	"syscall"
+	"time"
+
+	"github.com/sirupsen/logrus"
+)
+
+// RSS采样间隔
+const sampleInterval = 100 * time.Millisecond
+
+// levelResult 一个并发度的压测结果
+type levelResult struct {
+	Concurrency    int     `json:"concurrency"`
+	Tasks          int     `json:"tasks"`
+	Errors         int     `json:"errors"`
+	Seconds        float64 `json:"seconds"`
+	TasksPerSecond float64 `json:"tasks_per_second"`
+	P50Ms          float64 `json:"p50_ms"`
+	P95Ms          float64 `json:"p95_ms"`
+	P99Ms          float64 `json:"p99_ms"`
+	CPUSeconds     float64 `json:"cpu_seconds"`
+	CPUPercent     float64 `json:"cpu_percent"`
+	PeakRSSMB      float64 `json:"peak_rss_mb"`
+}
+
+func main() {
+	configPath := flag.String("config", "", "应用配置文件，默认与 cy_crawler 相同")
+	upstream := flag.String("upstream", "", "替身服务地址，如 http://127.0.0.1:8765")
+	crawlerConfig := flag.String("crawler-config", "", "Python侧压测配置（CY_CRAWLER_CONFIG），见 load_test.py --write-config")
+	tasks := flag.Int("tasks", 200, "每个并发度发送的任务数")
+	rate := flag.Float64("rate", 20, "目标发送速率 tasks/s，0表示一次性全部发送")
+	levels := flag.String("concurrency", "4,16,64", "并发度（同时处理的任务数），逗号分隔")
+	workers := flag.Int("workers", -1, "常驻Python worker数，-1表示使用配置中的 python_workers，0表示每个任务启动一次脚本")
+	logLevel := flag.String("log-level", "warn", "压测期间的日志级别，避免逐任务的Info日志影响结果")
+	output := flag.String("output", "", "结果JSON写入路径")
+	flag.Parse()
+
+	cfg, err := config.LoadConfig(*configPath)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "failed to load config: %v\n", err)
+		os.Exit(1)
+	}
+	if err := logger.InitLogger(cfg); err != nil {
+		fmt.Fprintf(os.Stderr, "failed to initialize logger: %v\n", err)
+		os.Exit(1)
+	}
+	if level, err := logrus.ParseLevel(*logLevel); err == nil {
+		logger.Logger.SetLevel(level)
+	}
+	if *workers >= 0 {
+		cfg.Application.PythonWorkers = *workers
+	}
+
+	// Python子进程继承这些环境变量
+	if *upstream != "" {
+		os.Setenv("GOOGLE_SEARCH_BASE_URL", *upstream+"/customsearch/v1")
+		os.Setenv("SCRAPFLY_HOST", *upstream)
+		os.Setenv("GOOGLE_SEARCH_API_KEY", "load-test")
+		os.Setenv("GOOGLE_SEARCH_ENGINE_ID", "load-test")
+		os.Setenv("SCRAPFLY_API_KEY", "load-test")
+	}
+	if *crawlerConfig != "" {
+		path, _ := filepath.Abs(*crawlerConfig)
+		os.Setenv("CY_CRAWLER_CONFIG", path)
+	}
+
+	concurrencies, err := parseLevels(*levels)
+	if err != nil {
+		fmt.Fprintf(os.Stderr, "invalid -concurrency: %v\n", err)
+		os.Exit(1)
+	}
+
+	fmt.Printf("ProcessTask, %d tasks per level at %.1f tasks/s, python_workers=%d\n",
+		*tasks, *rate, cfg.Application.PythonWorkers)
+	fmt.Printf("%5s%7s%5s%9s%9s%9s%9s%8s%7s%8s\n",
+		"conc", "tasks", "err", "tasks/s", "p50 ms", "p95 ms", "p99 ms", "cpu s", "cpu %", "rss MB")
+	var results []levelResult
+	for _, concurrency := range concurrencies {
+		result, err := runLevel(cfg, concurrency, *tasks, *rate)
+		if err != nil {
+			fmt.Fprintf(os.Stderr, "level %d failed: %v\n", concurrency, err)
+			os.Exit(1)
+		}
+		fmt.Printf("%5d%7d%5d%9.2f%9.1f%9.1f%9.1f%8.2f%7.1f%8.1f\n",
+			result.Concurrency, result.Tasks, result.Errors, result.TasksPerSecond,
+			result.P50Ms, result.P95Ms, result.P99Ms, result.CPUSeconds, result.CPUPercent, result.PeakRSSMB)
+		results = append(results, result)
+	}
+
+	if *output != "" {
+		data, _ := json.MarshalIndent(map[string]interface{}{"tasks": *tasks, "rate": *rate, "levels": results}, "", "  ")
+		if err := os.WriteFile(*output, data, 0644); err != nil {
+			fmt.Fprintf(os.Stderr, "failed to write %s: %v\n", *output, err)
+			os.Exit(1)
+		}
+		fmt.Printf("results written to %s\n", *output)
+	}
+}
+
+// parseLevels 解析逗号分隔的并发度
+func parseLevels(value string) ([]int, error) {
+	var levels []int
+	for _, part := range strings.Split(value, ",") {
+		level, err := strconv.Atoi(strings.TrimSpace(part))
+		if err != nil || level <= 0 {
+			return nil, fmt.Errorf("bad concurrency %q", part)
+		}
+		levels = append(levels, level)
+	}
+	return levels, nil
+}
+
+// newProcessor 按应用配置创建处理器，与 cmd/cy_crawler 相同（不发送部分结果）
+func newProcessor(cfg *types.Config) (*processor.Processor, error) {
+	proc := processor.NewProcessor(cfg.Application.PythonScriptPath)
+	proc.SetTaskTimeout(
+		time.Duration(cfg.Application.TaskTimeout)*time.Second,
+		time.Duration(cfg.Application.MinTaskBudget)*time.Second,
+		time.Duration(cfg.Application.TaskKillGrace)*time.Second,
+	)
+	proc.SetFramedResults(cfg.Application.FramedResults, cfg.Application.ResultCompressThreshold)
+	if cfg.Application.PythonWorkers > 0 {
+		if err := proc.StartWorkerPool(cfg.Application.WorkerScriptPath,
+			cfg.Application.PythonWorkers, cfg.Application.WorkerConcurrency); err != nil {
+			return nil, err
+		}
+	}
+	proc.SetStreamResults(cfg.Application.StreamResults, false)
+	return proc, nil
+}
+
+// buildTask 生成第i个任务，公司和个人交替，名称唯一（替身服务为每个名称返回不同的LinkedIn页面）
+func buildTask(i int) *types.TaskMessage {
+	website := fmt.Sprintf("https://loadtest-%05d.example.com", i)
+	task := &types.TaskMessage{
+		RequestID:      fmt.Sprintf("load-%d", i),
+		TenantID:       "load-test",
+		CompanyWebsite: &website,
+		Type:           1,
+	}
+	company := fmt.Sprintf("Load Test Company %05d", i)
+	task.CompanyName = &company
+	if i%2 == 1 {
+		person := fmt.Sprintf("Load Tester %05d", i)
+		email := fmt.Sprintf("tester%d@loadtest-%05d.example.com", i, i)
+		task.Type = 2
+		task.ContactPersonName = &person
+		task.EmailAddress = &email
+	}
+	return task
+}
+
+// runLevel 以一个并发度执行一轮压测，每轮使用新的处理器和worker池，结束时关闭池以统计子进程的CPU时间
+func runLevel(cfg *types.Config, concurrency, count int, rate float64) (levelResult, error) {
+	proc, err := newProcessor(cfg)
+	if err != nil {
+		return levelResult{}, err
+	}
+	cpuBefore := cpuSeconds()
+
+	stop := make(chan struct{})
+	peakRSS := make(chan int64, 1)
+	go func() { peakRSS <- samplePeakRSS(stop) }()
+
+	var mu sync.Mutex
+	var latencies []float64
+	errorCount := 0
+	slots := make(chan struct{}, concurrency)
+	var wg sync.WaitGroup
+
+	started := time.Now()
+	for i := 0; i < count; i++ {
+		scheduled := started
+		if rate > 0 {
+			scheduled = started.Add(time.Duration(float64(i) / rate * float64(time.Second)))
+		}
+		time.Sleep(time.Until(scheduled))
+
+		wg.Add(1)
+		go func(task *types.TaskMessage, scheduled time.Time) {
+			defer wg.Done()
+			slots <- struct{}{}
+			result, err := proc.ProcessTask(task)
+			<-slots
+			latency := time.Since(scheduled).Seconds() * 1000
+
+			mu.Lock()
+			defer mu.Unlock()
+			latencies = append(latencies, latency)
+			if err != nil || result.Code != 200 {
+				errorCount++
+			}
+		}(buildTask(i), scheduled)
+	}
+	wg.Wait()
+	elapsed := time.Since(started).Seconds()
+	close(stop)
+	proc.Shutdown()
+	cpu := cpuSeconds() - cpuBefore
+
+	sort.Float64s(latencies)
+	return levelResult{
+		Concurrency:    concurrency,
+		Tasks:          len(latencies),
+		Errors:         errorCount,
+		Seconds:        round(elapsed, 3),
+		TasksPerSecond: round(float64(len(latencies))/elapsed, 2),
+		P50Ms:          round(percentile(latencies, 50), 1),
+		P95Ms:          round(percentile(latencies, 95), 1),
+		P99Ms:          round(percentile(latencies, 99), 1),
+		CPUSeconds:     round(cpu, 2),
+		CPUPercent:     round(cpu/elapsed*100, 1),
+		PeakRSSMB:      round(float64(<-peakRSS)/1024/1024, 1),
+	}, nil
+}
+
+// percentile 最近秩百分位数，sorted 必须已排序
+func percentile(sorted []float64, q float64) float64 {
+	if len(sorted) == 0 {
+		return 0
+	}
+	index := int(q/100*float64(len(sorted))+0.5) - 1
+	if index < 0 {
+		index = 0
+	}
+	if index >= len(sorted) {
+		index = len(sorted) - 1
+	}
+	return sorted[index]
+}
+
+func round(value float64, digits int) float64 {
+	scale := 1.0
+	for i := 0; i < digits; i++ {
+		scale *= 10
+	}
+	return float64(int64(value*scale+0.5)) / scale
+}
+
+// cpuSeconds 本进程和已回收子进程的用户态+内核态CPU时间
+func cpuSeconds() float64 {
+	total := 0.0
+	for _, who := range []int{syscall.RUSAGE_SELF, syscall.RUSAGE_CHILDREN} {
+		var usage syscall.Rusage
+		if err := syscall.Getrusage(who, &usage); err == nil {
+			total += time.Duration(usage.Utime.Nano() + usage.Stime.Nano()).Seconds()
+		}
+	}
+	return total
+}
+
+// samplePeakRSS 定时统计本进程及所有子孙进程（Python worker、解析进程池、单任务脚本）的RSS总和，返回峰值
+func samplePeakRSS(stop <-chan struct{}) int64 {
+	ticker := time.NewTicker(sampleInterval)
+	defer ticker.Stop()
+	var peak int64
+	for {
+		var total int64
+		for _, pid := range processTree(os.Getpid()) {
+			total += rssBytes(pid)
+		}
+		if total > peak {
+			peak = total
+		}
+		select {
+		case <-stop:
+			return peak
+		case <-ticker.C:
+		}
+	}
+}
+
+// processTree pid及其所有子孙进程（读取 /proc/<pid>/task/*/children），没有 /proc 时只返回pid
+func processTree(pid int) []int {
+	pids := []int{pid}
+	for i := 0; i < len(pids); i++ {
+		tasks, err := os.ReadDir(fmt.Sprintf("/proc/%d/task", pids[i]))
+		if err != nil {
+			continue
+		}
+		for _, task := range tasks {
+			data, err := os.ReadFile(fmt.Sprintf("/proc/%d/task/%s/children", pids[i], task.Name()))
+			if err != nil {
+				continue
+			}
+			for _, field := range strings.Fields(string(data)) {
+				if child, err := strconv.Atoi(field); err == nil {
+					pids = append(pids, child)
+				}
+			}
+		}
+	}
+	return pids
+}
+
+// rssBytes 进程的常驻内存（字节），进程已退出时为0
+func rssBytes(pid int) int64 {
+	data, err := os.ReadFile(fmt.Sprintf("/proc/%d/status", pid))
+	if err != nil {
+		return 0
+	}
+	for _, line := range strings.Split(string(data), "\n") {
+		if strings.HasPrefix(line, "VmRSS:") {
+			fields := strings.Fields(line)
+			if len(fields) >= 2 {
+				kb, _ := strconv.ParseInt(fields[1], 10, 64)
+				return kb * 1024
+			}
+		}
+	}
+	return 0
+}
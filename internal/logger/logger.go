@@ -39,15 +39,21 @@ func InitLogger(config *types.Config) error {
 	return nil
 }
 
-// StartHeartbeatLogger 启动心跳日志
-func StartHeartbeatLogger(interval int) {
+// StartHeartbeatLogger 启动心跳日志，stats 不为nil时把其返回的字段（如任务池状态）一起输出
+func StartHeartbeatLogger(interval int, stats func() logrus.Fields) {
 	ticker := time.NewTicker(time.Duration(interval) * time.Second)
 	defer ticker.Stop()
 
 	for range ticker.C {
-		Logger.WithFields(logrus.Fields{
+		fields := logrus.Fields{
 			"component": "heartbeat",
 			"timestamp": time.Now().Unix(),
-		}).Info("Application heartbeat")
+		}
+		if stats != nil {
+			for key, value := range stats() {
+				fields[key] = value
+			}
+		}
+		Logger.WithFields(fields).Info("Application heartbeat")
 	}
 }
@@ -14,15 +14,30 @@ import (
 	"github.com/sirupsen/logrus"
 )
 
+// 未配置任务超时时，关闭消费者前等待处理中任务的最长时间
+const defaultDrainTimeout = 60 * time.Second
+
 type Consumer struct {
 	client rocketmq.PushConsumer
 	config *types.Config
+	pool   *taskPool
 }
 
 // NewConsumer 创建支持阿里云的消费者
+//
+// 消息交给容量为 consumer_workers 的任务池并发处理，每条消息在处理完成（结果已发送）后才确认；
+// 等待空闲worker的消息达到 consumer_queue 条时暂停拉取，降到一半以下时恢复
 func NewConsumer(config *types.Config, messageHandler func(*types.TaskMessage) error) (*Consumer, error) {
 	// 阿里云 RocketMQ 配置
 	endpoints := config.RocketMQ.Common.Endpoints
+	workers := config.Application.ConsumerWorkers
+	if workers < 1 {
+		workers = 1
+	}
+	queueLimit := config.Application.ConsumerQueue
+	if queueLimit < 1 {
+		queueLimit = workers
+	}
 
 	// 创建消费者选项
 	opts := []consumer.Option{
@@ -35,6 +50,9 @@ func NewConsumer(config *types.Config, messageHandler func(*types.TaskMessage) e
 			SecretKey: config.RocketMQ.Common.SecretKey,
 		}),
 		consumer.WithNamespace(config.RocketMQ.Common.InstanceID),
+		// 每次回调只处理一条消息，回调返回即确认该消息；回调协程数覆盖处理中和排队的消息
+		consumer.WithConsumeMessageBatchMaxSize(1),
+		consumer.WithConsumeGoroutineNums(workers + queueLimit),
 	}
 
 	// 创建消费者
@@ -47,6 +65,16 @@ func NewConsumer(config *types.Config, messageHandler func(*types.TaskMessage) e
 		client: c,
 		config: config,
 	}
+	consumerInst.pool = newTaskPool(workers, queueLimit, func() {
+		logger.Logger.WithFields(logrus.Fields{
+			"workers":    workers,
+			"queueLimit": queueLimit,
+		}).Warn("Task pool saturated, suspending message pulls")
+		c.Suspend()
+	}, func() {
+		logger.Logger.Info("Task pool drained, resuming message pulls")
+		c.Resume()
+	})
 
 	// 使用配置中的tag
 	tag := config.RocketMQ.BGCheck.Consumer.Tag
@@ -62,16 +90,23 @@ func NewConsumer(config *types.Config, messageHandler func(*types.TaskMessage) e
 
 	err = c.Subscribe(config.RocketMQ.BGCheck.Consumer.Topic, selector,
 		func(ctx context.Context, msgs ...*primitive.MessageExt) (consumer.ConsumeResult, error) {
+			result := consumer.ConsumeSuccess
 			for _, msg := range msgs {
-				if err := consumerInst.handleMessage(msg, messageHandler); err != nil {
+				err := consumerInst.pool.Run(func() error {
+					return consumerInst.handleMessage(msg, messageHandler)
+				})
+				if err != nil {
+					// 结果未能发送，稍后重新投递
 					logger.Logger.WithFields(logrus.Fields{
-						"topic": msg.Topic,
-						"msgId": msg.MsgId,
-						"error": err.Error(),
-					}).Error("Failed to handle message")
+						"topic":          msg.Topic,
+						"msgId":          msg.MsgId,
+						"reconsumeTimes": msg.ReconsumeTimes,
+						"error":          err.Error(),
+					}).Error("Failed to handle message, will retry later")
+					result = consumer.ConsumeRetryLater
 				}
 			}
-			return consumer.ConsumeSuccess, nil
+			return result, nil
 		})
 
 	if err != nil {
@@ -81,7 +116,7 @@ func NewConsumer(config *types.Config, messageHandler func(*types.TaskMessage) e
 	return consumerInst, nil
 }
 
-// handleMessage 处理单个消息
+// handleMessage 处理单个消息，无法解析或校验失败的消息不会重试，只返回处理函数的错误
 func (c *Consumer) handleMessage(msg *primitive.MessageExt, handler func(*types.TaskMessage) error) error {
 	logger.Logger.WithFields(logrus.Fields{
 		"topic": msg.Topic,
@@ -96,7 +131,7 @@ func (c *Consumer) handleMessage(msg *primitive.MessageExt, handler func(*types.
 			"body":  string(msg.Body),
 			"error": err.Error(),
 		}).Error("Failed to parse message body")
-		return err
+		return nil
 	}
 
 	// 验证必需字段
@@ -106,7 +141,7 @@ func (c *Consumer) handleMessage(msg *primitive.MessageExt, handler func(*types.
 			"task":  taskMsg,
 			"error": err.Error(),
 		}).Error("Invalid task message")
-		return err
+		return nil
 	}
 
 	return handler(&taskMsg)
@@ -154,7 +189,24 @@ func (c *Consumer) Start() error {
 	return fmt.Errorf("failed to start consumer after %d attempts: %v", maxRetries, err)
 }
 
-// Shutdown 关闭消费者
+// Stats 任务池的运行状态
+func (c *Consumer) Stats() PoolStats {
+	return c.pool.Stats()
+}
+
+// Shutdown 关闭消费者：先暂停拉取，等待处理中的任务完成（最多一个任务超时），再关闭客户端
 func (c *Consumer) Shutdown() error {
+	c.client.Suspend()
+	timeout := defaultDrainTimeout
+	if c.config.Application.TaskTimeout > 0 {
+		timeout = time.Duration(c.config.Application.TaskTimeout+c.config.Application.TaskKillGrace) * time.Second
+	}
+	if !c.pool.Wait(timeout) {
+		stats := c.pool.Stats()
+		logger.Logger.WithFields(logrus.Fields{
+			"inFlight":   stats.InFlight,
+			"queueDepth": stats.QueueDepth,
+		}).Warn("Shutting down consumer with tasks still running")
+	}
 	return c.client.Shutdown()
 }
@@ -0,0 +1,176 @@
+package mq
+
+import (
+	"sync"
+	"time"
+)
+
+// PoolStats 任务池的运行状态，用于心跳日志
+type PoolStats struct {
+	// Workers 同时处理的任务数上限
+	Workers int `json:"workers"`
+	// InFlight 正在处理的任务数
+	InFlight int `json:"inFlight"`
+	// QueueDepth 已从broker拉取、等待空闲worker的消息数
+	QueueDepth int `json:"queueDepth"`
+	// Utilization 自上次统计以来worker的忙碌比例（0~1）
+	Utilization float64 `json:"utilization"`
+	// Completed / Failed 累计完成和失败的任务数
+	Completed int64 `json:"completed"`
+	Failed    int64 `json:"failed"`
+	// Throttled 当前是否暂停了拉取
+	Throttled bool `json:"throttled"`
+}
+
+// taskPool 限制同时处理的任务数，排队的消息超过上限时暂停拉取，降到一半以下时恢复
+type taskPool struct {
+	slots      chan struct{}
+	queueLimit int
+	// 拉取节流回调，队列达到上限时调用 pause，降到 queueLimit/2 以下时调用 resume
+	pause  func()
+	resume func()
+
+	mu        sync.Mutex
+	idle      *sync.Cond
+	waiting   int
+	inFlight  int
+	throttled bool
+	completed int64
+	failed    int64
+	// 忙碌时间的统计：busy 为上次统计以来已结束任务的累计时长，started 为正在处理的任务的开始时间
+	busy      time.Duration
+	started   map[int64]time.Time
+	nextID    int64
+	lastStats time.Time
+}
+
+// newTaskPool 创建任务池
+//
+// workers 为同时处理的任务数上限，queueLimit 为等待空闲worker的消息数上限（达到后暂停拉取）
+func newTaskPool(workers, queueLimit int, pause, resume func()) *taskPool {
+	if workers < 1 {
+		workers = 1
+	}
+	if queueLimit < 1 {
+		queueLimit = 1
+	}
+	p := &taskPool{
+		slots:      make(chan struct{}, workers),
+		queueLimit: queueLimit,
+		pause:      pause,
+		resume:     resume,
+		started:    make(map[int64]time.Time),
+		lastStats:  time.Now(),
+	}
+	p.idle = sync.NewCond(&p.mu)
+	return p
+}
+
+// Run 等待空闲worker后执行 task 并返回其错误，调用方在返回后才确认消息
+// task panic时同样释放worker并计为失败，panic继续向上传播
+func (p *taskPool) Run(task func() error) error {
+	select {
+	case p.slots <- struct{}{}:
+	default:
+		// 没有空闲worker时排队等待，排队的消息达到上限时暂停拉取
+		p.mu.Lock()
+		p.waiting++
+		if p.waiting >= p.queueLimit && !p.throttled {
+			p.throttled = true
+			p.pause()
+		}
+		p.mu.Unlock()
+
+		p.slots <- struct{}{}
+
+		p.mu.Lock()
+		p.waiting--
+		if p.throttled && p.waiting <= p.queueLimit/2 {
+			p.throttled = false
+			p.resume()
+		}
+		p.mu.Unlock()
+	}
+
+	p.mu.Lock()
+	p.inFlight++
+	id := p.nextID
+	p.nextID++
+	p.started[id] = time.Now()
+	p.mu.Unlock()
+
+	failed := true
+	defer func() { p.release(id, failed) }()
+
+	err := task()
+	failed = err != nil
+	return err
+}
+
+// release 任务结束后更新统计并释放worker，没有排队和处理中的任务时唤醒 Wait
+func (p *taskPool) release(id int64, failed bool) {
+	p.mu.Lock()
+	p.busy += time.Since(p.started[id])
+	delete(p.started, id)
+	p.inFlight--
+	if failed {
+		p.failed++
+	} else {
+		p.completed++
+	}
+	if p.inFlight == 0 && p.waiting == 0 {
+		p.idle.Broadcast()
+	}
+	p.mu.Unlock()
+	<-p.slots
+}
+
+// Stats 返回当前状态，Utilization 为自上次调用以来的worker忙碌比例
+func (p *taskPool) Stats() PoolStats {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+
+	now := time.Now()
+	busy := p.busy
+	for id, started := range p.started {
+		// 正在处理的任务计入到现在为止的部分，并把开始时间移到现在，下次只统计之后的部分
+		busy += now.Sub(started)
+		p.started[id] = now
+	}
+	elapsed := now.Sub(p.lastStats)
+	p.busy = 0
+	p.lastStats = now
+
+	utilization := 0.0
+	if elapsed > 0 {
+		utilization = busy.Seconds() / (elapsed.Seconds() * float64(cap(p.slots)))
+	}
+	return PoolStats{
+		Workers:     cap(p.slots),
+		InFlight:    p.inFlight,
+		QueueDepth:  p.waiting,
+		Utilization: utilization,
+		Completed:   p.completed,
+		Failed:      p.failed,
+		Throttled:   p.throttled,
+	}
+}
+
+// Wait 等待所有排队和处理中的任务结束，超过 timeout 返回false
+func (p *taskPool) Wait(timeout time.Duration) bool {
+	done := make(chan struct{})
+	go func() {
+		p.mu.Lock()
+		for p.inFlight > 0 || p.waiting > 0 {
+			p.idle.Wait()
+		}
+		p.mu.Unlock()
+		close(done)
+	}()
+	select {
+	case <-done:
+		return true
+	case <-time.After(timeout):
+		return false
+	}
+}
@@ -0,0 +1,135 @@
+package mq
+
+import (
+	"errors"
+	"sync"
+	"sync/atomic"
+	"testing"
+	"time"
+)
+
+func TestTaskPoolLimitsConcurrency(t *testing.T) {
+	pool := newTaskPool(2, 10, func() {}, func() {})
+	var running, peak int32
+	var wg sync.WaitGroup
+	for i := 0; i < 8; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			pool.Run(func() error {
+				n := atomic.AddInt32(&running, 1)
+				for {
+					old := atomic.LoadInt32(&peak)
+					if n <= old || atomic.CompareAndSwapInt32(&peak, old, n) {
+						break
+					}
+				}
+				time.Sleep(5 * time.Millisecond)
+				atomic.AddInt32(&running, -1)
+				return nil
+			})
+		}()
+	}
+	wg.Wait()
+	if peak > 2 {
+		t.Errorf("peak concurrency = %d, want at most 2", peak)
+	}
+	if stats := pool.Stats(); stats.Completed != 8 || stats.InFlight != 0 || stats.QueueDepth != 0 {
+		t.Errorf("stats = %+v, want 8 completed and nothing in flight", stats)
+	}
+}
+
+func TestTaskPoolThrottlesPulling(t *testing.T) {
+	var paused, resumed int32
+	pool := newTaskPool(1, 2, func() { atomic.AddInt32(&paused, 1) }, func() { atomic.AddInt32(&resumed, 1) })
+
+	block := make(chan struct{})
+	started := make(chan struct{})
+	go pool.Run(func() error {
+		close(started)
+		<-block
+		return nil
+	})
+	<-started
+
+	var wg sync.WaitGroup
+	for i := 0; i < 2; i++ {
+		wg.Add(1)
+		go func() {
+			defer wg.Done()
+			pool.Run(func() error { return nil })
+		}()
+	}
+	deadline := time.Now().Add(time.Second)
+	for atomic.LoadInt32(&paused) == 0 && time.Now().Before(deadline) {
+		time.Sleep(time.Millisecond)
+	}
+	if !pool.Stats().Throttled || atomic.LoadInt32(&paused) != 1 {
+		t.Fatal("expected pulling to pause once the queue reached its limit")
+	}
+
+	close(block)
+	wg.Wait()
+	if atomic.LoadInt32(&resumed) != 1 || pool.Stats().Throttled {
+		t.Error("expected pulling to resume once the queue drained")
+	}
+}
+
+func TestTaskPoolCountsFailures(t *testing.T) {
+	pool := newTaskPool(1, 1, func() {}, func() {})
+	boom := errors.New("boom")
+	if err := pool.Run(func() error { return boom }); err != boom {
+		t.Errorf("Run() error = %v, want %v", err, boom)
+	}
+	if stats := pool.Stats(); stats.Failed != 1 || stats.Completed != 0 {
+		t.Errorf("stats = %+v, want 1 failed", stats)
+	}
+}
+
+func TestTaskPoolReleasesSlotOnPanic(t *testing.T) {
+	pool := newTaskPool(1, 1, func() {}, func() {})
+	func() {
+		defer func() {
+			if recover() == nil {
+				t.Error("expected the panic to propagate")
+			}
+		}()
+		pool.Run(func() error { panic("handler bug") })
+	}()
+
+	if stats := pool.Stats(); stats.InFlight != 0 || stats.Failed != 1 {
+		t.Errorf("stats after panic = %+v, want nothing in flight and 1 failed", stats)
+	}
+	if !pool.Wait(100 * time.Millisecond) {
+		t.Error("Wait() should not block after a panicking task")
+	}
+	done := make(chan struct{})
+	go func() {
+		pool.Run(func() error { return nil })
+		close(done)
+	}()
+	select {
+	case <-done:
+	case <-time.After(time.Second):
+		t.Fatal("slot was not released after the panic")
+	}
+}
+
+func TestTaskPoolWait(t *testing.T) {
+	pool := newTaskPool(1, 1, func() {}, func() {})
+	block := make(chan struct{})
+	started := make(chan struct{})
+	go pool.Run(func() error {
+		close(started)
+		<-block
+		return nil
+	})
+	<-started
+	if pool.Wait(10 * time.Millisecond) {
+		t.Error("Wait() returned true while a task was running")
+	}
+	close(block)
+	if !pool.Wait(time.Second) {
+		t.Error("Wait() timed out after the task finished")
+	}
+}
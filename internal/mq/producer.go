@@ -6,6 +6,9 @@ import (
 	"cy_crawler/internal/types"
 	"encoding/json"
 	"fmt"
+	"sort"
+	"sync"
+	"time"
 
 	"github.com/apache/rocketmq-client-go/v2"
 	"github.com/apache/rocketmq-client-go/v2/primitive"
@@ -13,15 +16,84 @@ import (
 	"github.com/sirupsen/logrus"
 )
 
+// 发送管道的默认配置
+const (
+	defaultQueueSize     = 1024
+	defaultBatchSize     = 16
+	defaultLinger        = 20 * time.Millisecond
+	defaultSendRetries   = 3
+	defaultInFlight      = 1
+	defaultSpoolPath     = "./spool/results.jsonl"
+	defaultSpoolInterval = 5 * time.Second
+	// 一个批次的消息体合计上限，低于RocketMQ单次发送4MB的限制
+	maxBatchBytes = 1 << 20
+	// 重试的初始退避时间，每次翻倍
+	retryBackoff = 200 * time.Millisecond
+	// 关闭时等待队列中的消息发送完成的最长时间，超时的消息写入spool
+	flushTimeout = 10 * time.Second
+	// 发送延迟统计窗口内保留的样本数
+	latencySamples = 1024
+)
+
+// outgoing 等待发送的一条结果消息
+type outgoing struct {
+	body      []byte
+	requestID string
+	code      int
+	enqueued  time.Time
+}
+
+// ProducerStats 发送管道的运行状态，用于心跳日志
+type ProducerStats struct {
+	// QueueDepth 内存队列中等待发送的消息数
+	QueueDepth int `json:"queueDepth"`
+	// SpoolDepth spool文件中等待补发的消息数
+	SpoolDepth int `json:"spoolDepth"`
+	// Sent / Spooled / Retries 累计发送成功、写入spool的消息数和批次重试次数
+	Sent    int64 `json:"sent"`
+	Spooled int64 `json:"spooled"`
+	Retries int64 `json:"retries"`
+	// 自上次统计以来，从SendResult到broker确认的发送延迟（毫秒）
+	LatencyP50 float64 `json:"latencyP50"`
+	LatencyP95 float64 `json:"latencyP95"`
+	LatencyMax float64 `json:"latencyMax"`
+}
+
 type Producer struct {
 	client rocketmq.Producer
 	config *types.Config
+
+	queue     chan *outgoing
+	spool     *spool
+	batchSize int
+	linger    time.Duration
+	retries   int
+	// 同时等待broker确认的批次数
+	inFlight chan struct{}
+
+	closeOnce sync.Once
+	closing   chan struct{}
+	senderWG  sync.WaitGroup
+	batchWG   sync.WaitGroup
+
+	mu        sync.Mutex
+	closed    bool
+	sent      int64
+	spooled   int64
+	retried   int64
+	latencies []float64
+	// 窗口已满时下一个被覆盖的样本位置
+	latencyNext int
 }
 
 // NewProducer 创建支持阿里云的生产者
+//
+// SendResult 只把结果放入有界队列，后台按批次异步发送并重试；队列已满、重试失败或关闭时未发送的结果
+// 追加到本地spool文件，broker恢复后补发，任务处理不会因为发送而阻塞
 func NewProducer(config *types.Config) (*Producer, error) {
 	// 阿里云 RocketMQ 配置
 	endpoints := config.RocketMQ.Common.Endpoints
+	producerConfig := config.RocketMQ.BGCheck.Producer
 
 	// 创建生产者选项
 	opts := []producer.Option{
@@ -45,46 +117,352 @@ func NewProducer(config *types.Config) (*Producer, error) {
 		return nil, fmt.Errorf("failed to start producer: %v", err)
 	}
 
-	return &Producer{
-		client: p,
-		config: config,
-	}, nil
+	spoolPath := producerConfig.SpoolPath
+	if spoolPath == "" {
+		spoolPath = defaultSpoolPath
+	}
+	s, err := openSpool(spoolPath)
+	if err != nil {
+		p.Shutdown()
+		return nil, err
+	}
+
+	prod := &Producer{
+		client:    p,
+		config:    config,
+		queue:     make(chan *outgoing, positiveOr(producerConfig.QueueSize, defaultQueueSize)),
+		spool:     s,
+		batchSize: positiveOr(producerConfig.BatchSize, defaultBatchSize),
+		linger:    defaultLinger,
+		retries:   positiveOr(producerConfig.SendRetries, defaultSendRetries),
+		inFlight:  make(chan struct{}, positiveOr(producerConfig.InFlightBatches, defaultInFlight)),
+		closing:   make(chan struct{}),
+	}
+	if producerConfig.LingerMs > 0 {
+		prod.linger = time.Duration(producerConfig.LingerMs) * time.Millisecond
+	}
+	if depth := s.Depth(); depth > 0 {
+		logger.Logger.WithFields(logrus.Fields{
+			"spool":      spoolPath,
+			"spoolDepth": depth,
+		}).Warn("Found unsent results in spool, they will be resent")
+	}
+
+	prod.senderWG.Add(2)
+	go prod.sendLoop()
+	go prod.replayLoop()
+	return prod, nil
 }
 
-// SendResult 发送处理结果
+// positiveOr value 大于0时返回value，否则返回默认值
+func positiveOr(value, fallback int) int {
+	if value > 0 {
+		return value
+	}
+	return fallback
+}
+
+// SendResult 发送处理结果：放入发送队列后立即返回，队列已满时写入spool
+//
+// 只有序列化失败或写入spool失败时返回错误
 func (p *Producer) SendResult(result *types.ResultMessage) error {
 	data, err := json.Marshal(result)
 	if err != nil {
 		return err
 	}
+	msg := &outgoing{
+		body:      data,
+		requestID: getRequestID(result.Params),
+		code:      result.Code,
+		enqueued:  time.Now(),
+	}
 
-	msg := &primitive.Message{
-		Topic: p.config.RocketMQ.BGCheck.Producer.Topic,
-		Body:  data,
+	// 持有锁入队，关闭后 sendLoop 取空队列时不会再有新消息进入
+	p.mu.Lock()
+	closed := p.closed
+	if !closed {
+		select {
+		case p.queue <- msg:
+			p.mu.Unlock()
+			return nil
+		default:
+		}
 	}
+	p.mu.Unlock()
 
-	ctx := context.Background()
-	res, err := p.client.SendSync(ctx, msg)
+	logger.Logger.WithFields(logrus.Fields{
+		"requestId": msg.requestID,
+		"closed":    closed,
+	}).Warn("Result queue full or producer closed, spooling result message")
+	return p.spoolMessages([]*outgoing{msg})
+}
 
-	if err != nil {
+// sendLoop 从队列中取出消息，凑满 batchSize 条或等待 linger 后作为一个批次异步发送
+func (p *Producer) sendLoop() {
+	defer p.senderWG.Done()
+	for {
+		var first *outgoing
+		select {
+		case first = <-p.queue:
+		case <-p.closing:
+			p.flushQueue()
+			return
+		}
+
+		batch := []*outgoing{first}
+		size := len(first.body)
+		timer := time.NewTimer(p.linger)
+	collect:
+		for len(batch) < p.batchSize {
+			select {
+			case msg := <-p.queue:
+				if size+len(msg.body) > maxBatchBytes {
+					p.sendBatch(batch)
+					batch, size = nil, 0
+				}
+				batch = append(batch, msg)
+				size += len(msg.body)
+			case <-timer.C:
+				break collect
+			case <-p.closing:
+				break collect
+			}
+		}
+		timer.Stop()
+		p.sendBatch(batch)
+	}
+}
+
+// flushQueue 关闭时发送队列中剩余的消息，超过 flushTimeout 仍未发送的写入spool
+func (p *Producer) flushQueue() {
+	deadline := time.Now().Add(flushTimeout)
+	for {
+		var batch []*outgoing
+	drain:
+		for len(batch) < p.batchSize {
+			select {
+			case msg := <-p.queue:
+				batch = append(batch, msg)
+			default:
+				break drain
+			}
+		}
+		if len(batch) == 0 {
+			return
+		}
+		if time.Now().After(deadline) {
+			p.spoolMessages(batch)
+			continue
+		}
+		p.sendBatch(batch)
+	}
+}
+
+// sendBatch 占用一个发送名额后异步发送一个批次，失败时退避重试，重试耗尽后写入spool
+func (p *Producer) sendBatch(batch []*outgoing) {
+	if len(batch) == 0 {
+		return
+	}
+	p.inFlight <- struct{}{}
+	p.batchWG.Add(1)
+	p.sendAttempt(batch, 0)
+}
+
+// sendAttempt 第 attempt 次发送批次（从0开始），在发送回调中决定重试、写入spool或完成
+func (p *Producer) sendAttempt(batch []*outgoing, attempt int) {
+	msgs := make([]*primitive.Message, len(batch))
+	for i, item := range batch {
+		msgs[i] = &primitive.Message{
+			Topic: p.config.RocketMQ.BGCheck.Producer.Topic,
+			Body:  item.body,
+		}
+	}
+
+	started := time.Now()
+	done := func(res *primitive.SendResult, err error) {
+		if err == nil && res != nil && res.Status != primitive.SendOK {
+			err = fmt.Errorf("send status %d", res.Status)
+		}
+		if err == nil {
+			p.finishBatch(batch, res, time.Since(started))
+			return
+		}
+		if attempt < p.retries {
+			p.mu.Lock()
+			p.retried++
+			p.mu.Unlock()
+			backoff := retryBackoff << uint(attempt)
+			logger.Logger.WithFields(logrus.Fields{
+				"topic":    msgs[0].Topic,
+				"messages": len(batch),
+				"attempt":  attempt + 1,
+				"backoff":  backoff.String(),
+				"error":    err.Error(),
+			}).Warn("Failed to send result batch, retrying")
+			time.AfterFunc(backoff, func() { p.sendAttempt(batch, attempt+1) })
+			return
+		}
 		logger.Logger.WithFields(logrus.Fields{
-			"topic": msg.Topic,
-			"error": err.Error(),
-		}).Error("Failed to send result message")
-		return err
+			"topic":    msgs[0].Topic,
+			"messages": len(batch),
+			"error":    err.Error(),
+		}).Error("Failed to send result batch, spooling it")
+		p.spoolMessages(batch)
+		p.releaseBatch()
+	}
+
+	err := p.client.SendAsync(context.Background(), func(ctx context.Context, res *primitive.SendResult, err error) {
+		done(res, err)
+	}, msgs...)
+	if err != nil {
+		done(nil, err)
+	}
+}
+
+// finishBatch 记录发送成功的批次
+func (p *Producer) finishBatch(batch []*outgoing, res *primitive.SendResult, rtt time.Duration) {
+	now := time.Now()
+	requestIDs := make([]string, len(batch))
+	p.mu.Lock()
+	for i, item := range batch {
+		requestIDs[i] = item.requestID
+		p.recordLatency(now.Sub(item.enqueued))
 	}
+	p.sent += int64(len(batch))
+	p.mu.Unlock()
 
 	logger.Logger.WithFields(logrus.Fields{
-		"topic":     msg.Topic,
-		"msgId":     res.MsgID,
-		"code":      result.Code,
-		"message":   result.Message,
-		"requestId": getRequestID(result.Params),
-	}).Info("Successfully sent result message")
+		"topic":      p.config.RocketMQ.BGCheck.Producer.Topic,
+		"msgId":      res.MsgID,
+		"messages":   len(batch),
+		"requestIds": requestIDs,
+		"rttMs":      rtt.Milliseconds(),
+	}).Info("Successfully sent result messages")
+	p.releaseBatch()
+}
+
+// releaseBatch 释放批次占用的发送名额
+func (p *Producer) releaseBatch() {
+	<-p.inFlight
+	p.batchWG.Done()
+}
 
+// spoolMessages 把未能发送的消息写入spool，等待补发
+func (p *Producer) spoolMessages(batch []*outgoing) error {
+	bodies := make([][]byte, len(batch))
+	for i, item := range batch {
+		bodies[i] = item.body
+	}
+	if err := p.spool.Append(bodies); err != nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"messages": len(batch),
+			"error":    err.Error(),
+		}).Error("Failed to spool result messages")
+		return err
+	}
+	p.mu.Lock()
+	p.spooled += int64(len(batch))
+	p.mu.Unlock()
 	return nil
 }
 
+// replayLoop 定期把spool中的消息按批次补发，发送失败时等待下一轮
+func (p *Producer) replayLoop() {
+	defer p.senderWG.Done()
+	ticker := time.NewTicker(defaultSpoolInterval)
+	defer ticker.Stop()
+	for {
+		select {
+		case <-ticker.C:
+			p.replaySpool()
+		case <-p.closing:
+			return
+		}
+	}
+}
+
+// replaySpool 补发spool中的全部消息，遇到发送失败时停止
+func (p *Producer) replaySpool() {
+	for p.spool.Depth() > 0 {
+		select {
+		case <-p.closing:
+			return
+		default:
+		}
+		bodies, offset, lines, err := p.spool.Read(p.batchSize, maxBatchBytes)
+		if err != nil || lines == 0 {
+			return
+		}
+		if len(bodies) > 0 {
+			msgs := make([]*primitive.Message, len(bodies))
+			for i, body := range bodies {
+				msgs[i] = &primitive.Message{
+					Topic: p.config.RocketMQ.BGCheck.Producer.Topic,
+					Body:  body,
+				}
+			}
+			res, err := p.client.SendSync(context.Background(), msgs...)
+			if err == nil && res.Status != primitive.SendOK {
+				err = fmt.Errorf("send status %d", res.Status)
+			}
+			if err != nil {
+				logger.Logger.WithFields(logrus.Fields{
+					"spoolDepth": p.spool.Depth(),
+					"error":      err.Error(),
+				}).Warn("Failed to resend spooled results, will retry later")
+				return
+			}
+			p.mu.Lock()
+			p.sent += int64(len(bodies))
+			p.mu.Unlock()
+		}
+		if err := p.spool.Commit(offset, lines); err != nil {
+			logger.Logger.WithError(err).Error("Failed to commit spool offset")
+			return
+		}
+		logger.Logger.WithFields(logrus.Fields{
+			"messages":   len(bodies),
+			"spoolDepth": p.spool.Depth(),
+		}).Info("Resent spooled result messages")
+	}
+}
+
+// recordLatency 记录一条消息的发送延迟，调用方持有 p.mu
+func (p *Producer) recordLatency(latency time.Duration) {
+	sample := float64(latency.Microseconds()) / 1000
+	if len(p.latencies) < latencySamples {
+		p.latencies = append(p.latencies, sample)
+		return
+	}
+	// 窗口已满时依次覆盖较早的样本
+	p.latencies[p.latencyNext] = sample
+	p.latencyNext = (p.latencyNext + 1) % latencySamples
+}
+
+// Stats 返回发送管道的状态，延迟为自上次调用以来的统计
+func (p *Producer) Stats() ProducerStats {
+	p.mu.Lock()
+	samples := p.latencies
+	p.latencies = nil
+	p.latencyNext = 0
+	stats := ProducerStats{
+		QueueDepth: len(p.queue),
+		Sent:       p.sent,
+		Spooled:    p.spooled,
+		Retries:    p.retried,
+	}
+	p.mu.Unlock()
+
+	stats.SpoolDepth = p.spool.Depth()
+	if len(samples) > 0 {
+		sort.Float64s(samples)
+		stats.LatencyP50 = samples[len(samples)*50/100]
+		stats.LatencyP95 = samples[len(samples)*95/100]
+		stats.LatencyMax = samples[len(samples)-1]
+	}
+	return stats
+}
+
 // getRequestID 从params中获取requestId
 func getRequestID(params *types.TaskMessage) string {
 	if params != nil {
@@ -93,7 +471,23 @@ func getRequestID(params *types.TaskMessage) string {
 	return "unknown"
 }
 
-// Shutdown 关闭生产者
+// Shutdown 关闭生产者：发送队列中剩余的消息（超时或失败的写入spool），等待发送中的批次确认后关闭客户端
 func (p *Producer) Shutdown() error {
+	p.closeOnce.Do(func() {
+		p.mu.Lock()
+		p.closed = true
+		p.mu.Unlock()
+		close(p.closing)
+	})
+	p.senderWG.Wait()
+	p.batchWG.Wait()
+
+	depth := p.spool.Depth()
+	if depth > 0 {
+		logger.Logger.WithFields(logrus.Fields{
+			"spoolDepth": depth,
+		}).Warn("Shutting down producer with spooled results, they will be resent on next start")
+	}
+	p.spool.Close()
 	return p.client.Shutdown()
 }
@@ -0,0 +1,178 @@
+package mq
+
+import (
+	"bufio"
+	"bytes"
+	"encoding/json"
+	"fmt"
+	"io"
+	"os"
+	"path/filepath"
+	"strconv"
+	"strings"
+	"sync"
+)
+
+// spool 未能发送的结果消息的本地追加文件，每行一条消息JSON
+//
+// 已经补发成功的位置记录在 <path>.offset 中，进程重启后从该位置继续补发；
+// 全部补发完成后清空文件。写入不做fsync，进程退出或崩溃时不丢失，主机掉电时可能丢失最后一部分
+type spool struct {
+	mu         sync.Mutex
+	path       string
+	file       *os.File
+	size       int64
+	offset     int64
+	depth      int
+	offsetPath string
+}
+
+// openSpool 打开或创建spool文件，统计尚未补发的消息数
+func openSpool(path string) (*spool, error) {
+	if err := os.MkdirAll(filepath.Dir(path), 0755); err != nil {
+		return nil, fmt.Errorf("failed to create spool directory: %v", err)
+	}
+	file, err := os.OpenFile(path, os.O_CREATE|os.O_RDWR|os.O_APPEND, 0644)
+	if err != nil {
+		return nil, fmt.Errorf("failed to open spool file: %v", err)
+	}
+	s := &spool{path: path, file: file, offsetPath: path + ".offset"}
+
+	info, err := file.Stat()
+	if err != nil {
+		file.Close()
+		return nil, err
+	}
+	s.size = info.Size()
+	if data, err := os.ReadFile(s.offsetPath); err == nil {
+		s.offset, _ = strconv.ParseInt(strings.TrimSpace(string(data)), 10, 64)
+	}
+	if s.offset > s.size {
+		s.offset = 0
+	}
+
+	// 上次崩溃时写了一半的行补上换行，补发时作为无效消息跳过
+	if s.size > 0 {
+		last := make([]byte, 1)
+		if _, err := file.ReadAt(last, s.size-1); err == nil && last[0] != '\n' {
+			if _, err := file.Write([]byte{'\n'}); err == nil {
+				s.size++
+			}
+		}
+	}
+	s.depth, err = countLines(file, s.offset)
+	if err != nil {
+		file.Close()
+		return nil, err
+	}
+	return s, nil
+}
+
+// countLines 统计文件从 offset 开始的行数
+func countLines(file *os.File, offset int64) (int, error) {
+	reader := bufio.NewReader(io.NewSectionReader(file, offset, 1<<62))
+	count := 0
+	buf := make([]byte, 64*1024)
+	for {
+		n, err := reader.Read(buf)
+		count += bytes.Count(buf[:n], []byte{'\n'})
+		if err == io.EOF {
+			return count, nil
+		}
+		if err != nil {
+			return count, err
+		}
+	}
+}
+
+// Append 追加一组消息
+func (s *spool) Append(bodies [][]byte) error {
+	var buf bytes.Buffer
+	for _, body := range bodies {
+		buf.Write(body)
+		buf.WriteByte('\n')
+	}
+
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	n, err := s.file.Write(buf.Bytes())
+	s.size += int64(n)
+	if err != nil {
+		return fmt.Errorf("failed to append to spool: %v", err)
+	}
+	s.depth += len(bodies)
+	return nil
+}
+
+// Depth 尚未补发的消息数
+func (s *spool) Depth() int {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	return s.depth
+}
+
+// Read 从补发位置读取最多 maxCount 条、合计不超过 maxBytes 的消息（至少一条），返回消息和读完后的位置，
+// 无效的行（崩溃时写了一半）被跳过
+func (s *spool) Read(maxCount, maxBytes int) ([][]byte, int64, int, error) {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+
+	reader := bufio.NewReader(io.NewSectionReader(s.file, s.offset, s.size-s.offset))
+	var bodies [][]byte
+	offset := s.offset
+	lines, total := 0, 0
+	for len(bodies) < maxCount {
+		line, err := reader.ReadBytes('\n')
+		if err != nil {
+			// 只读到完整的行；io.EOF 之前的不完整部分还在写入
+			break
+		}
+		body := line[:len(line)-1]
+		if len(bodies) > 0 && total+len(body) > maxBytes {
+			break
+		}
+		offset += int64(len(line))
+		lines++
+		if !json.Valid(body) {
+			continue
+		}
+		bodies = append(bodies, body)
+		total += len(body)
+	}
+	return bodies, offset, lines, nil
+}
+
+// Commit 记录 Read 返回的消息已补发，全部补发完成时清空文件
+func (s *spool) Commit(offset int64, lines int) error {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+
+	s.offset = offset
+	s.depth -= lines
+	if s.depth < 0 {
+		s.depth = 0
+	}
+	if s.offset >= s.size {
+		if err := s.file.Truncate(0); err != nil {
+			return fmt.Errorf("failed to truncate spool: %v", err)
+		}
+		s.size, s.offset, s.depth = 0, 0, 0
+	}
+	return writeFileAtomic(s.offsetPath, []byte(strconv.FormatInt(s.offset, 10)))
+}
+
+// Close 关闭spool文件
+func (s *spool) Close() error {
+	s.mu.Lock()
+	defer s.mu.Unlock()
+	return s.file.Close()
+}
+
+// writeFileAtomic 先写临时文件再重命名，避免崩溃时留下不完整的文件
+func writeFileAtomic(path string, data []byte) error {
+	tmp := path + ".tmp"
+	if err := os.WriteFile(tmp, data, 0644); err != nil {
+		return err
+	}
+	return os.Rename(tmp, path)
+}
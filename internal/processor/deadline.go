@@ -0,0 +1,57 @@
+package processor
+
+import (
+	"cy_crawler/internal/types"
+	"os/exec"
+	"time"
+)
+
+// requestTimeLayout MQ消息中requestTime的格式，按本地时区解析
+const requestTimeLayout = "2006-01-02 15:04:05"
+
+// SetTaskTimeout 设置任务时间预算，timeout为0时任务不限时
+func (p *Processor) SetTaskTimeout(timeout, minBudget, killGrace time.Duration) {
+	p.taskTimeout = timeout
+	p.minTaskBudget = minBudget
+	p.killGrace = killGrace
+}
+
+// taskDeadline 计算任务截止时间：requestTime + 时间预算
+// 截止时间不晚于 now + 时间预算，不早于 now + 最少处理时间，
+// 这样requestTime缺失、格式错误或时钟不一致时任务也不会直接超时
+func (p *Processor) taskDeadline(task *types.TaskMessage, now time.Time) (time.Time, bool) {
+	if p.taskTimeout <= 0 {
+		return time.Time{}, false
+	}
+
+	latest := now.Add(p.taskTimeout)
+	deadline := latest
+	if requestTime, err := time.ParseInLocation(requestTimeLayout, task.RequestTime, time.Local); err == nil {
+		deadline = requestTime.Add(p.taskTimeout)
+	}
+
+	earliest := now.Add(p.minTaskBudget)
+	if deadline.After(latest) {
+		deadline = latest
+	}
+	if deadline.Before(earliest) {
+		deadline = earliest
+	}
+	return deadline, true
+}
+
+// unixSeconds 转换为传给Python的Unix时间戳（秒）
+func unixSeconds(t time.Time) float64 {
+	return float64(t.UnixNano()) / float64(time.Second)
+}
+
+// killProcessGroup 让子进程使用独立的进程组，context到期时杀掉整个进程组
+// （run_crawler.py 会再启动 crawler.py，只杀父进程会留下孤儿进程）
+func killProcessGroup(cmd *exec.Cmd) {
+	setProcessGroup(cmd)
+	cmd.Cancel = func() error {
+		return killProcessTree(cmd)
+	}
+	// 进程组被杀后不再等待可能仍被孙进程持有的输出管道
+	cmd.WaitDelay = time.Second
+}
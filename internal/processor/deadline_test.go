@@ -0,0 +1,51 @@
+package processor
+
+import (
+	"cy_crawler/internal/types"
+	"math"
+	"testing"
+	"time"
+)
+
+func TestTaskDeadline(t *testing.T) {
+	now := time.Date(2024, 5, 1, 12, 0, 0, 0, time.Local)
+	p := &Processor{}
+	p.SetTaskTimeout(60*time.Second, 10*time.Second, 5*time.Second)
+
+	tests := []struct {
+		name        string
+		requestTime string
+		want        time.Time
+	}{
+		{"requestTime plus budget", "2024-05-01 11:59:30", now.Add(30 * time.Second)},
+		{"missing requestTime uses now", "", now.Add(60 * time.Second)},
+		{"malformed requestTime uses now", "2024/05/01 11:59:30", now.Add(60 * time.Second)},
+		{"future requestTime clamped to latest", "2024-05-01 12:10:00", now.Add(60 * time.Second)},
+		{"stale requestTime clamped to min budget", "2024-05-01 11:00:00", now.Add(10 * time.Second)},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			got, ok := p.taskDeadline(&types.TaskMessage{RequestTime: tt.requestTime}, now)
+			if !ok {
+				t.Fatal("expected a deadline")
+			}
+			if !got.Equal(tt.want) {
+				t.Errorf("taskDeadline() = %v, want %v", got, tt.want)
+			}
+		})
+	}
+}
+
+func TestTaskDeadlineDisabled(t *testing.T) {
+	p := &Processor{}
+	if _, ok := p.taskDeadline(&types.TaskMessage{RequestTime: "2024-05-01 12:00:00"}, time.Now()); ok {
+		t.Error("expected no deadline when task timeout is 0")
+	}
+}
+
+func TestUnixSeconds(t *testing.T) {
+	ts := time.Unix(1700000000, 250*int64(time.Millisecond))
+	if got := unixSeconds(ts); math.Abs(got-1700000000.25) > 1e-6 {
+		t.Errorf("unixSeconds() = %v, want 1700000000.25", got)
+	}
+}
@@ -0,0 +1,18 @@
+//go:build !windows
+
+package processor
+
+import (
+	"os/exec"
+	"syscall"
+)
+
+// setProcessGroup 子进程使用独立的进程组，便于连同其子进程一起杀掉
+func setProcessGroup(cmd *exec.Cmd) {
+	cmd.SysProcAttr = &syscall.SysProcAttr{Setpgid: true}
+}
+
+// killProcessTree 杀掉子进程所在的整个进程组
+func killProcessTree(cmd *exec.Cmd) error {
+	return syscall.Kill(-cmd.Process.Pid, syscall.SIGKILL)
+}
@@ -0,0 +1,20 @@
+//go:build windows
+
+package processor
+
+import (
+	"os/exec"
+	"strconv"
+)
+
+// setProcessGroup Windows下没有进程组，由 killProcessTree 按进程树处理
+func setProcessGroup(cmd *exec.Cmd) {}
+
+// killProcessTree 用 taskkill /T 杀掉子进程及其派生的进程，失败时至少杀掉子进程本身
+func killProcessTree(cmd *exec.Cmd) error {
+	pid := strconv.Itoa(cmd.Process.Pid)
+	if err := exec.Command("taskkill", "/T", "/F", "/PID", pid).Run(); err != nil {
+		return cmd.Process.Kill()
+	}
+	return nil
+}
@@ -0,0 +1,152 @@
+package processor
+
+import (
+	"bufio"
+	"bytes"
+	"compress/zlib"
+	"cy_crawler/internal/logger"
+	"encoding/binary"
+	"encoding/json"
+	"errors"
+	"fmt"
+	"io"
+	"os"
+	"os/exec"
+	"strconv"
+
+	"github.com/sirupsen/logrus"
+)
+
+// Python结果帧：1字节编码 + 4字节大端长度 + 负载，Python侧见 scripts/framing.py
+const (
+	frameHeaderSize = 5
+	// 负载为UTF-8 JSON
+	frameCodecJSON = 0
+	// 负载为zlib压缩后的UTF-8 JSON
+	frameCodecJSONZlib = 1
+	// 单帧最大字节数，超过时认为输出已损坏
+	maxFrameSize = 64 * 1024 * 1024
+	// 子进程中结果描述符的编号（ExtraFiles的第一个）
+	resultFD = 3
+	// run_crawler.py 在 crawler.py 失败或超时后的退出码，见其中的 CHILD_FAILED_EXIT
+	scriptFailedExitCode = 3
+)
+
+// SetFramedResults 开启结果帧：Python把结果写到专用的描述符而不是stdout，
+// 负载超过compressThreshold字节时压缩，0表示不压缩
+func (p *Processor) SetFramedResults(enabled bool, compressThreshold int) {
+	p.framedResults = enabled
+	p.compressThreshold = compressThreshold
+}
+
+// framedArgs 传给Python的结果帧参数
+func framedArgs(compressThreshold int) []string {
+	return []string{
+		"--result-fd", strconv.Itoa(resultFD),
+		"--compress-threshold", strconv.Itoa(compressThreshold),
+	}
+}
+
+// attachResultPipe 创建结果管道并把写端作为子进程的描述符3，返回读端和写端
+// 调用方在 cmd.Start 之后关闭写端，子进程退出后读端才能读到EOF
+func attachResultPipe(cmd *exec.Cmd) (*os.File, *os.File, error) {
+	reader, writer, err := os.Pipe()
+	if err != nil {
+		return nil, nil, fmt.Errorf("failed to create result pipe: %v", err)
+	}
+	cmd.ExtraFiles = []*os.File{writer}
+	return reader, writer, nil
+}
+
+// resultFrame 一帧结果的编码和负载
+type resultFrame struct {
+	codec   byte
+	payload []byte
+}
+
+// runFramed 启动脚本并读取结果帧直到脚本关闭描述符，返回最后一帧（没有帧时为nil）和脚本的退出错误
+// 帧损坏时记录日志并丢弃剩余输出，避免脚本写满管道后阻塞
+func runFramed(cmd *exec.Cmd, requestID string) (*resultFrame, error) {
+	reader, writer, err := attachResultPipe(cmd)
+	if err != nil {
+		return nil, err
+	}
+	defer reader.Close()
+
+	err = cmd.Start()
+	writer.Close()
+	if err != nil {
+		return nil, err
+	}
+
+	buffered := bufio.NewReaderSize(reader, 64*1024)
+	var last *resultFrame
+	for {
+		codec, payload, readErr := readFrame(buffered)
+		if readErr == io.EOF {
+			break
+		}
+		if readErr != nil {
+			logger.Logger.WithFields(logrus.Fields{
+				"requestId": requestID,
+				"error":     readErr.Error(),
+			}).Error("Failed to read Python result frame")
+			last = nil
+			io.Copy(io.Discard, buffered)
+			break
+		}
+		last = &resultFrame{codec: codec, payload: payload}
+	}
+	return last, cmd.Wait()
+}
+
+// childFailedResult run_crawler.py 报告 crawler.py 失败时的结果帧：crawler.py 写出过结果帧时使用最后一帧，
+// 否则为空结果（与非帧模式下包装器输出的 {} 相同）；err 不是该退出码时返回 false
+func childFailedResult(frame *resultFrame, err error) (*resultFrame, bool) {
+	var exitErr *exec.ExitError
+	if !errors.As(err, &exitErr) || exitErr.ExitCode() != scriptFailedExitCode {
+		return frame, false
+	}
+	if frame == nil {
+		frame = &resultFrame{codec: frameCodecJSON, payload: []byte("{}")}
+	}
+	return frame, true
+}
+
+// readFrame 读取一帧，返回编码和负载；输出正常结束时返回 io.EOF
+func readFrame(r io.Reader) (byte, []byte, error) {
+	var header [frameHeaderSize]byte
+	if _, err := io.ReadFull(r, header[:]); err != nil {
+		if err == io.ErrUnexpectedEOF {
+			return 0, nil, fmt.Errorf("truncated result frame header")
+		}
+		return 0, nil, err
+	}
+
+	size := binary.BigEndian.Uint32(header[1:])
+	if size > maxFrameSize {
+		return 0, nil, fmt.Errorf("result frame of %d bytes exceeds limit", size)
+	}
+	payload := make([]byte, size)
+	if _, err := io.ReadFull(r, payload); err != nil {
+		return 0, nil, fmt.Errorf("truncated result frame: %v", err)
+	}
+	return header[0], payload, nil
+}
+
+// decodeFrame 把一帧的负载直接解码到v
+func decodeFrame(codec byte, payload []byte, v interface{}) error {
+	switch codec {
+	case frameCodecJSON:
+		return json.Unmarshal(payload, v)
+	case frameCodecJSONZlib:
+		zr, err := zlib.NewReader(bytes.NewReader(payload))
+		if err != nil {
+			return err
+		}
+		defer zr.Close()
+		return json.NewDecoder(zr).Decode(v)
+	default:
+		return fmt.Errorf("unknown result frame codec %d", codec)
+	}
+}
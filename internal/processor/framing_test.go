@@ -0,0 +1,129 @@
+package processor
+
+import (
+	"bufio"
+	"bytes"
+	"compress/zlib"
+	"encoding/binary"
+	"errors"
+	"io"
+	"os/exec"
+	"strings"
+	"testing"
+)
+
+// frame 按 scripts/framing.py 的格式编码一帧
+func frame(codec byte, payload []byte) []byte {
+	header := make([]byte, frameHeaderSize)
+	header[0] = codec
+	binary.BigEndian.PutUint32(header[1:], uint32(len(payload)))
+	return append(header, payload...)
+}
+
+func zlibCompress(t *testing.T, data []byte) []byte {
+	t.Helper()
+	var buf bytes.Buffer
+	zw := zlib.NewWriter(&buf)
+	if _, err := zw.Write(data); err != nil {
+		t.Fatal(err)
+	}
+	if err := zw.Close(); err != nil {
+		t.Fatal(err)
+	}
+	return buf.Bytes()
+}
+
+func TestReadFrameSequence(t *testing.T) {
+	stream := append(frame(frameCodecJSON, []byte(`{"id":"a"}`)), frame(frameCodecJSONZlib, []byte("zz"))...)
+	reader := bufio.NewReader(bytes.NewReader(stream))
+
+	codec, payload, err := readFrame(reader)
+	if err != nil || codec != frameCodecJSON || string(payload) != `{"id":"a"}` {
+		t.Fatalf("first frame = (%d, %q, %v)", codec, payload, err)
+	}
+	codec, payload, err = readFrame(reader)
+	if err != nil || codec != frameCodecJSONZlib || string(payload) != "zz" {
+		t.Fatalf("second frame = (%d, %q, %v)", codec, payload, err)
+	}
+	if _, _, err = readFrame(reader); err != io.EOF {
+		t.Fatalf("expected io.EOF after the last frame, got %v", err)
+	}
+}
+
+func TestReadFrameCorrupt(t *testing.T) {
+	oversized := make([]byte, frameHeaderSize)
+	binary.BigEndian.PutUint32(oversized[1:], maxFrameSize+1)
+
+	tests := []struct {
+		name  string
+		input []byte
+		want  string
+	}{
+		{"truncated header", []byte{0, 0, 0}, "truncated result frame header"},
+		{"truncated payload", frame(frameCodecJSON, []byte(`{"id":"a"}`))[:8], "truncated result frame"},
+		{"oversized frame", oversized, "exceeds limit"},
+	}
+	for _, tt := range tests {
+		t.Run(tt.name, func(t *testing.T) {
+			_, _, err := readFrame(bytes.NewReader(tt.input))
+			if err == nil || err == io.EOF || !strings.Contains(err.Error(), tt.want) {
+				t.Errorf("readFrame() error = %v, want %q", err, tt.want)
+			}
+		})
+	}
+}
+
+func TestDecodeFrame(t *testing.T) {
+	var plain, compressed map[string]string
+	if err := decodeFrame(frameCodecJSON, []byte(`{"id":"a"}`), &plain); err != nil || plain["id"] != "a" {
+		t.Errorf("plain frame = %v, %v", plain, err)
+	}
+	if err := decodeFrame(frameCodecJSONZlib, zlibCompress(t, []byte(`{"id":"b"}`)), &compressed); err != nil || compressed["id"] != "b" {
+		t.Errorf("compressed frame = %v, %v", compressed, err)
+	}
+	if err := decodeFrame(9, []byte(`{}`), &plain); err == nil {
+		t.Error("expected an error for an unknown codec")
+	}
+}
+
+func TestChildFailedResult(t *testing.T) {
+	failed := exec.Command("sh", "-c", "exit 3").Run()
+	otherExit := exec.Command("sh", "-c", "exit 1").Run()
+	last := &resultFrame{codec: frameCodecJSON, payload: []byte(`{"sources":{}}`)}
+
+	if got, ok := childFailedResult(last, failed); !ok || got != last {
+		t.Errorf("crawler failure with a frame should keep the frame, got (%v, %v)", got, ok)
+	}
+	if got, ok := childFailedResult(nil, failed); !ok || got == nil || string(got.payload) != "{}" {
+		t.Errorf("crawler failure without a frame should give an empty result, got (%v, %v)", got, ok)
+	}
+	if _, ok := childFailedResult(last, otherExit); ok {
+		t.Error("other exit codes are script errors")
+	}
+	if _, ok := childFailedResult(last, errors.New("killed")); ok {
+		t.Error("non-exit errors are script errors")
+	}
+	if _, ok := childFailedResult(last, nil); ok {
+		t.Error("a successful run is not a crawler failure")
+	}
+}
+
+func TestRunFramedKeepsLastFrame(t *testing.T) {
+	// 子进程在描述符3上依次写出 {"n":1} 和 {"n":2} 两帧
+	script := `printf '\000\000\000\000\007{"n":1}\000\000\000\000\007{"n":2}' >&3`
+	last, err := runFramed(exec.Command("sh", "-c", script), "test")
+	if err != nil {
+		t.Fatalf("runFramed() error = %v", err)
+	}
+	if last == nil || string(last.payload) != `{"n":2}` {
+		t.Fatalf("runFramed() last frame = %+v, want {\"n\":2}", last)
+	}
+
+	last, err = runFramed(exec.Command("sh", "-c", "exit 3"), "test")
+	if last != nil {
+		t.Errorf("expected no frame, got %+v", last)
+	}
+	if _, ok := childFailedResult(last, err); !ok {
+		t.Errorf("exit status 3 should be reported as a crawler failure, got %v", err)
+	}
+}
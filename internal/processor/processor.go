@@ -2,18 +2,37 @@ package processor
 
 import (
 	"bytes"
+	"context"
 	"cy_crawler/internal/logger"
 	"cy_crawler/internal/types"
 	"encoding/json"
+	"errors"
 	"fmt"
 	"os/exec"
+	"strconv"
 	"strings"
+	"time"
 
 	"github.com/sirupsen/logrus"
 )
 
 type Processor struct {
 	pythonScriptPath string
+	pool             *WorkerPool
+
+	// 任务时间预算，见 SetTaskTimeout
+	taskTimeout   time.Duration
+	minTaskBudget time.Duration
+	killGrace     time.Duration
+
+	// 流式结果，见 SetStreamResults
+	streamResults  bool
+	forwardPartial bool
+	partialHandler func(*types.ResultMessage) error
+
+	// 结果帧，见 SetFramedResults
+	framedResults     bool
+	compressThreshold int
 }
 
 // NewProcessor 创建新的处理器
@@ -23,6 +42,23 @@ func NewProcessor(pythonScriptPath string) *Processor {
 	}
 }
 
+// StartWorkerPool 启动常驻Python worker池，之后的任务不再为每条消息启动新进程
+func (p *Processor) StartWorkerPool(scriptPath string, size, concurrency int) error {
+	pool, err := NewWorkerPool(scriptPath, size, concurrency, p.framedResults, p.compressThreshold)
+	if err != nil {
+		return err
+	}
+	p.pool = pool
+	return nil
+}
+
+// Shutdown 关闭处理器持有的worker池
+func (p *Processor) Shutdown() {
+	if p.pool != nil {
+		p.pool.Shutdown()
+	}
+}
+
 // ProcessTask 处理任务
 func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage, error) {
 	companyNameStr := ""
@@ -53,6 +89,92 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 		}
 	}
 
+	// Python在deadline前返回部分结果，超过deadline+killGrace仍未返回时强制结束
+	ctx := context.Background()
+	deadline, hasDeadline := p.taskDeadline(task, time.Now())
+	if hasDeadline {
+		var cancel context.CancelFunc
+		ctx, cancel = context.WithDeadline(ctx, deadline.Add(p.killGrace))
+		defer cancel()
+	}
+
+	var pythonResult types.PythonResult
+	var err error
+	if p.pool != nil {
+		err = p.runWithWorker(ctx, task, nameParam, deadline, &pythonResult)
+	} else {
+		err = p.runScript(ctx, task, nameParam, deadline, &pythonResult)
+	}
+	if err != nil {
+		return &types.ResultMessage{
+			Code:    500,
+			Message: err.Error(),
+			Data:    nil,
+			Params:  task,
+		}, err
+	}
+
+	if pythonResult.Partial {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"deadline":  deadline,
+		}).Warn("Task reached its deadline, sending partial sources")
+	}
+	if len(pythonResult.Upstreams) > 0 {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"upstreams": pythonResult.Upstreams,
+		}).Warn("Task ran with upstream circuit breakers not closed")
+	}
+
+	// 记录解析后的Python结果
+	logger.Logger.WithFields(logrus.Fields{
+		"requestId":    task.RequestID,
+		"sourcesCount": len(pythonResult.Sources),
+		"sourcesKeys":  getMapKeys(pythonResult.Sources),
+		"timing":       pythonResult.Timing,
+		"pythonResult": pythonResult,
+	}).Info("Python result parsed successfully")
+
+	// 组装最终结果 - 关键修改！
+	// 直接将 sources 的内容放到 data 数组中
+	finalData := []map[string]interface{}{pythonResult.Sources}
+
+	// 记录最终组装的数据
+	logger.Logger.WithFields(logrus.Fields{
+		"requestId":    task.RequestID,
+		"finalData":    finalData,
+		"sourcesCount": len(pythonResult.Sources),
+	}).Info("Final data assembled")
+
+	// 记录即将发送的完整结果
+	resultMessage := &types.ResultMessage{
+		Code:    200,
+		Message: "success",
+		Data:    finalData, // 这里直接使用包含sources的数组
+		Params:  task,      // 透传原始参数
+	}
+
+	// 记录最终发送的消息内容（用于调试）
+	resultJSON, _ := json.Marshal(resultMessage)
+	logger.Logger.WithFields(logrus.Fields{
+		"requestId":  task.RequestID,
+		"resultSize": len(resultJSON),
+		"resultData": string(resultJSON),
+	}).Info("Final result message ready to send")
+
+	// 额外记录data字段的详细内容
+	dataJSON, _ := json.Marshal(finalData)
+	logger.Logger.WithFields(logrus.Fields{
+		"requestId": task.RequestID,
+		"dataField": string(dataJSON),
+	}).Debug("Data field content")
+
+	return resultMessage, nil
+}
+
+// runScript 为单个任务启动一次Python脚本并解析其输出，ctx到期时杀掉脚本的进程组
+func (p *Processor) runScript(ctx context.Context, task *types.TaskMessage, nameParam string, deadline time.Time, pythonResult *types.PythonResult) error {
 	// 构建命令行参数
 	args := []string{
 		p.pythonScriptPath,
@@ -75,18 +197,50 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 		args = append(args, "--country", *task.Location)
 	}
 
+	// 输出schema：任务指定的schema优先，否则按租户选择
+	if task.TenantID != "" {
+		args = append(args, "--tenant", task.TenantID)
+	}
+	if task.OutputSchema != nil && *task.OutputSchema != "" {
+		args = append(args, "--schema", *task.OutputSchema)
+	}
+
+	// 传递任务截止时间
+	if !deadline.IsZero() {
+		args = append(args, "--deadline", strconv.FormatFloat(unixSeconds(deadline), 'f', 3, 64))
+	}
+
+	// 结果写到专用描述符，stdout只剩日志等其他输出
+	if p.framedResults {
+		args = append(args, framedArgs(p.compressThreshold)...)
+	}
+
 	logger.Logger.WithFields(logrus.Fields{
 		"requestId": task.RequestID,
 		"args":      args,
 	}).Debug("Python script arguments")
 
 	// 执行Python脚本
-	cmd := exec.Command("python", args...)
+	cmd := exec.CommandContext(ctx, "python", args...)
+	killProcessGroup(cmd)
 	var stdout, stderr bytes.Buffer
 	cmd.Stdout = &stdout
 	cmd.Stderr = &stderr
 
-	err := cmd.Run()
+	var frame *resultFrame
+	var err error
+	if p.framedResults {
+		frame, err = runFramed(cmd, task.RequestID)
+		if failedFrame, failed := childFailedResult(frame, err); failed {
+			logger.Logger.WithFields(logrus.Fields{
+				"requestId": task.RequestID,
+				"hasFrame":  frame != nil,
+			}).Warn("Python crawler failed, using its last result frame or an empty result")
+			frame, err = failedFrame, nil
+		}
+	} else {
+		err = cmd.Run()
+	}
 	output := stdout.Bytes()
 	errorOutput := stderr.Bytes()
 
@@ -97,9 +251,20 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 		"stderrLength": len(errorOutput),
 		"stdoutRaw":    string(output),
 		"stderrRaw":    string(errorOutput),
+		"framed":       p.framedResults,
 		"commandError": err,
 	}).Info("Python script execution completed")
 
+	if err != nil && errors.Is(ctx.Err(), context.DeadlineExceeded) {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"deadline":  deadline,
+			"error":     err.Error(),
+		}).Error("Python script killed at task deadline")
+
+		return fmt.Errorf("Python script exceeded task deadline: %v", err)
+	}
+
 	if err != nil {
 		logger.Logger.WithFields(logrus.Fields{
 			"requestId": task.RequestID,
@@ -108,12 +273,7 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 			"stderr":    string(errorOutput),
 		}).Error("Failed to execute Python script")
 
-		return &types.ResultMessage{
-			Code:    500,
-			Message: fmt.Sprintf("Python script execution failed: %v", err),
-			Data:    nil,
-			Params:  task,
-		}, err
+		return fmt.Errorf("Python script execution failed: %v", err)
 	}
 
 	// 如果有stderr输出但命令成功，记录警告
@@ -124,6 +284,10 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 		}).Warn("Python script produced stderr output")
 	}
 
+	if p.framedResults {
+		return decodeScriptFrame(task, frame, pythonResult)
+	}
+
 	// 清理输出
 	cleanedOutput := cleanPythonOutput(output)
 	logger.Logger.WithFields(logrus.Fields{
@@ -133,8 +297,7 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 	}).Debug("Python output after cleaning")
 
 	// 解析Python脚本输出
-	var pythonResult types.PythonResult
-	if err := json.Unmarshal([]byte(cleanedOutput), &pythonResult); err != nil {
+	if err := json.Unmarshal([]byte(cleanedOutput), pythonResult); err != nil {
 		logger.Logger.WithFields(logrus.Fields{
 			"requestId":     task.RequestID,
 			"rawOutput":     string(output),
@@ -142,57 +305,128 @@ func (p *Processor) ProcessTask(task *types.TaskMessage) (*types.ResultMessage,
 			"error":         err.Error(),
 		}).Error("Failed to parse Python script output")
 
-		return &types.ResultMessage{
-			Code:    500,
-			Message: fmt.Sprintf("Failed to parse script output: %v", err),
-			Data:    nil,
-			Params:  task,
-		}, err
+		return fmt.Errorf("Failed to parse script output: %v", err)
 	}
 
-	// 记录解析后的Python结果
-	logger.Logger.WithFields(logrus.Fields{
-		"requestId":    task.RequestID,
-		"sourcesCount": len(pythonResult.Sources),
-		"sourcesKeys":  getMapKeys(pythonResult.Sources),
-		"pythonResult": pythonResult,
-	}).Info("Python result parsed successfully")
+	return nil
+}
 
-	// 组装最终结果 - 关键修改！
-	// 直接将 sources 的内容放到 data 数组中
-	finalData := []map[string]interface{}{pythonResult.Sources}
+// decodeScriptFrame 把脚本的最后一帧结果直接解码到 pythonResult
+func decodeScriptFrame(task *types.TaskMessage, frame *resultFrame, pythonResult *types.PythonResult) error {
+	if frame == nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+		}).Error("Python script returned no result frame")
+		return errors.New("Python script returned no result")
+	}
 
-	// 记录最终组装的数据
-	logger.Logger.WithFields(logrus.Fields{
-		"requestId":    task.RequestID,
-		"finalData":    finalData,
-		"sourcesCount": len(pythonResult.Sources),
-	}).Info("Final data assembled")
+	if err := decodeFrame(frame.codec, frame.payload, pythonResult); err != nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId":  task.RequestID,
+			"codec":      frame.codec,
+			"frameBytes": len(frame.payload),
+			"error":      err.Error(),
+		}).Error("Failed to parse Python result frame")
 
-	// 记录即将发送的完整结果
-	resultMessage := &types.ResultMessage{
-		Code:    200,
-		Message: "success",
-		Data:    finalData, // 这里直接使用包含sources的数组
-		Params:  task,      // 透传原始参数
+		return fmt.Errorf("Failed to parse script output: %v", err)
 	}
 
-	// 记录最终发送的消息内容（用于调试）
-	resultJSON, _ := json.Marshal(resultMessage)
 	logger.Logger.WithFields(logrus.Fields{
 		"requestId":  task.RequestID,
-		"resultSize": len(resultJSON),
-		"resultData": string(resultJSON),
-	}).Info("Final result message ready to send")
+		"codec":      frame.codec,
+		"frameBytes": len(frame.payload),
+	}).Debug("Python result frame decoded")
+	return nil
+}
 
-	// 额外记录data字段的详细内容
-	dataJSON, _ := json.Marshal(finalData)
-	logger.Logger.WithFields(logrus.Fields{
-		"requestId": task.RequestID,
-		"dataField": string(dataJSON),
-	}).Debug("Data field content")
+// runWithWorker 通过常驻worker池处理任务
+func (p *Processor) runWithWorker(ctx context.Context, task *types.TaskMessage, nameParam string, deadline time.Time, pythonResult *types.PythonResult) error {
+	req := &types.WorkerRequest{
+		ID:     task.RequestID,
+		Type:   getTypeString(task.Type),
+		Name:   nameParam,
+		Tenant: task.TenantID,
+	}
+	if task.CompanyWebsite != nil {
+		req.URL = *task.CompanyWebsite
+	}
+	if task.EmailAddress != nil {
+		req.Email = *task.EmailAddress
+	}
+	if task.Location != nil {
+		req.Country = *task.Location
+	}
+	if task.OutputSchema != nil {
+		req.Schema = *task.OutputSchema
+	}
+	if !deadline.IsZero() {
+		req.Deadline = unixSeconds(deadline)
+	}
 
-	return resultMessage, nil
+	// 流式模式下边收事件边组装结果，需要时把当前已有的部分结果先发出去
+	var assembler *resultAssembler
+	var onEvent func(*types.WorkerResponse)
+	if p.streamResults {
+		req.Stream = true
+		assembler = newResultAssembler()
+		onEvent = func(event *types.WorkerResponse) {
+			assembler.add(event)
+			p.forwardPartialResult(task, event.Event, assembler)
+		}
+	}
+
+	resp, err := p.pool.Run(ctx, req, onEvent)
+	if err != nil && assembler != nil && !assembler.empty() {
+		// worker失败或错过截止时间，但已经收到部分结果，作为部分结果返回而不是整体失败
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"error":     err.Error(),
+		}).Warn("Python worker failed after streaming partial results, using them")
+		pythonResult.Sources = assembler.sources()
+		pythonResult.Partial = true
+		return nil
+	}
+	if err != nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"error":     err.Error(),
+		}).Error("Python worker failed to process task")
+		return fmt.Errorf("Python worker execution failed: %v", err)
+	}
+
+	if resp.Error != "" {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"error":     resp.Error,
+		}).Warn("Python worker reported task error")
+	}
+
+	pythonResult.Sources = resp.Sources
+	pythonResult.Partial = resp.Partial
+	pythonResult.Upstreams = resp.Upstreams
+	pythonResult.Timing = resp.Timing
+	return nil
+}
+
+// forwardPartialResult 发送一条包含当前已有sources的部分结果消息
+func (p *Processor) forwardPartialResult(task *types.TaskMessage, event string, assembler *resultAssembler) {
+	if !p.forwardPartial || p.partialHandler == nil {
+		return
+	}
+
+	partial := &types.ResultMessage{
+		Code:    partialResultCode,
+		Message: "partial",
+		Data:    []map[string]interface{}{assembler.sources()},
+		Params:  task,
+	}
+	if err := p.partialHandler(partial); err != nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"requestId": task.RequestID,
+			"event":     event,
+			"error":     err.Error(),
+		}).Warn("Failed to send partial result")
+	}
 }
 
 // getTypeString 将type数字转换为字符串
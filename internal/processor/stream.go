@@ -0,0 +1,75 @@
+package processor
+
+import (
+	"cy_crawler/internal/types"
+	"sort"
+)
+
+// partialResultCode 流式模式下转发的部分结果消息的code，最终结果仍为200
+const partialResultCode = 206
+
+// SetStreamResults 开启常驻worker的流式结果
+// forward为true时，每收到一个事件就通过 SetPartialHandler 设置的函数发送一条部分结果消息
+func (p *Processor) SetStreamResults(enabled, forward bool) {
+	p.streamResults = enabled
+	p.forwardPartial = forward
+}
+
+// SetPartialHandler 设置发送部分结果消息的函数，通常为 producer.SendResult
+func (p *Processor) SetPartialHandler(handler func(*types.ResultMessage) error) {
+	p.partialHandler = handler
+}
+
+// resultAssembler 根据流式事件逐步组装sources，只在处理该任务的goroutine中使用
+type resultAssembler struct {
+	events   int
+	google   []interface{}
+	linkedin map[int]map[string]interface{}
+}
+
+func newResultAssembler() *resultAssembler {
+	return &resultAssembler{
+		google:   []interface{}{},
+		linkedin: make(map[int]map[string]interface{}),
+	}
+}
+
+// add 合并一个中间事件
+func (a *resultAssembler) add(event *types.WorkerResponse) {
+	switch event.Event {
+	case types.EventGoogle:
+		if event.Items != nil {
+			a.google = event.Items
+		}
+	case types.EventLinkedIn:
+		if event.Item != nil {
+			a.linkedin[event.Index] = event.Item
+		}
+	default:
+		return
+	}
+	a.events++
+}
+
+// empty 是否还没有收到任何事件
+func (a *resultAssembler) empty() bool {
+	return a.events == 0
+}
+
+// sources 当前已组装的sources，LinkedIn实体按Google结果中的排名排序，与最终结果一致
+func (a *resultAssembler) sources() map[string]interface{} {
+	indexes := make([]int, 0, len(a.linkedin))
+	for index := range a.linkedin {
+		indexes = append(indexes, index)
+	}
+	sort.Ints(indexes)
+
+	linkedin := make([]interface{}, 0, len(indexes))
+	for _, index := range indexes {
+		linkedin = append(linkedin, a.linkedin[index])
+	}
+	return map[string]interface{}{
+		"google":   a.google,
+		"linkedin": linkedin,
+	}
+}
@@ -0,0 +1,60 @@
+package processor
+
+import (
+	"cy_crawler/internal/types"
+	"reflect"
+	"testing"
+)
+
+func TestResultAssemblerOrdersLinkedInByRank(t *testing.T) {
+	a := newResultAssembler()
+	if !a.empty() {
+		t.Fatal("new assembler should be empty")
+	}
+
+	a.add(&types.WorkerResponse{Event: types.EventLinkedIn, Index: 2, Item: map[string]interface{}{"name": "third"}})
+	a.add(&types.WorkerResponse{Event: types.EventGoogle, Items: []interface{}{"g1", "g2"}})
+	a.add(&types.WorkerResponse{Event: types.EventLinkedIn, Index: 0, Item: map[string]interface{}{"name": "first"}})
+
+	if a.empty() {
+		t.Fatal("assembler with events should not be empty")
+	}
+	want := map[string]interface{}{
+		"google": []interface{}{"g1", "g2"},
+		"linkedin": []interface{}{
+			map[string]interface{}{"name": "first"},
+			map[string]interface{}{"name": "third"},
+		},
+	}
+	if got := a.sources(); !reflect.DeepEqual(got, want) {
+		t.Errorf("sources() = %v, want %v", got, want)
+	}
+}
+
+func TestResultAssemblerIgnoresEmptyAndUnknownEvents(t *testing.T) {
+	a := newResultAssembler()
+	a.add(&types.WorkerResponse{Event: types.EventDone, Sources: map[string]interface{}{"google": []interface{}{"x"}}})
+	a.add(&types.WorkerResponse{Event: "unknown"})
+	if !a.empty() {
+		t.Error("done and unknown events should not count")
+	}
+
+	a.add(&types.WorkerResponse{Event: types.EventGoogle})
+	a.add(&types.WorkerResponse{Event: types.EventLinkedIn, Index: 1})
+	sources := a.sources()
+	if google := sources["google"].([]interface{}); len(google) != 0 {
+		t.Errorf("google = %v, want empty list", google)
+	}
+	if linkedin := sources["linkedin"].([]interface{}); len(linkedin) != 0 {
+		t.Errorf("linkedin = %v, want empty list", linkedin)
+	}
+}
+
+func TestResultAssemblerKeepsLatestGoogleItems(t *testing.T) {
+	a := newResultAssembler()
+	a.add(&types.WorkerResponse{Event: types.EventGoogle, Items: []interface{}{"old"}})
+	a.add(&types.WorkerResponse{Event: types.EventGoogle, Items: []interface{}{"new"}})
+	if got := a.sources()["google"]; !reflect.DeepEqual(got, []interface{}{"new"}) {
+		t.Errorf("google = %v, want [new]", got)
+	}
+}
@@ -0,0 +1,508 @@
+package processor
+
+import (
+	"bufio"
+	"context"
+	"cy_crawler/internal/logger"
+	"cy_crawler/internal/types"
+	"encoding/json"
+	"errors"
+	"fmt"
+	"io"
+	"os"
+	"os/exec"
+	"strconv"
+	"sync"
+	"sync/atomic"
+	"time"
+
+	"github.com/sirupsen/logrus"
+)
+
+// errWorkerExited worker进程在任务返回前退出
+var errWorkerExited = errors.New("python worker exited")
+
+// resultBuffer 每个任务结果通道的容量，流式任务的中间事件最多缓存 resultBuffer-1 条，
+// 最后一个位置总是留给最终结果，读取goroutine不会因为某个任务处理慢而阻塞
+const resultBuffer = 16
+
+// cancelGrace 任务错过截止时间后等待worker确认取消的时间，
+// 期间worker没有任何输出时才认为整个进程已经卡住
+const cancelGrace = 2 * time.Second
+
+// pythonWorker 一个常驻的 crawler.py --worker 进程
+type pythonWorker struct {
+	index int
+	cmd   *exec.Cmd
+	stdin io.WriteCloser
+
+	writeMu sync.Mutex
+
+	mu       sync.Mutex
+	pending  map[string]chan *types.WorkerResponse
+	inflight int
+	exited   bool
+
+	// lastOutput 最近一次收到任意任务结果或事件的时间（UnixNano）
+	lastOutput int64
+}
+
+// WorkerPool 常驻Python worker进程池，任务通过stdin/stdout按行收发
+type WorkerPool struct {
+	scriptPath  string
+	size        int
+	concurrency int
+	// framed 为true时worker把结果帧写到描述符3，stdout只用于日志等其他输出
+	framed            bool
+	compressThreshold int
+
+	mu      sync.Mutex
+	workers []*pythonWorker
+	closed  bool
+
+	seq uint64
+}
+
+// NewWorkerPool 创建并启动worker进程池，framed见 Processor.SetFramedResults
+func NewWorkerPool(scriptPath string, size, concurrency int, framed bool, compressThreshold int) (*WorkerPool, error) {
+	if size <= 0 {
+		return nil, fmt.Errorf("worker pool size must be positive, got %d", size)
+	}
+	if concurrency <= 0 {
+		concurrency = 1
+	}
+
+	pool := &WorkerPool{
+		scriptPath:        scriptPath,
+		size:              size,
+		concurrency:       concurrency,
+		framed:            framed,
+		compressThreshold: compressThreshold,
+		workers:           make([]*pythonWorker, size),
+	}
+
+	for i := 0; i < size; i++ {
+		w, err := pool.startWorker(i)
+		if err != nil {
+			pool.Shutdown()
+			return nil, err
+		}
+		pool.workers[i] = w
+	}
+
+	logger.Logger.WithFields(logrus.Fields{
+		"scriptPath":  scriptPath,
+		"workers":     size,
+		"concurrency": concurrency,
+		"framed":      framed,
+	}).Info("Python worker pool started")
+
+	return pool, nil
+}
+
+// startWorker 启动一个worker进程并开始读取其输出
+func (p *WorkerPool) startWorker(index int) (*pythonWorker, error) {
+	args := []string{p.scriptPath, "--worker", "--concurrency", strconv.Itoa(p.concurrency)}
+	if p.framed {
+		args = append(args, framedArgs(p.compressThreshold)...)
+	}
+	cmd := exec.Command("python", args...)
+	// 独立进程组，错过任务截止时间时可以连同子进程一起杀掉
+	setProcessGroup(cmd)
+
+	stdin, err := cmd.StdinPipe()
+	if err != nil {
+		return nil, fmt.Errorf("failed to open worker stdin: %v", err)
+	}
+	stdout, err := cmd.StdoutPipe()
+	if err != nil {
+		return nil, fmt.Errorf("failed to open worker stdout: %v", err)
+	}
+	stderr, err := cmd.StderrPipe()
+	if err != nil {
+		return nil, fmt.Errorf("failed to open worker stderr: %v", err)
+	}
+
+	var results, resultsWriter *os.File
+	if p.framed {
+		if results, resultsWriter, err = attachResultPipe(cmd); err != nil {
+			return nil, err
+		}
+	}
+
+	err = cmd.Start()
+	if resultsWriter != nil {
+		resultsWriter.Close()
+	}
+	if err != nil {
+		if results != nil {
+			results.Close()
+		}
+		return nil, fmt.Errorf("failed to start python worker: %v", err)
+	}
+
+	w := &pythonWorker{
+		index:   index,
+		cmd:     cmd,
+		stdin:   stdin,
+		pending: make(map[string]chan *types.WorkerResponse),
+	}
+
+	go w.drainOutput("stderr", stderr)
+	if results != nil {
+		go w.drainOutput("stdout", stdout)
+		go w.readResults(results, w.readFrames)
+	} else {
+		go w.readResults(stdout, w.readLines)
+	}
+
+	logger.Logger.WithFields(logrus.Fields{
+		"worker": index,
+		"pid":    cmd.Process.Pid,
+	}).Info("Python worker started")
+
+	return w, nil
+}
+
+// readResults 读取worker的结果输出（stdout的行或结果描述符上的帧）并分发给等待中的任务，
+// 输出结束后等待进程退出
+func (w *pythonWorker) readResults(output io.ReadCloser, read func(*bufio.Reader)) {
+	read(bufio.NewReaderSize(output, 64*1024))
+	output.Close()
+
+	waitErr := w.cmd.Wait()
+	logger.Logger.WithFields(logrus.Fields{
+		"worker": w.index,
+		"error":  waitErr,
+	}).Warn("Python worker exited")
+
+	// 进程退出后通知所有未完成的任务
+	w.mu.Lock()
+	w.exited = true
+	pending := w.pending
+	w.pending = make(map[string]chan *types.WorkerResponse)
+	w.mu.Unlock()
+	for _, ch := range pending {
+		close(ch)
+	}
+}
+
+// readLines 按行读取worker的stdout结果
+func (w *pythonWorker) readLines(reader *bufio.Reader) {
+	for {
+		line, err := reader.ReadBytes('\n')
+		if len(line) > 0 {
+			var resp types.WorkerResponse
+			if jsonErr := json.Unmarshal(line, &resp); jsonErr != nil {
+				logger.Logger.WithFields(logrus.Fields{
+					"worker": w.index,
+					"line":   string(line),
+					"error":  jsonErr.Error(),
+				}).Warn("Ignoring unparseable python worker output")
+			} else {
+				w.deliver(&resp)
+			}
+		}
+		if err != nil {
+			return
+		}
+	}
+}
+
+// readFrames 读取worker写到结果描述符上的帧，帧损坏时无法再对齐后续输出，杀掉worker
+func (w *pythonWorker) readFrames(reader *bufio.Reader) {
+	for {
+		codec, payload, err := readFrame(reader)
+		if err == io.EOF {
+			return
+		}
+		if err != nil {
+			logger.Logger.WithFields(logrus.Fields{
+				"worker": w.index,
+				"error":  err.Error(),
+			}).Error("Corrupt python worker result frame, killing worker")
+			w.kill()
+			io.Copy(io.Discard, reader)
+			return
+		}
+
+		var resp types.WorkerResponse
+		if err := decodeFrame(codec, payload, &resp); err != nil {
+			logger.Logger.WithFields(logrus.Fields{
+				"worker":     w.index,
+				"codec":      codec,
+				"frameBytes": len(payload),
+				"error":      err.Error(),
+			}).Warn("Ignoring undecodable python worker result frame")
+			continue
+		}
+		w.deliver(&resp)
+	}
+}
+
+// drainOutput 将worker的stderr（结果帧模式下还有stdout）写入日志，避免管道写满阻塞worker
+func (w *pythonWorker) drainOutput(stream string, output io.Reader) {
+	scanner := bufio.NewScanner(output)
+	scanner.Buffer(make([]byte, 64*1024), 1024*1024)
+	for scanner.Scan() {
+		logger.Logger.WithFields(logrus.Fields{
+			"worker": w.index,
+			stream:   scanner.Text(),
+		}).Debug("Python worker output")
+	}
+}
+
+// deliver 把结果交给对应ID的等待者，中间事件不会移除等待者
+func (w *pythonWorker) deliver(resp *types.WorkerResponse) {
+	atomic.StoreInt64(&w.lastOutput, time.Now().UnixNano())
+	intermediate := resp.IsIntermediate()
+
+	w.mu.Lock()
+	ch, ok := w.pending[resp.ID]
+	if ok && !intermediate {
+		delete(w.pending, resp.ID)
+	}
+	w.mu.Unlock()
+
+	if !ok {
+		logger.Logger.WithFields(logrus.Fields{
+			"worker": w.index,
+			"id":     resp.ID,
+			"event":  resp.Event,
+		}).Warn("Received python worker result for unknown task")
+		return
+	}
+
+	// 只有当前goroutine向通道发送，保留最后一个位置后中间事件和最终结果都不会阻塞
+	if intermediate && len(ch) >= cap(ch)-1 {
+		logger.Logger.WithFields(logrus.Fields{
+			"worker": w.index,
+			"id":     resp.ID,
+			"event":  resp.Event,
+		}).Warn("Dropping python worker event, task is not keeping up")
+		return
+	}
+	ch <- resp
+}
+
+// submit 向worker发送任务并返回结果通道
+func (w *pythonWorker) submit(req *types.WorkerRequest) (chan *types.WorkerResponse, error) {
+	line, err := json.Marshal(req)
+	if err != nil {
+		return nil, err
+	}
+	line = append(line, '\n')
+
+	ch := make(chan *types.WorkerResponse, resultBuffer)
+	w.mu.Lock()
+	if w.exited {
+		w.mu.Unlock()
+		return nil, errWorkerExited
+	}
+	w.pending[req.ID] = ch
+	w.inflight++
+	w.mu.Unlock()
+
+	if err = w.write(line); err != nil {
+		w.mu.Lock()
+		delete(w.pending, req.ID)
+		w.mu.Unlock()
+		w.release()
+		return nil, fmt.Errorf("failed to write task to python worker: %v", err)
+	}
+	return ch, nil
+}
+
+// write 向worker的stdin写入一行
+func (w *pythonWorker) write(line []byte) error {
+	w.writeMu.Lock()
+	defer w.writeMu.Unlock()
+	_, err := w.stdin.Write(line)
+	return err
+}
+
+// cancelTask 请求worker取消错过截止时间的任务，并在 cancelGrace 内等待该任务的最终结果，
+// 期间的中间事件仍交给 onEvent。返回收到的最终结果（worker用截止时间前已经收集到的部分sources回复），
+// 以及worker是否仍在响应：收到了该任务的结果，或者期间有其他任务的输出，
+// 都说明只是这个任务慢，同一进程中的其他在途任务不受影响
+func (w *pythonWorker) cancelTask(id string, ch chan *types.WorkerResponse, onEvent func(*types.WorkerResponse)) (*types.WorkerResponse, bool) {
+	defer w.abandon(id)
+
+	line, err := json.Marshal(&types.WorkerCancel{ID: id, Cancel: true})
+	if err != nil {
+		return nil, false
+	}
+	sent := time.Now().UnixNano()
+	// worker卡住时stdin可能写满，不在这里阻塞；进程被杀后写入会出错返回
+	go func() {
+		if err := w.write(append(line, '\n')); err != nil {
+			logger.Logger.WithFields(logrus.Fields{
+				"worker": w.index,
+				"id":     id,
+				"error":  err.Error(),
+			}).Warn("Failed to send cancel request to python worker")
+		}
+	}()
+
+	timer := time.NewTimer(cancelGrace)
+	defer timer.Stop()
+	for {
+		select {
+		case resp, ok := <-ch:
+			if !ok {
+				// worker已经退出，不需要再杀
+				return nil, true
+			}
+			if resp.IsIntermediate() {
+				if onEvent != nil {
+					onEvent(resp)
+				}
+				continue
+			}
+			return resp, true
+		case <-timer.C:
+			return nil, atomic.LoadInt64(&w.lastOutput) > sent
+		}
+	}
+}
+
+// abandon 放弃等待某个任务的结果
+func (w *pythonWorker) abandon(id string) {
+	w.mu.Lock()
+	delete(w.pending, id)
+	w.mu.Unlock()
+}
+
+// kill 杀掉worker的整个进程组，readResults 随后会通知其余在途任务，pick 会重启该worker
+func (w *pythonWorker) kill() {
+	if err := killProcessTree(w.cmd); err != nil {
+		logger.Logger.WithFields(logrus.Fields{
+			"worker": w.index,
+			"error":  err.Error(),
+		}).Warn("Failed to kill python worker")
+	}
+}
+
+// release 任务完成后减少在途计数
+func (w *pythonWorker) release() {
+	w.mu.Lock()
+	w.inflight--
+	w.mu.Unlock()
+}
+
+// load 返回当前在途任务数，已退出的worker返回-1
+func (w *pythonWorker) load() int {
+	w.mu.Lock()
+	defer w.mu.Unlock()
+	if w.exited {
+		return -1
+	}
+	return w.inflight
+}
+
+// pick 选择在途任务最少的worker，已退出的worker会被重启
+func (p *WorkerPool) pick() (*pythonWorker, error) {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+
+	if p.closed {
+		return nil, errors.New("python worker pool is shut down")
+	}
+
+	var best *pythonWorker
+	bestLoad := 0
+	for i, w := range p.workers {
+		load := -1
+		if w != nil {
+			load = w.load()
+		}
+		if load < 0 {
+			restarted, err := p.startWorker(i)
+			if err != nil {
+				logger.Logger.WithFields(logrus.Fields{
+					"worker": i,
+					"error":  err.Error(),
+				}).Error("Failed to restart python worker")
+				continue
+			}
+			p.workers[i] = restarted
+			w, load = restarted, 0
+		}
+		if best == nil || load < bestLoad {
+			best, bestLoad = w, load
+		}
+	}
+
+	if best == nil {
+		return nil, errors.New("no python worker available")
+	}
+	return best, nil
+}
+
+// Run 将任务交给一个worker处理并等待结果
+// worker按 req.Deadline 在进程内取消超时的任务；ctx到期仍未返回时先只取消这一个任务，
+// worker在 cancelGrace 内没有任何输出才认为它已经卡住，杀掉该worker的进程组
+// req.Stream 为true时，最终结果之前的每个中间事件都会交给 onEvent（可以为nil）
+func (p *WorkerPool) Run(ctx context.Context, req *types.WorkerRequest, onEvent func(*types.WorkerResponse)) (*types.WorkerResponse, error) {
+	// 同一个requestId可能被重复投递，用序号保证在worker内唯一
+	req.ID = req.ID + "#" + strconv.FormatUint(atomic.AddUint64(&p.seq, 1), 10)
+
+	w, err := p.pick()
+	if err != nil {
+		return nil, err
+	}
+
+	ch, err := w.submit(req)
+	if err != nil {
+		return nil, err
+	}
+	defer w.release()
+
+	for {
+		select {
+		case resp, ok := <-ch:
+			if !ok {
+				return nil, errWorkerExited
+			}
+			if resp.IsIntermediate() {
+				if onEvent != nil {
+					onEvent(resp)
+				}
+				continue
+			}
+			return resp, nil
+		case <-ctx.Done():
+			fields := logrus.Fields{
+				"worker": w.index,
+				"id":     req.ID,
+			}
+			resp, responsive := w.cancelTask(req.ID, ch, onEvent)
+			if resp != nil {
+				// worker取消了任务并返回截止时间前已经收集到的部分结果，作为该任务的结果发布
+				logger.Logger.WithFields(fields).Warn("Python worker missed task deadline, cancelled the task and returned partial sources")
+				resp.Partial = true
+				return resp, nil
+			}
+			if responsive {
+				logger.Logger.WithFields(fields).Warn("Python worker missed task deadline, cancelled the task")
+			} else {
+				logger.Logger.WithFields(fields).Error("Python worker stopped responding after missing task deadline, killing it")
+				w.kill()
+			}
+			return nil, fmt.Errorf("python worker missed task deadline: %v", ctx.Err())
+		}
+	}
+}
+
+// Shutdown 关闭stdin让worker处理完剩余任务后退出
+func (p *WorkerPool) Shutdown() {
+	p.mu.Lock()
+	defer p.mu.Unlock()
+
+	p.closed = true
+	for _, w := range p.workers {
+		if w != nil {
+			w.stdin.Close()
+		}
+	}
+}
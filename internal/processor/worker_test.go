@@ -0,0 +1,110 @@
+package processor
+
+import (
+	"bytes"
+	"cy_crawler/internal/types"
+	"sync"
+	"sync/atomic"
+	"testing"
+)
+
+// lineRecorder 代替worker的stdin，记录写入的内容
+type lineRecorder struct {
+	mu      sync.Mutex
+	buf     bytes.Buffer
+	written chan struct{}
+}
+
+func newLineRecorder() *lineRecorder {
+	return &lineRecorder{written: make(chan struct{}, 16)}
+}
+
+func (r *lineRecorder) Write(p []byte) (int, error) {
+	r.mu.Lock()
+	defer r.mu.Unlock()
+	r.written <- struct{}{}
+	return r.buf.Write(p)
+}
+
+func (r *lineRecorder) Close() error { return nil }
+
+func (r *lineRecorder) String() string {
+	r.mu.Lock()
+	defer r.mu.Unlock()
+	return r.buf.String()
+}
+
+func newTestWorker(stdin *lineRecorder, id string) (*pythonWorker, chan *types.WorkerResponse) {
+	ch := make(chan *types.WorkerResponse, resultBuffer)
+	w := &pythonWorker{
+		stdin:   stdin,
+		pending: map[string]chan *types.WorkerResponse{id: ch},
+	}
+	return w, ch
+}
+
+func TestCancelTaskSendsCancelAndWaitsForResult(t *testing.T) {
+	stdin := newLineRecorder()
+	w, ch := newTestWorker(stdin, "req#1")
+
+	go func() {
+		<-stdin.written
+		w.deliver(&types.WorkerResponse{ID: "req#1", Event: types.EventLinkedIn})
+		w.deliver(&types.WorkerResponse{
+			ID:      "req#1",
+			Event:   types.EventDone,
+			Error:   "deadline",
+			Partial: true,
+			Sources: map[string]interface{}{"google": []interface{}{"g"}, "linkedin": []interface{}{}},
+		})
+	}()
+
+	var events int
+	resp, responsive := w.cancelTask("req#1", ch, func(*types.WorkerResponse) { events++ })
+	if !responsive {
+		t.Fatal("worker answered the cancel request, expected it to be considered responsive")
+	}
+	if resp == nil || resp.Error != "deadline" || len(resp.Sources["google"].([]interface{})) != 1 {
+		t.Errorf("got final response %+v, want the partial sources collected before the deadline", resp)
+	}
+	if events != 1 {
+		t.Errorf("got %d intermediate events, want 1", events)
+	}
+	if got, want := stdin.String(), "{\"id\":\"req#1\",\"cancel\":true}\n"; got != want {
+		t.Errorf("cancel line = %q, want %q", got, want)
+	}
+	if _, ok := w.pending["req#1"]; ok {
+		t.Error("cancelled task is still pending")
+	}
+}
+
+func TestCancelTaskUnresponsiveWorker(t *testing.T) {
+	if testing.Short() {
+		t.Skip("waits for cancelGrace")
+	}
+	w, ch := newTestWorker(newLineRecorder(), "req#1")
+	if resp, responsive := w.cancelTask("req#1", ch, nil); resp != nil || responsive {
+		t.Error("worker produced no output, expected it to be considered stuck")
+	}
+}
+
+func TestCancelTaskWorkerBusyWithOtherTasks(t *testing.T) {
+	if testing.Short() {
+		t.Skip("waits for cancelGrace")
+	}
+	stdin := newLineRecorder()
+	w, ch := newTestWorker(stdin, "req#1")
+	w.pending["req#2"] = make(chan *types.WorkerResponse, resultBuffer)
+
+	go func() {
+		<-stdin.written
+		// 其他任务仍有输出，说明进程没有卡住
+		w.deliver(&types.WorkerResponse{ID: "req#2", Event: types.EventDone})
+	}()
+	if resp, responsive := w.cancelTask("req#1", ch, nil); resp != nil || !responsive {
+		t.Error("worker answered another task, expected it to be considered responsive")
+	}
+	if atomic.LoadInt64(&w.lastOutput) == 0 {
+		t.Error("lastOutput was not updated on delivery")
+	}
+}
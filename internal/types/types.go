@@ -16,6 +16,8 @@ type TaskMessage struct {
 	Position           *string `json:"position,omitempty"`
 	ImportExperience   *string `json:"importExperience,omitempty"`
 	IndustryExperience *string `json:"industryExperience,omitempty"`
+	// OutputSchema 结果的输出schema（配置 [output.schemas] 中的名称），为空时按租户或默认schema裁剪
+	OutputSchema *string `json:"outputSchema,omitempty"`
 }
 
 // Validate 验证 TaskMessage 的必填字段
@@ -47,6 +49,65 @@ type ResultMessage struct {
 // PythonResult Python脚本返回的数据结构
 type PythonResult struct {
 	Sources map[string]interface{} `json:"sources"`
+	// Partial 为true表示任务到达截止时间，sources中只有已完成的部分
+	Partial bool `json:"partial,omitempty"`
+	// Upstreams 有上游熔断未关闭时，各上游的熔断状态（closed/open/half_open）
+	Upstreams map[string]string `json:"upstreams,omitempty"`
+	// Timing 各阶段累计耗时（毫秒），如 search_linkedin / scrape / parse_profile / serialize / total
+	Timing map[string]float64 `json:"timing,omitempty"`
+}
+
+// WorkerRequest 发送给常驻Python worker的单行任务
+type WorkerRequest struct {
+	ID      string `json:"id"`
+	Type    string `json:"type"`
+	Name    string `json:"name"`
+	URL     string `json:"url,omitempty"`
+	Email   string `json:"email,omitempty"`
+	Country string `json:"country,omitempty"`
+	// Tenant / Schema 用于选择结果的输出schema
+	Tenant string `json:"tenant,omitempty"`
+	Schema string `json:"schema,omitempty"`
+	// Deadline 任务截止时间（Unix时间戳，秒），worker在此之前返回已完成的部分结果
+	Deadline float64 `json:"deadline,omitempty"`
+	// Stream 为true时worker在各部分完成时先输出 google / linkedin 事件，最后输出 done 事件
+	Stream bool `json:"stream,omitempty"`
+}
+
+// WorkerCancel 请求常驻Python worker取消一个在途任务，worker随后返回该任务的最终结果
+type WorkerCancel struct {
+	ID     string `json:"id"`
+	Cancel bool   `json:"cancel"`
+}
+
+// 流式worker输出的事件类型，非流式任务的结果行没有event字段
+const (
+	// EventGoogle Google通用搜索完成，Items为搜索结果
+	EventGoogle = "google"
+	// EventLinkedIn 一个LinkedIn实体解析完成，Item为实体，Index为其URL在Google结果中的排名
+	EventLinkedIn = "linkedin"
+	// EventDone 任务完成，Sources为完整结果
+	EventDone = "done"
+)
+
+// WorkerResponse 常驻Python worker返回的单行结果或流式事件
+type WorkerResponse struct {
+	ID        string                 `json:"id"`
+	Event     string                 `json:"event,omitempty"`
+	Sources   map[string]interface{} `json:"sources"`
+	Error     string                 `json:"error,omitempty"`
+	Partial   bool                   `json:"partial,omitempty"`
+	Upstreams map[string]string      `json:"upstreams,omitempty"`
+	Timing    map[string]float64     `json:"timing,omitempty"`
+	// 以下字段只出现在 google / linkedin 事件中
+	Items []interface{}          `json:"items,omitempty"`
+	Item  map[string]interface{} `json:"item,omitempty"`
+	Index int                    `json:"index,omitempty"`
+}
+
+// IsIntermediate 是否为任务完成前的中间事件
+func (r *WorkerResponse) IsIntermediate() bool {
+	return r.Event != "" && r.Event != EventDone
 }
 
 // Config 应用配置
@@ -66,6 +127,17 @@ type Config struct {
 			} `toml:"consumer"`
 			Producer struct {
 				Topic string `toml:"topic"`
+				// 发送队列容量，队列已满时结果直接写入spool
+				QueueSize int `toml:"queue_size"`
+				// 每个批次最多的消息数，以及凑批次时最多等待的毫秒数
+				BatchSize int `toml:"batch_size"`
+				LingerMs  int `toml:"linger_ms"`
+				// 批次发送失败时的重试次数，重试耗尽后写入spool
+				SendRetries int `toml:"send_retries"`
+				// 同时等待broker确认的批次数
+				InFlightBatches int `toml:"inflight_batches"`
+				// 未能发送的结果的本地追加文件，broker恢复后补发
+				SpoolPath string `toml:"spool_path"`
 			} `toml:"producer"`
 		} `toml:"bgCheck"`
 	} `toml:"rocketmq"`
@@ -81,5 +153,26 @@ type Config struct {
 	Application struct {
 		PythonScriptPath  string `toml:"python_script_path"`
 		HeartbeatInterval int    `toml:"heartbeat_interval"`
+		// 常驻worker配置，PythonWorkers为0时退回每个任务启动一次脚本
+		WorkerScriptPath  string `toml:"worker_script_path"`
+		PythonWorkers     int    `toml:"python_workers"`
+		WorkerConcurrency int    `toml:"worker_concurrency"`
+		// 任务时间预算（秒），从requestTime开始计算；0表示不限时
+		TaskTimeout int `toml:"task_timeout"`
+		// 排队过久的任务至少保留的处理时间（秒）
+		MinTaskBudget int `toml:"min_task_budget"`
+		// Python在截止时间前返回部分结果，超过截止时间后再等待该秒数仍未返回则杀掉进程组
+		TaskKillGrace int `toml:"task_kill_grace"`
+		// 常驻worker以流式事件返回结果，worker失败或超时时用已收到的事件组装部分结果
+		StreamResults bool `toml:"stream_results"`
+		// 流式模式下每收到一个事件就发送一条 code=206 的部分结果消息
+		ForwardPartialResults bool `toml:"forward_partial_results"`
+		// Python把结果以长度前缀帧写到描述符3，不再从stdout中查找JSON
+		FramedResults bool `toml:"framed_results"`
+		// 结果帧负载超过该字节数时zlib压缩，0表示不压缩
+		ResultCompressThreshold int `toml:"result_compress_threshold"`
+		// 同时处理的MQ消息数，以及等待空闲worker的消息数上限（达到后暂停拉取）
+		ConsumerWorkers int `toml:"consumer_workers"`
+		ConsumerQueue   int `toml:"consumer_queue"`
 	} `toml:"application"`
 }
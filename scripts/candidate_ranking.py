@@ -0,0 +1,275 @@
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+from .custom_logger import get_logger
+from .linkedin_urls import entity_url, parse_linkedin_entity
+from .metrics import REGISTRY
+from .settings import get_section
+
+# 为当前文件创建专用的logger
+log = get_logger('candidate_ranking')
+
+# 第一名得分不低于 DEFAULT_MIN_SCORE 且领先第二名至少 DEFAULT_MARGIN 时只抓取第一名
+DEFAULT_MIN_SCORE = 0.6
+DEFAULT_MARGIN = 0.1
+DEFAULT_MAX_CANDIDATES = 3
+
+# 各信号的权重，任务没有提供的信号（如没有网站和邮箱时的域名）不参与计算，得分按参与的权重归一化
+WEIGHTS = {'name': 0.6, 'domain': 0.25, 'country': 0.1, 'rank': 0.05}
+# 候选页面没有相关信息时的信号值
+UNKNOWN = 0.5
+# 摘要中出现任务名称只说明候选与任务有关（也可能是提到该名称的其他公司或个人），相似度按该系数折算
+SNIPPET_NAME_FACTOR = 0.8
+
+# 比较名称时忽略的公司后缀
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'ltd', 'limited', 'llc', 'llp', 'plc', 'corp', 'corporation', 'co', 'company',
+    'gmbh', 'ag', 'sa', 'sas', 'sarl', 'srl', 'spa', 'bv', 'nv', 'ab', 'oy', 'as', 'pty', 'kk', 'pte',
+}
+
+# 个人邮箱域名不能代表公司
+FREE_EMAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'msn.com', 'yahoo.com',
+    'icloud.com', 'me.com', 'aol.com', 'proton.me', 'protonmail.com', 'gmx.de', 'gmx.net', 'web.de',
+    'mail.ru', 'yandex.ru', 'qq.com', '163.com', '126.com', 'sina.com', 'naver.com',
+}
+
+# 常见国家名称/别名 -> ISO 3166-1 alpha-2，任务的 country 可以是名称或两位代码
+COUNTRY_CODES = {
+    'united states': 'US', 'usa': 'US', 'america': 'US', 'united kingdom': 'GB', 'uk': 'GB', 'england': 'GB',
+    'great britain': 'GB', 'germany': 'DE', 'deutschland': 'DE', 'france': 'FR', 'italy': 'IT', 'spain': 'ES',
+    'netherlands': 'NL', 'holland': 'NL', 'belgium': 'BE', 'switzerland': 'CH', 'austria': 'AT', 'sweden': 'SE',
+    'norway': 'NO', 'denmark': 'DK', 'finland': 'FI', 'ireland': 'IE', 'portugal': 'PT', 'poland': 'PL',
+    'canada': 'CA', 'mexico': 'MX', 'brazil': 'BR', 'argentina': 'AR', 'chile': 'CL', 'colombia': 'CO',
+    'china': 'CN', 'hong kong': 'HK', 'taiwan': 'TW', 'japan': 'JP', 'south korea': 'KR', 'korea': 'KR',
+    'india': 'IN', 'singapore': 'SG', 'malaysia': 'MY', 'indonesia': 'ID', 'thailand': 'TH', 'vietnam': 'VN',
+    'philippines': 'PH', 'australia': 'AU', 'new zealand': 'NZ', 'united arab emirates': 'AE', 'uae': 'AE',
+    'saudi arabia': 'SA', 'israel': 'IL', 'turkey': 'TR', 'south africa': 'ZA', 'egypt': 'EG', 'nigeria': 'NG',
+    'russia': 'RU', 'ukraine': 'UA',
+}
+CODE_NAMES: Dict[str, Set[str]] = {}
+for _name, _code in COUNTRY_CODES.items():
+    CODE_NAMES.setdefault(_code, set()).add(_name)
+
+# LinkedIn国家子域名中与ISO代码不一致的部分
+SUBDOMAIN_CODES = {'uk': 'GB'}
+
+def normalize_name(text: str) -> List[str]:
+    """
+    名称分词：去掉重音、标点和公司后缀，转小写
+
+    Args:
+        text: 名称或标题，如 "Société Générale S.A."
+
+    Returns:
+        词列表，如 ['societe', 'generale']
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char)).lower()
+    # 单字母缩写中的点去掉，"S.A." / "B.V." 按 "sa" / "bv" 匹配公司后缀
+    text = re.sub(r'(?<=\b[^\W_])\.', '', text)
+    tokens = re.findall(r'[^\W_]+', text)
+    return [token for token in tokens if token not in LEGAL_SUFFIXES] or tokens
+
+def candidate_names(item: Dict[str, Any], search_type: str) -> List[str]:
+    """
+    从Google结果中取出候选实体的名称：标题和og:title去掉 " | LinkedIn" 等后缀，
+    个人标题 "Jane Doe - Title - Company" 只取第一段，以及pagemap中的名称
+    """
+    pagemap = item.get('pagemap') or {}
+    texts = [item.get('title', '')]
+    texts += [meta.get('og:title', '') for meta in pagemap.get('metatags', [])]
+    names = []
+    for text in texts:
+        text = text.split(' | ')[0]
+        if search_type == 'person':
+            text = text.split(' - ')[0]
+        names.append(text)
+    names += [entry.get('name', '') for key in ('organization', 'person') for entry in pagemap.get(key, [])]
+    return [name for name in names if name]
+
+def domain_of(value: str) -> str:
+    """网址或邮箱的域名（小写，去掉www），无法识别时返回空字符串"""
+    value = (value or '').strip().lower()
+    if '@' in value:
+        return value.rsplit('@', 1)[1]
+    if not value:
+        return ''
+    host = urlparse(value if '://' in value else f"https://{value}").netloc.split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+def task_domains(url: str, email: str) -> Set[str]:
+    """任务的网站域名和邮箱域名（个人邮箱域名除外）"""
+    domains = {domain_of(url)}
+    email_domain = domain_of(email) if email and '@' in email else ''
+    if email_domain not in FREE_EMAIL_DOMAINS:
+        domains.add(email_domain)
+    domains.discard('')
+    return domains
+
+def country_code(country: str) -> Optional[str]:
+    """任务国家对应的ISO两位代码，无法识别时返回None"""
+    country = (country or '').strip().lower()
+    if not country:
+        return None
+    if len(country) == 2:
+        return 'GB' if country == 'uk' else country.upper()
+    return COUNTRY_CODES.get(country)
+
+class CandidateScorer:
+    """
+    对同一任务的所有候选批量打分：任务名称、域名和国家只处理一次
+
+    Args:
+        search_type: 'company' / 'person'
+        name: 任务名称
+        url: 任务网站
+        email: 任务邮箱
+        country: 任务国家（名称或两位代码）
+    """
+
+    def __init__(self, search_type: str, name: str, url: str = '', email: str = '', country: str = ''):
+        self.search_type = search_type
+        self.name_tokens = normalize_name(name)
+        self.name = ' '.join(sorted(self.name_tokens))
+        self.domains = task_domains(url, email)
+        self.country = (country or '').strip().lower()
+        self.country_code = country_code(country)
+        self.country_names = CODE_NAMES.get(self.country_code, set()) | ({self.country} if self.country else set())
+
+    def name_score(self, item: Dict[str, Any]) -> float:
+        """
+        任务名称与候选各个名称的最大相似度（分词排序后的字符相似度）
+
+        摘要中与任务名称词数相同的每一段连续的词也参与比较，相似度按 SNIPPET_NAME_FACTOR 折算，
+        使标题被截断或不含名称的候选仍有名称信号
+        """
+        best = 0.0
+        matcher = SequenceMatcher(autojunk=False)
+        matcher.set_seq2(self.name)
+        for text in candidate_names(item, self.search_type):
+            matcher.set_seq1(' '.join(sorted(normalize_name(text))))
+            if matcher.real_quick_ratio() > best and matcher.quick_ratio() > best:
+                best = max(best, matcher.ratio())
+
+        size = len(self.name_tokens)
+        snippet = item.get('snippet', '')
+        if size and snippet and best < SNIPPET_NAME_FACTOR:
+            tokens = normalize_name(snippet)
+            for start in range(max(1, len(tokens) - size + 1)):
+                matcher.set_seq1(' '.join(sorted(tokens[start:start + size])))
+                bound = best / SNIPPET_NAME_FACTOR
+                if matcher.real_quick_ratio() > bound and matcher.quick_ratio() > bound:
+                    best = max(best, SNIPPET_NAME_FACTOR * matcher.ratio())
+        return best
+
+    def domain_score(self, item: Dict[str, Any]) -> float:
+        """候选的官网与任务域名一致为1，明确不一致为0；没有官网时看标题和摘要中是否出现域名"""
+        pagemap = item.get('pagemap') or {}
+        websites = {domain_of(entry.get('url', '')) for entry in pagemap.get('organization', [])} - {''}
+        if websites:
+            return 1.0 if any(website == domain or website.endswith('.' + domain) or domain.endswith('.' + website)
+                              for website in websites for domain in self.domains) else 0.0
+        text = f"{item.get('title', '')} {item.get('snippet', '')}".lower()
+        return 1.0 if any(domain in text for domain in self.domains) else UNKNOWN
+
+    def country_score(self, item: Dict[str, Any]) -> float:
+        """候选的国家代码（pagemap或LinkedIn国家子域名）与任务一致为1，不一致为0；地址文本中出现国家名称为1"""
+        pagemap = item.get('pagemap') or {}
+        codes = {str(entry.get('addresscountry', '')).upper() for entry in pagemap.get('organization', [])} - {''}
+        subdomain = urlparse(item.get('link', '')).netloc.lower().split('.')[0]
+        if len(subdomain) == 2:
+            codes.add(SUBDOMAIN_CODES.get(subdomain, subdomain.upper()))
+        if self.country_code and codes:
+            return 1.0 if self.country_code in codes else 0.0
+
+        text = ' '.join([item.get('snippet', '')] + [str(entry.get('address', ''))
+                                                    for key in ('organization', 'person') for entry in pagemap.get(key, [])]).lower()
+        if any(re.search(rf'\b{re.escape(name)}\b', text) for name in self.country_names):
+            return 1.0
+        return UNKNOWN
+
+    def score(self, item: Dict[str, Any], rank: int, total: int) -> float:
+        """
+        综合得分（0-1）
+
+        Args:
+            item: Google结果
+            rank: 在候选中的排名（从0开始）
+            total: 候选总数
+        """
+        signals = {'name': self.name_score(item), 'rank': 1 - rank / total}
+        if self.domains:
+            signals['domain'] = self.domain_score(item)
+        if self.country:
+            signals['country'] = self.country_score(item)
+        weight = sum(WEIGHTS[key] for key in signals)
+        return sum(WEIGHTS[key] * value for key, value in signals.items()) / weight
+
+def unique_candidates(google_items: List[Dict[str, Any]], search_type: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    按规范化URL去重Google结果中指定类型的LinkedIn实体，保持Google排名
+
+    Args:
+        google_items: Google搜索结果的items列表
+        search_type: 只保留该类型的实体（'company' / 'person'）
+
+    Returns:
+        [(规范化的实体URL, Google结果), ...]，非实体页面和其他类型的实体被丢弃，重复的实体只保留排名最高的一条
+    """
+    seen = set()
+    candidates = []
+    for item in google_items:
+        entity = parse_linkedin_entity(item.get('link', ''))
+        if entity is None or entity[0] != search_type or entity in seen:
+            continue
+        seen.add(entity)
+        candidates.append((entity_url(*entity), item))
+    return candidates
+
+def select_candidates(google_items: List[Dict[str, Any]], search_type: str, name: str,
+                      url: str = '', email: str = '', country: str = '') -> Tuple[List[str], str]:
+    """
+    对Google返回的LinkedIn候选打分，决定需要抓取哪些页面
+
+    - 第一名得分不低于 min_score 且领先第二名至少 margin：只抓取第一名
+    - 否则（结果模糊）：抓取与第一名相差不超过 margin 的候选，最多 max_candidates 个
+    - [ranking] enabled = false 时按Google排名抓取全部候选
+
+    Args:
+        google_items: Google搜索结果的items列表
+        search_type: 'company' / 'person'
+        name: 任务名称
+        url: 任务网站
+        email: 任务邮箱
+        country: 任务国家
+
+    Returns:
+        (需要抓取的规范化URL列表，按得分从高到低排列, 决策)，决策为 'confident' / 'ambiguous'，
+        未打分（未启用、没有候选或没有名称）时为 'unranked'
+    """
+    config = get_section('ranking')
+    candidates = unique_candidates(google_items, search_type)
+    if not config.get('enabled', True) or not candidates or not name:
+        return [candidate_url for candidate_url, _ in candidates], 'unranked'
+
+    scorer = CandidateScorer(search_type, name, url, email, country)
+    scored = sorted(((scorer.score(item, rank, len(candidates)), candidate_url)
+                     for rank, (candidate_url, item) in enumerate(candidates)), reverse=True)
+    margin = config.get('margin', DEFAULT_MARGIN)
+    top_score = scored[0][0]
+    runner_up = scored[1][0] if len(scored) > 1 else 0.0
+
+    if top_score >= config.get('min_score', DEFAULT_MIN_SCORE) and top_score - runner_up >= margin:
+        decision, selected = 'confident', [scored[0][1]]
+    else:
+        decision, selected = 'ambiguous', [candidate_url for score, candidate_url in scored if top_score - score <= margin]
+    selected = selected[:config.get('max_candidates', DEFAULT_MAX_CANDIDATES)]
+
+    REGISTRY.inc('candidate_selections_total', help='LinkedIn candidate selections by decision',
+                 type=search_type, decision=decision)
+    log.info(f"Ranked {len(candidates)} {search_type} candidates for {name!r} ({decision}): "
+             + ', '.join(f"{candidate_url} {score:.2f}" for score, candidate_url in scored))
+    return selected, decision
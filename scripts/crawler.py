@@ -4,24 +4,48 @@ import json
 import sys
 import argparse
 import os
-import logging
-from typing import List, Dict, Any
-from urllib.parse import urlparse
+import time
+
+# 进程启动（导入本模块）的时间点，单任务模式下用于统计启动耗时
+STARTED = time.perf_counter()
 
-logging.basicConfig(level=logging.INFO)
+from typing import List, Dict, Any, Iterator, TYPE_CHECKING
+from urllib.parse import urlparse
 
 # 添加项目根目录到 Python 路径，以便能够找到 scripts 模块
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from scripts.google_search import search_company_on_linkedin_get_top3, search_person_on_linkedin_get_top3, search_general_google
-from scripts.linkedin_scraper import scrape_company_overview, scrape_profile
+from scripts.google_search import (
+    async_search_company_on_linkedin_get_top3,
+    async_search_person_on_linkedin_get_top3,
+    async_search_general_google,
+    close_search_api,
+)
+from scripts.linkedin_scraper import scrape_company_overview, scrape_profile, get_tier_stats
+from scripts.deadline import set_deadline, reset_deadline, expired, run_until_deadline, wait_until_deadline
+from scripts.resilience import CLOSED, get_breaker_states, get_resilience_stats
+from scripts.metrics import REGISTRY, record_stage, start_task_timing, stop_task_timing
+from scripts.output_schema import get_output_schema, reset_output_schema, resolve_output_schema, set_output_schema
+from scripts import events
+from scripts.parse_pool import INLINE, configure_parse_executor, shutdown_parse_executor
+from scripts.framing import DEFAULT_COMPRESS_THRESHOLD, FrameWriter, LineWriter, dumps
+
+if TYPE_CHECKING:
+    # LinkedIn索引（及sqlite3）在第一个公司任务时才导入
+    from scripts.linkedin_index import LinkedInIndex
+
+# 两条链路在任务截止时间之后额外等待的秒数，留给内部阶段取消未完成的请求并返回部分结果
+DEADLINE_GRACE = 1.0
+
+# 单任务/worker模式的结果输出，默认每条结果一行JSON写到stdout，--result-fd 时改为写帧
+result_writer = LineWriter(sys.stdout.buffer)
 
 def parse_arguments():
     """解析命令行参数"""
     parser = argparse.ArgumentParser(description='LinkedIn Company Crawler')
     
-    parser.add_argument('--type', required=True, choices=['company', 'person'],
-                       help='类型: company 或 person')
+    parser.add_argument('--type', required=False, choices=['company', 'person'],
+                       help='类型: company 或 person (单任务模式必填)')
     parser.add_argument('--name', required=False, default='',
                        help='名称: 字符串 (可选)')
     parser.add_argument('--url', required=False, default='',
@@ -30,38 +54,74 @@ def parse_arguments():
                        help='邮箱: 字符串 (可选)')
     parser.add_argument('--country', required=False, default='',
                        help='国家: 字符串 (可选)')
+    parser.add_argument('--tenant', required=False, default='',
+                       help='租户ID: 按 [output.tenants] 选择输出schema (可选)')
+    parser.add_argument('--schema', required=False, default='',
+                       help='输出schema: [output.schemas] 中的名称，优先于租户的schema (可选)')
+    parser.add_argument('--worker', action='store_true',
+                       help='常驻worker模式: 从stdin逐行读取任务JSON，每个任务输出一行结果JSON')
+    parser.add_argument('--batch', metavar='FILE', default=None,
+                       help='批量模式: 从JSONL文件流式读取任务，"-" 表示stdin')
+    parser.add_argument('--output', metavar='FILE', default='-',
+                       help='批量模式的结果JSONL文件，"-" 表示stdout (默认)')
+    parser.add_argument('--concurrency', type=int, default=8,
+                       help='worker/批量模式下同时处理的最大任务数 (默认: 8)')
+    parser.add_argument('--deadline', type=float, default=None,
+                       help='任务截止时间 (Unix时间戳，秒)，到期后取消未完成的请求并返回已有的部分结果')
+    parser.add_argument('--stream', action='store_true',
+                       help='单任务模式下输出NDJSON事件流: 每个部分完成时立即输出一行事件，最后一行为 "event": "done" 的完整结果')
+    parser.add_argument('--result-fd', type=int, default=None,
+                       help='单任务/worker模式下把结果以长度前缀帧写入该文件描述符，而不是stdout')
+    parser.add_argument('--compress-threshold', type=int, default=DEFAULT_COMPRESS_THRESHOLD,
+                       help=f'结果帧超过该字节数时zlib压缩，0表示不压缩 (默认: {DEFAULT_COMPRESS_THRESHOLD})')
     
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not args.worker and args.batch is None and not args.type:
+        parser.error('--type is required unless --worker or --batch is given')
+    return args
 
-def extract_urls_from_google_items(google_items: List[Dict], search_type: str) -> List[str]:
+def task_to_args(task: Dict[str, Any]) -> argparse.Namespace:
     """
-    从Google搜索结果中提取URL，并根据类型过滤
+    将worker/批量模式下的任务JSON转换为与命令行参数相同结构的对象
+    
+    支持两种格式：
+    - 与命令行参数同名的字段 (type="company"/"person", name/url/email/country/tenant/schema)
+    - MQ任务消息格式 (type=1/2, companyName/contactPersonName/companyWebsite/emailAddress/location/tenantId/outputSchema)，
+      name 的选择规则与 processor.go 一致
+    两种格式都可以带 deadline 字段 (Unix时间戳，秒)；stream 字段只在worker模式下生效
     
     Args:
-        google_items: Google搜索结果的items列表
-        search_type: 搜索类型，'company' 或 'person'
+        task: 任务字典
         
     Returns:
-        符合类型要求的URL列表
+        可直接传给 process_company/process_person 的参数对象
     """
-    urls = []
+    if isinstance(task.get('type'), int):
+        task_type = {1: 'company', 2: 'person'}.get(task['type'], '')
+        name = task.get('companyName') or ''
+        if task_type == 'person' and task.get('contactPersonName'):
+            name = task['contactPersonName']
+        return argparse.Namespace(
+            type=task_type,
+            name=name,
+            url=task.get('companyWebsite') or '',
+            email=task.get('emailAddress') or '',
+            country=task.get('location') or '',
+            tenant=task.get('tenantId') or '',
+            schema=task.get('outputSchema') or '',
+            deadline=task.get('deadline'),
+        )
     
-    for item in google_items:
-        if 'link' in item:
-            url = item['link']
-            
-            # 根据类型过滤URL
-            if search_type == 'company':
-                # 公司类型：必须是 LinkedIn 公司页面
-                if 'linkedin.com/company/' in url:
-                    urls.append(url)
-                    
-            elif search_type == 'person':
-                # 个人类型：必须是 LinkedIn 个人资料页面
-                if 'linkedin.com/in/' in url:
-                    urls.append(url)
-    
-    return urls
+    return argparse.Namespace(
+        type=task.get('type') or '',
+        name=task.get('name') or '',
+        url=task.get('url') or '',
+        email=task.get('email') or '',
+        country=task.get('country') or '',
+        tenant=task.get('tenant') or '',
+        schema=task.get('schema') or '',
+        deadline=task.get('deadline'),
+    )
 
 def extract_domain_from_url(url: str) -> str:
     """
@@ -125,9 +185,30 @@ def build_google_search_query(name: str, url: str) -> str:
     else:
         return ""
 
+def has_company_content(linkedin_data: List[Dict[str, Any]]) -> bool:
+    """LinkedIn公司结果中是否至少有一个非空的overview"""
+    return any(any((item.get("overview") or {}).values()) for item in linkedin_data)
+
+async def refresh_linkedin_index(index: 'LinkedInIndex', args) -> None:
+    """
+    后台重新验证索引中较旧的映射：重新搜索并打分，结果明确时更新映射
+    
+    Args:
+        index: LinkedIn索引
+        args: 命中该映射的任务参数
+    """
+    from scripts.candidate_ranking import select_candidates
+    google_items = await async_search_company_on_linkedin_get_top3(args.name)
+    linkedin_urls, decision = select_candidates(google_items, 'company', args.name, args.url, args.email, args.country)
+    if decision == 'confident':
+        await index.async_learn(linkedin_urls[0], args.name, args.url, args.email, args.country)
+
 async def process_linkedin_chain(args, search_type: str) -> Dict[str, Any]:
     """
-    处理LinkedIn链路：Google搜索 -> 提取URL -> LinkedIn爬取
+    处理LinkedIn链路：（公司）查询索引 -> Google搜索 -> 候选打分 -> LinkedIn爬取
+    
+    公司任务先用网站/邮箱域名和名称+国家查询LinkedIn索引，命中且抓取成功时不再搜索Google；
+    Google结果打分明确且抓取成功时把映射写入索引
     
     Args:
         args: 命令行参数
@@ -138,29 +219,54 @@ async def process_linkedin_chain(args, search_type: str) -> Dict[str, Any]:
     """
     linkedin_data = []
     
+    # 流式输出时每个实体解析完成后立即输出，index 为URL在抓取列表中的位置
+    def on_item(index: int, item: Dict[str, Any]) -> None:
+        events.emit_event(events.LINKEDIN, index=index, item=item)
+    
     try:
-        # 1. 从Google搜索获取前3个结果（使用LinkedIn搜索）
+        # 0. 已知公司直接抓取索引中的主页，较旧的映射在后台重新验证
+        index = None
         if search_type == 'company':
-            google_items = search_company_on_linkedin_get_top3(args.name)
+            from scripts.linkedin_index import count_index_lookup, get_linkedin_index
+            index = get_linkedin_index()
+        if index is not None:
+            hit = await index.async_lookup(args.name, args.url, args.email, args.country)
+            count_index_lookup(hit)
+            if hit is not None:
+                linkedin_data = await scrape_company_overview([hit.url], on_item)
+                if has_company_content(linkedin_data) or expired():
+                    if hit.stale:
+                        index.schedule_refresh(hit.url, lambda: refresh_linkedin_index(index, args))
+                    return {"linkedin": linkedin_data}
+                # 索引中的主页没有抓取到内容，按正常流程重新搜索，打分明确时覆盖该映射
+        
+        # 1. 从Google搜索获取前3个结果（使用LinkedIn搜索），超过截止时间视为没有结果
+        if search_type == 'company':
+            google_items = await run_until_deadline(async_search_company_on_linkedin_get_top3(args.name), default=[])
         else:
-            google_items = search_person_on_linkedin_get_top3(args.name)
+            google_items = await run_until_deadline(async_search_person_on_linkedin_get_top3(args.name), default=[])
         
         if not google_items:
             # 如果没有Google结果，直接返回空结果
             return {"linkedin": []}
         
-        # 2. 从Google结果中提取URL用于LinkedIn抓取
-        linkedin_urls = extract_urls_from_google_items(google_items, search_type)
+        # 2. 对Google结果中的LinkedIn候选打分，结果明确时只抓取最匹配的一个
+        from scripts.candidate_ranking import select_candidates
+        linkedin_urls, decision = select_candidates(google_items, search_type, args.name, args.url, args.email, args.country)
         
         if not linkedin_urls:
             # 如果没有提取到URL，直接返回空结果
             return {"linkedin": []}
         
-        # 3. 抓取LinkedIn数据
+        # 3. 抓取LinkedIn数据，截止时间到达时只返回已经抓取完成的页面
         if search_type == 'company':
-            linkedin_data = await scrape_company_overview(linkedin_urls)
+            linkedin_data = await scrape_company_overview(linkedin_urls, on_item)
         else:
-            linkedin_data = await scrape_profile(linkedin_urls)
+            linkedin_data = await scrape_profile(linkedin_urls, on_item)
+        
+        # 4. 打分明确且抓取成功的公司写入索引
+        if index is not None and decision == 'confident' and has_company_content(linkedin_data):
+            await index.async_learn(linkedin_urls[0], args.name, args.url, args.email, args.country)
         
         return {"linkedin": linkedin_data}
         
@@ -168,6 +274,12 @@ async def process_linkedin_chain(args, search_type: str) -> Dict[str, Any]:
         # 发生错误时返回已有的结果
         return {"linkedin": linkedin_data}
 
+async def close_linkedin_index(wait: bool = True) -> None:
+    """退出前处理索引的后台刷新（见 linkedin_index.close_linkedin_index），没有处理过公司任务时不导入索引模块"""
+    if 'scripts.linkedin_index' in sys.modules:
+        from scripts.linkedin_index import close_linkedin_index as close_index
+        await close_index(wait)
+
 async def process_google_chain(args) -> Dict[str, Any]:
     """
     处理Google链路：使用name和url组合搜索Google信息
@@ -186,8 +298,10 @@ async def process_google_chain(args) -> Dict[str, Any]:
             # 如果没有查询参数，返回空结果
             return {"google": []}
         
-        # 执行Google搜索
-        google_data = search_general_google(query)
+        # 执行Google搜索，超过截止时间视为没有结果，按输出schema裁剪
+        google_data = await run_until_deadline(async_search_general_google(query), default=[])
+        google_data = get_output_schema().project(args.type, 'google', google_data)
+        events.emit_event(events.GOOGLE, items=google_data)
         
         return {"google": google_data}
         
@@ -195,6 +309,12 @@ async def process_google_chain(args) -> Dict[str, Any]:
         # 发生错误时返回空结果
         return {"google": []}
 
+def chain_result(task: asyncio.Task) -> Any:
+    """取出已结束链路的结果，被取消或抛出异常的链路返回None"""
+    if not task.done() or task.cancelled() or task.exception() is not None:
+        return None
+    return task.result()
+
 async def process_company(args) -> Dict[str, Any]:
     """
     处理公司类型的请求
@@ -211,13 +331,13 @@ async def process_company(args) -> Dict[str, Any]:
     
     try:
         # 并行执行两条链路
-        linkedin_task = process_linkedin_chain(args, 'company')
-        google_task = process_google_chain(args)
+        linkedin_task = asyncio.create_task(process_linkedin_chain(args, 'company'))
+        google_task = asyncio.create_task(process_google_chain(args))
         
-        # 等待两条链路完成
-        linkedin_result, google_result = await asyncio.gather(
-            linkedin_task, google_task, return_exceptions=True
-        )
+        # 等待两条链路完成，截止时间之后仍未返回的链路被取消
+        await wait_until_deadline([linkedin_task, google_task], grace=DEADLINE_GRACE)
+        linkedin_result = chain_result(linkedin_task)
+        google_result = chain_result(google_task)
         
         # 处理LinkedIn结果
         if isinstance(linkedin_result, dict) and "linkedin" in linkedin_result:
@@ -249,13 +369,13 @@ async def process_person(args) -> Dict[str, Any]:
     
     try:
         # 并行执行两条链路
-        linkedin_task = process_linkedin_chain(args, 'person')
-        google_task = process_google_chain(args)
+        linkedin_task = asyncio.create_task(process_linkedin_chain(args, 'person'))
+        google_task = asyncio.create_task(process_google_chain(args))
         
-        # 等待两条链路完成
-        linkedin_result, google_result = await asyncio.gather(
-            linkedin_task, google_task, return_exceptions=True
-        )
+        # 等待两条链路完成，截止时间之后仍未返回的链路被取消
+        await wait_until_deadline([linkedin_task, google_task], grace=DEADLINE_GRACE)
+        linkedin_result = chain_result(linkedin_task)
+        google_result = chain_result(google_task)
         
         # 处理LinkedIn结果
         if isinstance(linkedin_result, dict) and "linkedin" in linkedin_result:
@@ -271,24 +391,311 @@ async def process_person(args) -> Dict[str, Any]:
         # 发生错误时返回已有的结果（可能包含部分数据）
         return result
 
+async def process_task(args) -> Dict[str, Any]:
+    """
+    根据任务类型分发处理
+    
+    args.deadline 不为空时，所有阶段在该时间点取消未完成的请求，结果中只包含已完成的部分，
+    并带有 "partial": true；有上游熔断未关闭时，结果中带有各上游的熔断状态 "upstreams"；
+    "timing" 为各阶段的累计耗时（毫秒）和任务总耗时 total；
+    sources 按 args.schema / args.tenant 选择的输出schema裁剪，见 output_schema.resolve_output_schema
+    
+    Args:
+        args: 命令行参数或 task_to_args 生成的参数对象
+        
+    Returns:
+        包含Google和LinkedIn数据的完整结果结构
+    """
+    token = set_deadline(getattr(args, 'deadline', None))
+    schema_token = set_output_schema(resolve_output_schema(getattr(args, 'schema', None), getattr(args, 'tenant', None)))
+    timing_token, timing = start_task_timing()
+    started = time.perf_counter()
+    try:
+        if args.type == 'person':
+            result = await process_person(args)
+        elif args.type == 'company':
+            result = await process_company(args)
+        else:
+            return {"sources": {"google": [], "linkedin": []}}
+        if expired():
+            result["partial"] = True
+        breakers = get_breaker_states()
+        if any(state != CLOSED for state in breakers.values()):
+            result["upstreams"] = breakers
+        
+        elapsed = time.perf_counter() - started
+        REGISTRY.observe('task_seconds', elapsed, help='End-to-end task processing time', type=args.type)
+        REGISTRY.inc('tasks_total', help='Processed tasks by outcome', type=args.type,
+                     outcome='partial' if result.get("partial") else 'complete')
+        result["timing"] = {**timing, "total": round(elapsed * 1000, 1)}
+        return result
+    finally:
+        stop_task_timing(timing_token)
+        reset_output_schema(schema_token)
+        reset_deadline(token)
+
+def dump_result(payload: Dict[str, Any]) -> bytes:
+    """
+    序列化一条结果，序列化的耗时记入 serialize 阶段并追加到结果的 timing 中
+    
+    Args:
+        payload: 结果字典，其中的 timing 会被取出，序列化完成后再拼接到末尾
+        
+    Returns:
+        单行UTF-8 JSON
+    """
+    timing = payload.pop("timing", None)
+    started = time.perf_counter()
+    body = dumps(payload)
+    elapsed = time.perf_counter() - started
+    record_stage('serialize', elapsed)
+    if timing is None:
+        return body
+    timing["serialize"] = round(elapsed * 1000, 1)
+    return body[:-1] + b',"timing":' + dumps(timing) + b'}'
+
+def write_result(payload: Dict[str, Any]) -> None:
+    """写出一条结果或事件（stdout的一行JSON，或 --result-fd 上的一帧），供Go侧读取"""
+    result_writer.write(dump_result(payload))
+
+async def handle_worker_line(task: Dict[str, Any], semaphore: asyncio.Semaphore) -> None:
+    """
+    处理worker模式下的一个任务
+    
+    Args:
+        task: stdin读取的一行任务JSON解析后的字典
+        semaphore: 限制同时处理任务数的信号量
+    """
+    task_id = task.get('id')
+    done = {}
+    # 记录各部分完成时的事件，任务被取消时用已经收集到的部分作为结果
+    collector = events.SourceCollector()
+    try:
+        if task.get('stream'):
+            # 流式任务：中间事件带上任务ID输出，最后一行标记为done
+            collector.emit = lambda event: write_result({"id": task_id, **event})
+            done = {"event": events.DONE}
+        events.set_event_emitter(collector)
+        async with semaphore:
+            result = await process_task(task_to_args(task))
+        write_result({"id": task_id, **done, **result})
+    except asyncio.CancelledError:
+        # Go侧在任务错过截止时间后发来取消请求，返回截止时间前已经完成的部分sources作为最终结果
+        write_result({"id": task_id, **done, "sources": collector.sources(), "partial": True, "error": "deadline"})
+    except Exception as e:
+        # 单个任务失败不能影响worker进程，返回空结果和错误信息
+        write_result({"id": task_id, **done, "sources": {"google": [], "linkedin": []}, "error": str(e)})
+
+async def run_worker(concurrency: int) -> None:
+    """
+    常驻worker模式：从stdin读取换行分隔的任务JSON，在同一个事件循环上并发处理，
+    每个任务完成后输出一行 {"id": ..., "sources": {...}}，stdin关闭后等待剩余任务完成再退出
+    
+    任务带 "stream": true 时，google / linkedin 事件在各部分完成时先输出（同样带id），
+    最终结果行带 "event": "done"；指定 --result-fd 时每行结果改为该描述符上的一帧
+    
+    {"id": ..., "cancel": true} 取消该id的任务，只影响这一个任务，它随后输出截止时间前已经完成的部分sources，
+    带 "partial": true 和 "error": "deadline"
+    
+    Args:
+        concurrency: 同时处理的最大任务数
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=16 * 1024 * 1024)
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pending = set()
+    # 按任务id记录正在处理的任务，用于处理取消请求
+    running: Dict[str, asyncio.Task] = {}
+    # 指标导出只在worker/批量模式使用，单任务模式不导入
+    from scripts.metrics_exporter import start_metrics_exporter
+    exporter = await start_metrics_exporter()
+    
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            task = json.loads(line)
+            if not isinstance(task, dict):
+                raise ValueError(f"task must be a JSON object, got {type(task).__name__}")
+        except ValueError as e:
+            write_result({"id": None, "sources": {"google": [], "linkedin": []}, "error": str(e)})
+            continue
+        
+        task_id = task.get('id')
+        if task.get('cancel'):
+            job = running.get(task_id)
+            if job is not None:
+                job.cancel()
+            continue
+        
+        job = asyncio.create_task(handle_worker_line(task, semaphore))
+        pending.add(job)
+        job.add_done_callback(pending.discard)
+        if task_id is not None:
+            running[task_id] = job
+            job.add_done_callback(lambda _, task_id=task_id: running.pop(task_id, None))
+    
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    await close_linkedin_index()
+    await close_search_api()
+    shutdown_parse_executor()
+    if exporter:
+        await exporter.stop()
+
+def iter_batch_tasks(path: str, stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """
+    逐行读取JSONL任务文件，无法解析的行计入 stats['invalid'] 后跳过
+    
+    Args:
+        path: 任务文件路径，"-" 表示stdin
+        stats: 批量运行统计
+        
+    Yields:
+        任务字典
+    """
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                task = json.loads(line)
+            except ValueError:
+                stats['invalid'] += 1
+                continue
+            if not isinstance(task, dict):
+                stats['invalid'] += 1
+                continue
+            yield task
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+async def run_batch_task(task: Dict[str, Any], output: LineWriter, stats: Dict[str, int], semaphore: asyncio.Semaphore) -> None:
+    """
+    处理批量模式中的一个任务并立即写出结果行
+    
+    Args:
+        task: 任务字典
+        output: 结果JSONL输出
+        stats: 批量运行统计
+        semaphore: 已在调度时获取的并发信号量，任务结束后释放
+    """
+    request_id = task.get('requestId', task.get('id'))
+    try:
+        result = await process_task(task_to_args(task))
+        line = {"requestId": request_id, **result}
+        stats['succeeded'] += 1
+    except Exception as e:
+        line = {"requestId": request_id, "sources": {"google": [], "linkedin": []}, "error": str(e)}
+        stats['failed'] += 1
+    finally:
+        semaphore.release()
+    output.write(dump_result(line))
+
+async def run_batch(path: str, output_path: str, concurrency: int) -> Dict[str, Any]:
+    """
+    批量模式：流式读取JSONL任务，在并发上限内处理，按完成顺序输出带requestId的结果JSONL
+    
+    调度时先获取信号量再读取下一行，因此同时存在的任务数不超过 concurrency，内存占用与输入大小无关
+    
+    Args:
+        path: 任务文件路径，"-" 表示stdin
+        output_path: 结果文件路径，"-" 表示stdout
+        concurrency: 同时处理的最大任务数
+        
+    Returns:
+        运行统计
+    """
+    loop = asyncio.get_running_loop()
+    stats = {"submitted": 0, "succeeded": 0, "failed": 0, "invalid": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pending = set()
+    tasks = iter_batch_tasks(path, stats)
+    stream = sys.stdout.buffer if output_path == '-' else open(output_path, 'wb')
+    output = LineWriter(stream)
+    from scripts.metrics_exporter import start_metrics_exporter
+    exporter = await start_metrics_exporter()
+    started = time.monotonic()
+    
+    try:
+        while True:
+            await semaphore.acquire()
+            # 在线程中读取下一行，避免等待stdin时阻塞正在处理的任务
+            task = await loop.run_in_executor(None, next, tasks, None)
+            if task is None:
+                semaphore.release()
+                break
+            stats['submitted'] += 1
+            job = asyncio.create_task(run_batch_task(task, output, stats, semaphore))
+            pending.add(job)
+            job.add_done_callback(pending.discard)
+        
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+    finally:
+        if stream is not sys.stdout.buffer:
+            stream.close()
+        await close_linkedin_index()
+        await close_search_api()
+        shutdown_parse_executor()
+        if exporter:
+            await exporter.stop()
+    
+    elapsed = time.monotonic() - started
+    done = stats['succeeded'] + stats['failed']
+    stats['elapsed_seconds'] = round(elapsed, 3)
+    stats['tasks_per_second'] = round(done / elapsed, 3) if elapsed > 0 else 0.0
+    return stats
+
 async def main():
     """主函数 - 根据命令行参数处理请求"""
+    global result_writer
+    
     # 解析命令行参数
     args = parse_arguments()
+    if args.result_fd is not None:
+        result_writer = FrameWriter(args.result_fd, args.compress_threshold)
     
-    # 根据类型处理
-    if args.type == 'person':
-        # 处理个人类型
-        result = await process_person(args)
-        print(json.dumps(result, ensure_ascii=False))
+    if args.worker:
+        await run_worker(args.concurrency)
+        return
     
-    elif args.type == 'company':
-        # 处理公司类型
-        result = await process_company(args)
-        print(json.dumps(result, ensure_ascii=False))
+    if args.batch is not None:
+        stats = await run_batch(args.batch, args.output, args.concurrency)
+        # 汇总信息写到stderr，stdout只包含结果JSONL
+        print(f"batch finished: {stats['submitted']} submitted, {stats['succeeded']} succeeded, "
+              f"{stats['failed']} failed, {stats['invalid']} invalid lines, "
+              f"{stats['elapsed_seconds']}s, {stats['tasks_per_second']} tasks/s", file=sys.stderr)
+        print(f"scrape tiers: {json.dumps(get_tier_stats(), ensure_ascii=False)}", file=sys.stderr)
+        print(f"upstreams: {json.dumps(get_resilience_stats(), ensure_ascii=False)}", file=sys.stderr)
+        return
     
-    else:
-        print(json.dumps({"sources": {"google": [], "linkedin": []}}, ensure_ascii=False))
+    # 单任务模式只解析几个页面，启动解析进程池得不偿失
+    configure_parse_executor(INLINE)
+    
+    # 启动耗时：从导入本模块到开始处理任务
+    startup = time.perf_counter() - STARTED
+    record_stage('startup', startup)
+    if args.stream:
+        events.set_event_emitter(write_result)
+    try:
+        result = await process_task(args)
+    finally:
+        # 进程即将退出，不等待索引的后台刷新
+        await close_linkedin_index(wait=False)
+        await close_search_api()
+    if "timing" in result:
+        result["timing"]["startup"] = round(startup * 1000, 1)
+    if args.stream:
+        result = {"event": events.DONE, **result}
+    write_result(result)
 
 if __name__ == "__main__":
     # 运行异步主函数
@@ -1,7 +1,143 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
 import os
-from datetime import datetime
+import threading
+import time
+
+# 默认配置，可以在 config.toml 的 [scraper_log] 中覆盖
+DEFAULT_LOG_FILE = 'logs/scraper.log'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 5
+DEFAULT_QUEUE_SIZE = 10000
+# 每个调用位置（logger名 + 行号）的INFO日志限速：每秒20条，最多累积50条
+DEFAULT_INFO_RATE = 20.0
+DEFAULT_INFO_BURST = 50
+
+class SamplingFilter(logging.Filter):
+    """
+    INFO及以下级别日志的采样和限速，WARNING及以上总是保留
+
+    - 按logger名采样：sample_rates 中配置的比例随机保留
+    - 按调用位置（logger名 + 行号）限速：令牌桶，被丢弃的条数附加在下一条保留的日志后面
+    """
+
+    def __init__(self, rate: float = DEFAULT_INFO_RATE, burst: float = DEFAULT_INFO_BURST,
+                 sample_rate: float = 1.0, sample_rates=None):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.sample_rate = sample_rate
+        self.sample_rates = sample_rates or {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno > logging.INFO:
+            return True
+
+        sample_rate = self.sample_rates.get(record.name, self.sample_rate)
+        if sample_rate < 1 and random.random() >= sample_rate:
+            return False
+        if self.rate <= 0:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+
+        if suppressed:
+            record.msg = f"{record.msg} (suppressed {suppressed} similar messages)"
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """队列满时丢弃日志而不是阻塞调用方，丢弃的条数在队列恢复后以一条WARNING记录"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            if self.dropped:
+                notice = logging.LogRecord(record.name, logging.WARNING, record.pathname, record.lineno,
+                                           f"Dropped {self.dropped} log records, log queue was full", None, None)
+                self.queue.put_nowait(self.prepare(notice))
+                self.dropped = 0
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# 所有logger共享一个队列handler，后台线程负责格式化后的写盘和按大小轮转
+_queue_handler = None
+_listener = None
+_level = logging.INFO
+_setup_lock = threading.RLock()
+
+def _setup_logging():
+    """
+    首次写日志时创建共享的队列handler和后台写线程
+
+    先创建队列handler再读取配置：读取配置本身也会写日志，这些日志先进入队列，
+    写线程启动后一起写入文件
+    """
+    global _queue_handler, _listener, _level
+    with _setup_lock:
+        if _queue_handler is not None:
+            return _queue_handler
+
+        sampling_filter = SamplingFilter()
+        _queue_handler = NonBlockingQueueHandler(queue.Queue(DEFAULT_QUEUE_SIZE))
+        _queue_handler.addFilter(sampling_filter)
+
+        from .settings import PROJECT_ROOT, get_section
+        config = get_section('scraper_log')
+        _level = logging.getLevelName(str(config.get('level', 'info')).upper())
+        if not isinstance(_level, int):
+            _level = logging.INFO
+        # 队列已经在使用中，只调整容量（Queue每次put时读取maxsize）
+        _queue_handler.queue.maxsize = config.get('queue_size', DEFAULT_QUEUE_SIZE)
+        sampling_filter.rate = config.get('info_rate_per_second', DEFAULT_INFO_RATE)
+        sampling_filter.burst = config.get('info_burst', DEFAULT_INFO_BURST)
+        sampling_filter.sample_rate = config.get('info_sample_rate', 1.0)
+        sampling_filter.sample_rates = config.get('sampling', {})
+
+        log_file = config.get('file', DEFAULT_LOG_FILE)
+        if not os.path.isabs(log_file):
+            log_file = os.path.join(PROJECT_ROOT, log_file)
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
+        # 创建formatter - 显示文件名
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+        file_handler = logging.handlers.RotatingFileHandler(
+            log_file,
+            maxBytes=config.get('max_bytes', DEFAULT_MAX_BYTES),
+            backupCount=config.get('backup_count', DEFAULT_BACKUP_COUNT),
+            encoding='utf-8',
+        )
+        file_handler.setFormatter(formatter)
+
+        _listener = logging.handlers.QueueListener(_queue_handler.queue, file_handler)
+        _listener.start()
+        # 进程退出前写完队列中剩余的日志
+        atexit.register(_listener.stop)
+        return _queue_handler
 
 class CustomLogger:
     def __init__(self, name=None):
@@ -11,57 +147,60 @@ class CustomLogger:
             frame = sys._getframe(2)  # 跳过两层调用栈
             filename = frame.f_code.co_filename
             name = os.path.splitext(os.path.basename(filename))[0]
-        
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.INFO)
-        
+
+        self.name = name
+        self._logger = None
+
+    @property
+    def logger(self):
+        """首次写日志时才创建logger和队列handler，导入模块时不产生文件I/O"""
+        if self._logger is None:
+            self._logger = self._build_logger()
+        return self._logger
+
+    def _build_logger(self):
+        logger = logging.getLogger(self.name)
+        handler = _setup_logging()
+        logger.setLevel(_level)
+
         # 避免重复添加handler
-        if not self.logger.handlers:
-            # 创建formatter - 显示文件名
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                datefmt='%Y-%m-%d %H:%M:%S'
-            )
-            
-            # 只保留文件handler，移除控制台handler
-            # 这样日志只会写入文件，不会输出到控制台
-            
-            # 文件handler - 现在日志文件放在项目根目录的 logs 文件夹
-            current_dir = os.path.dirname(__file__)
-            project_root = os.path.dirname(current_dir)  # 项目根目录
-            log_dir = os.path.join(project_root, 'logs')
-            os.makedirs(log_dir, exist_ok=True)
-            log_file = os.path.join(log_dir, 'scraper.log')
-            
-            file_handler = logging.FileHandler(log_file, encoding='utf-8')
-            file_handler.setLevel(logging.INFO)
-            file_handler.setFormatter(formatter)
-            
-            # 只添加文件handler，不添加控制台handler
-            self.logger.addHandler(file_handler)
-    
+        if handler not in logger.handlers:
+            # 日志只进入队列，由后台线程写入文件，不输出到控制台
+            logger.addHandler(handler)
+            logger.propagate = False
+
+        return logger
+
+    # stacklevel=2 让日志中的行号指向调用方，限速按调用位置区分消息类型
     def debug(self, message):
-        self.logger.debug(message)
-    
+        self.logger.debug(message, stacklevel=2)
+
     def info(self, message):
-        self.logger.info(message)
-    
+        self.logger.info(message, stacklevel=2)
+
     def warning(self, message):
-        self.logger.warning(message)
-    
+        self.logger.warning(message, stacklevel=2)
+
     def error(self, message, exc_info=False):
-        self.logger.error(message, exc_info=exc_info)
-    
+        self.logger.error(message, exc_info=exc_info, stacklevel=2)
+
     def success(self, message):
-        self.logger.info(f"✅ {message}")
-    
+        self.logger.info(f"✅ {message}", stacklevel=2)
+
     def critical(self, message):
-        self.logger.critical(message)
+        self.logger.critical(message, stacklevel=2)
+
+# 已创建的logger按名称复用
+_loggers = {}
 
 # 创建函数来获取logger，这样每个文件都能有自己的logger
 def get_logger(name=None):
-    """获取指定名称的logger，如果未指定则自动使用文件名"""
-    return CustomLogger(name)
+    """获取指定名称的logger，如果未指定则自动使用文件名（需要读取调用栈，建议显式传入name）"""
+    if name is None:
+        return CustomLogger(name)
+    if name not in _loggers:
+        _loggers[name] = CustomLogger(name)
+    return _loggers[name]
 
 # 为了向后兼容，保留全局logger（不推荐在新代码中使用）
-log = get_logger("main")
\ No newline at end of file
+log = get_logger("main")
@@ -0,0 +1,85 @@
+import asyncio
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Awaitable, Iterable, Optional, Set, Tuple
+
+# 当前任务的截止时间（Unix时间戳，秒），None 表示不限时
+# 使用 ContextVar 保存，任务内创建的子协程会自动继承，不需要逐层传参
+_deadline: ContextVar[Optional[float]] = ContextVar('task_deadline', default=None)
+
+def set_deadline(deadline: Optional[float]) -> Token:
+    """
+    设置当前任务的截止时间
+
+    Args:
+        deadline: Unix时间戳（秒），None 或 0 表示不限时
+
+    Returns:
+        可传给 reset_deadline 的token
+    """
+    return _deadline.set(deadline or None)
+
+def reset_deadline(token: Token) -> None:
+    """恢复 set_deadline 之前的截止时间"""
+    _deadline.reset(token)
+
+def get_deadline() -> Optional[float]:
+    """当前任务的截止时间，不限时返回None"""
+    return _deadline.get()
+
+def remaining() -> Optional[float]:
+    """距离截止时间的剩余秒数（不小于0），不限时返回None"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.time())
+
+def expired() -> bool:
+    """截止时间是否已过"""
+    left = remaining()
+    return left is not None and left <= 0
+
+async def run_until_deadline(awaitable: Awaitable, default: Any = None, grace: float = 0.0) -> Any:
+    """
+    在截止时间内等待一个协程，超时后取消它并返回default
+
+    Args:
+        awaitable: 要等待的协程
+        default: 超时时的返回值
+        grace: 在截止时间之后额外等待的秒数，留给内部阶段返回部分结果
+
+    Returns:
+        协程的结果，超时时为default
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, timeout=left + grace)
+    except asyncio.TimeoutError:
+        return default
+
+async def wait_until_deadline(tasks: Iterable[asyncio.Future], grace: float = 0.0) -> Tuple[Set[asyncio.Future], Set[asyncio.Future]]:
+    """
+    等待一组任务到截止时间，取消仍未完成的任务；等待本身被取消时（worker收到取消请求）同样取消这些任务
+
+    Args:
+        tasks: asyncio任务
+        grace: 在截止时间之后额外等待的秒数
+
+    Returns:
+        (已完成的任务, 被取消的任务)
+    """
+    tasks = set(tasks)
+    if not tasks:
+        return set(), set()
+    left = remaining()
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=None if left is None else left + grace)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        raise
+    for task in pending:
+        task.cancel()
+    return done, pending
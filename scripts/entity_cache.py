@@ -0,0 +1,70 @@
+import os
+import sqlite3
+from typing import Dict, Any, Optional
+from .custom_logger import get_logger
+from .linkedin_urls import canonical_linkedin_url
+from .search_cache import SearchCache, DEFAULT_MAX_ENTRIES
+
+# 为当前文件创建专用的logger
+log = get_logger('entity_cache')
+
+# 解析结果默认保鲜期：3天
+DEFAULT_FRESHNESS = 3 * 24 * 3600
+
+class EntityCache(SearchCache):
+    """
+    LinkedIn公司/个人页面解析结果的磁盘缓存
+
+    与 SearchCache 共用存储、LRU淘汰和命中统计，区别在于：
+    - 键为 实体类型 + 规范化的LinkedIn URL
+    - 只缓存非空的解析结果，解析失败的页面下次仍然重新抓取
+    """
+
+    def __init__(self, path: str, freshness: int = DEFAULT_FRESHNESS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(path, ttl=freshness, negative_ttl=0, max_entries=max_entries)
+
+    @staticmethod
+    def make_key(kind: str, url: str) -> str:
+        """根据实体类型和规范化URL构建缓存键"""
+        return f"{kind}:{canonical_linkedin_url(url)}"
+
+    def set(self, kind: str, url: str, entity: Dict[str, Any]) -> None:
+        """
+        写入解析结果，所有字段都为空的结果不缓存
+
+        Args:
+            kind: 实体类型，如 'company_overview' / 'profile'
+            url: LinkedIn页面URL
+            entity: parse_* 函数返回的解析结果
+        """
+        if not entity or not any(entity.values()):
+            return
+        self.put(self.make_key(kind, url), entity, negative=False)
+
+def build_entity_cache(cache_config: Dict[str, Any], project_root: str) -> Optional[EntityCache]:
+    """
+    根据 [scrapfly.cache] 配置创建解析结果缓存，未启用或创建失败时返回None
+
+    Args:
+        cache_config: 配置字典
+        project_root: 项目根目录，用于解析相对路径
+
+    Returns:
+        EntityCache实例或None
+    """
+    if not cache_config.get('enabled', False):
+        return None
+
+    path = cache_config.get('path', 'cache/linkedin_entities.sqlite3')
+    if not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+
+    try:
+        return EntityCache(
+            path,
+            freshness=cache_config.get('freshness', DEFAULT_FRESHNESS),
+            max_entries=cache_config.get('max_entries', DEFAULT_MAX_ENTRIES),
+        )
+    except sqlite3.Error as e:
+        log.error(f"Failed to open entity cache at {path}: {e}")
+        return None
@@ -0,0 +1,60 @@
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional
+
+# 当前任务的流式事件输出函数，None 表示不输出事件（只输出最终结果）
+# 与截止时间一样使用 ContextVar 保存，任务内创建的子协程会自动继承
+_emitter: ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = ContextVar('task_events', default=None)
+
+# 事件类型
+GOOGLE = 'google'      # Google通用搜索完成：{"event": "google", "items": [...]}
+LINKEDIN = 'linkedin'  # 一个LinkedIn实体解析完成：{"event": "linkedin", "index": URL排名, "item": {...}}
+DONE = 'done'          # 任务完成，带完整结果：{"event": "done", "sources": {...}, ...}
+
+def set_event_emitter(emit: Optional[Callable[[Dict[str, Any]], None]]) -> Token:
+    """
+    设置当前任务的事件输出函数
+
+    Args:
+        emit: 接收事件字典的函数，None 表示不输出事件
+
+    Returns:
+        可传给 reset_event_emitter 的token
+    """
+    return _emitter.set(emit)
+
+def reset_event_emitter(token: Token) -> None:
+    """恢复 set_event_emitter 之前的事件输出函数"""
+    _emitter.reset(token)
+
+def emit_event(event: str, **fields) -> None:
+    """输出一个事件，当前任务未开启流式输出时什么都不做"""
+    emit = _emitter.get()
+    if emit is not None:
+        emit({"event": event, **fields})
+
+class SourceCollector:
+    """
+    根据事件逐步组装当前已有的sources（与Go侧 resultAssembler 相同），
+    任务在截止时间被取消时用它返回已经收集到的部分结果
+    """
+
+    def __init__(self, emit: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """
+        Args:
+            emit: 收集的同时继续输出事件的函数（流式任务），None 表示只收集
+        """
+        self.emit = emit
+        self.google: List[Any] = []
+        self.linkedin: Dict[int, Dict[str, Any]] = {}
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        if event.get("event") == GOOGLE and event.get("items") is not None:
+            self.google = event["items"]
+        elif event.get("event") == LINKEDIN and event.get("item") is not None:
+            self.linkedin[event.get("index", 0)] = event["item"]
+        if self.emit is not None:
+            self.emit(event)
+
+    def sources(self) -> Dict[str, List[Any]]:
+        """当前已组装的sources，LinkedIn实体按Google结果中的排名排序，与最终结果一致"""
+        return {"google": self.google, "linkedin": [self.linkedin[index] for index in sorted(self.linkedin)]}
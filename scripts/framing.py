@@ -0,0 +1,74 @@
+import json
+import os
+import struct
+import zlib
+from functools import lru_cache
+from typing import Any, BinaryIO, Dict
+
+# 帧格式：1字节编码 + 4字节大端长度 + 负载，Go侧见 internal/processor/framing.go
+FRAME_HEADER = struct.Struct('>BI')
+CODEC_JSON = 0        # 负载为UTF-8 JSON
+CODEC_JSON_ZLIB = 1   # 负载为zlib压缩后的UTF-8 JSON
+
+# 负载超过该字节数时压缩，0表示不压缩
+DEFAULT_COMPRESS_THRESHOLD = 64 * 1024
+# 单帧最大字节数，与Go侧的限制一致
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """第一次序列化时导入orjson（导入需要数毫秒，不计入启动开销），没有安装时返回None"""
+    try:
+        import orjson
+    except ImportError:  # orjson 是可选依赖，没有安装时使用标准库json
+        return None
+    return orjson
+
+def dumps(payload: Dict[str, Any]) -> bytes:
+    """序列化为紧凑的UTF-8 JSON，优先使用orjson"""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def encode_frame(data: bytes, compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD) -> bytes:
+    """
+    把一条JSON结果编码为一帧
+
+    Args:
+        data: dumps() 的输出
+        compress_threshold: 超过该字节数时使用zlib压缩，0表示不压缩
+
+    Returns:
+        帧头 + 负载
+    """
+    codec = CODEC_JSON
+    if compress_threshold and len(data) > compress_threshold:
+        data = zlib.compress(data, 1)
+        codec = CODEC_JSON_ZLIB
+    if len(data) > MAX_FRAME_SIZE:
+        raise ValueError(f"result frame of {len(data)} bytes exceeds {MAX_FRAME_SIZE}")
+    return FRAME_HEADER.pack(codec, len(data)) + data
+
+class LineWriter:
+    """每条结果写一行JSON（stdout / 批量结果文件）"""
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+
+    def write(self, data: bytes) -> None:
+        self.stream.write(data + b"\n")
+        self.stream.flush()
+
+class FrameWriter:
+    """每条结果写一帧到专用的文件描述符，stdout上的其他输出不会混入结果"""
+
+    def __init__(self, fd: int, compress_threshold: int = DEFAULT_COMPRESS_THRESHOLD):
+        self.fd = fd
+        self.compress_threshold = compress_threshold
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(encode_frame(data, self.compress_threshold))
+        while view:
+            written = os.write(self.fd, view)
+            view = view[written:]
@@ -1,48 +1,82 @@
 import os
-import requests
-import toml
-from typing import Dict, Any, Optional, List
+import asyncio
+import json
+from typing import Dict, Any, Optional, List, Callable, Tuple, TYPE_CHECKING
 import urllib.parse
 from .custom_logger import get_logger
+from .key_pool import KeyPool, NoApiKeyAvailable, build_key_pool, parse_api_keys
+from .metrics import count_cache_lookup, count_upstream_response, timed
+from .resilience import CircuitOpen, RETRY, get_upstream
+from .settings import PROJECT_ROOT, get_section
+
+if TYPE_CHECKING:
+    import aiohttp
+    from .search_cache import SearchCache
 
 # 为当前文件创建专用的logger
-log = get_logger()
+log = get_logger('google_search')
+
+# 默认超时（秒）：连接超时短一些，读超时覆盖Google CSE偶发的慢响应
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 15
+# 连接池中保留的最大连接数
+DEFAULT_POOL_SIZE = 20
+# Google CSE 响应体中表示当日配额耗尽的标记
+QUOTA_EXHAUSTED_MARKERS = ('dailyLimitExceeded', 'quotaExceeded', 'per day')
+# 值得重试的HTTP状态码（429由key池换key处理）
+RETRYABLE_STATUS = (408, 500, 502, 503, 504)
+
+def classify_google_error(error: Exception) -> Optional[str]:
+    """
+    Google CSE 请求错误分类，供重试/熔断层使用
+    
+    Returns:
+        RETRY 表示超时、连接错误或5xx等暂时性故障；None 表示参数错误、key配额等非上游故障
+    """
+    import aiohttp
+    
+    if isinstance(error, aiohttp.ClientResponseError):
+        return RETRY if error.status in RETRYABLE_STATUS else None
+    if isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError)):
+        return RETRY
+    return None
 
 class GoogleSearchAPI:
     def __init__(self):
         self.api_key = None
         self.search_engine_id = None
         self.base_url = "https://www.googleapis.com/customsearch/v1"
+        self.connect_timeout = DEFAULT_CONNECT_TIMEOUT
+        self.read_timeout = DEFAULT_READ_TIMEOUT
+        self.pool_size = DEFAULT_POOL_SIZE
+        self._session: Optional['aiohttp.ClientSession'] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.cache: Optional['SearchCache'] = None
+        self.key_pool: Optional[KeyPool] = None
         self._load_config()
     
     def _load_config(self) -> None:
         """从环境变量或配置文件加载配置"""
         # 首先尝试从环境变量获取
-        self.api_key = os.getenv('GOOGLE_SEARCH_API_KEY')
         self.search_engine_id = os.getenv('GOOGLE_SEARCH_ENGINE_ID')
         
-        # 如果环境变量不存在，尝试从TOML配置文件读取
-        if not self.api_key or not self.search_engine_id:
-            try:
-                # 从项目根目录的 configs 文件夹查找 config.toml
-                current_dir = os.path.dirname(__file__)
-                project_root = os.path.dirname(current_dir)  # scripts 的父目录（项目根目录）
-                config_path = os.path.join(project_root, 'configs', 'config.toml')
-                
-                log.debug(f"Looking for config at: {config_path}")
-                
-                if os.path.exists(config_path):
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config = toml.load(f)
-                    
-                    google_config = config.get('google_search', {})
-                    self.api_key = self.api_key or google_config.get('api_key')
-                    self.search_engine_id = self.search_engine_id or google_config.get('search_engine_id')
-                    log.debug(f"Loaded config: API Key exists: {bool(self.api_key)}, Search Engine ID exists: {bool(self.search_engine_id)}")
-                else:
-                    log.warning(f"Config file not found at: {config_path}")
-            except Exception as e:
-                log.error(f"Failed to load config from TOML file: {e}")
+        # 从共享配置读取超时等设置，环境变量不存在时也从中读取密钥
+        # GOOGLE_SEARCH_API_KEY 可以是逗号分隔的多个key，配置中可以使用 api_keys 列表
+        google_config = get_section('google_search')
+        api_keys = parse_api_keys('GOOGLE_SEARCH_API_KEY', google_config)
+        self.api_key = api_keys[0] if api_keys else None
+        self.search_engine_id = self.search_engine_id or google_config.get('search_engine_id')
+        self.connect_timeout = google_config.get('connect_timeout', self.connect_timeout)
+        self.read_timeout = google_config.get('read_timeout', self.read_timeout)
+        self.pool_size = google_config.get('pool_size', self.pool_size)
+        # 压测时指向本地替身服务，见 benchmarks/upstream_stub.py
+        self.base_url = os.getenv('GOOGLE_SEARCH_BASE_URL') or google_config.get('base_url', self.base_url)
+        
+        cache_config = google_config.get('cache', {})
+        if cache_config.get('enabled', False):
+            from .search_cache import build_search_cache
+            self.cache = build_search_cache(cache_config, PROJECT_ROOT)
+        log.debug(f"Loaded config: {len(api_keys)} API keys, Search Engine ID exists: {bool(self.search_engine_id)}")
         
         # 验证配置是否完整
         if not self.api_key:
@@ -50,10 +84,76 @@ class GoogleSearchAPI:
         
         if not self.search_engine_id:
             raise ValueError("Google Search Engine ID not found. Please set GOOGLE_SEARCH_ENGINE_ID environment variable or add it to config.toml")
+        
+        self.key_pool = build_key_pool('Google', api_keys, google_config, PROJECT_ROOT)
     
-    def search_linkedin(self, query: str, search_type: str = 'company') -> Dict[str, Any]:
+    def _get_session(self) -> 'aiohttp.ClientSession':
+        """
+        获取当前事件循环上的共享HTTP会话（连接池 + keep-alive）
+        
+        aiohttp的会话绑定在创建它的事件循环上，事件循环变化时重新创建
+        """
+        import aiohttp
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60, ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=self.read_timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session_loop = loop
+        return self._session
+    
+    async def close(self) -> None:
+        """关闭共享HTTP会话"""
+        if self._session is not None and not self._session.closed and self._session_loop is asyncio.get_running_loop():
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+    
+    def _run_sync(self, coro_factory, *args):
+        """在新的事件循环上执行异步方法，供同步接口使用；执行完毕后关闭该循环上的会话"""
+        async def runner():
+            try:
+                return await coro_factory(*args)
+            finally:
+                await self.close()
+        return asyncio.run(runner())
+    
+    async def _get_json(self, build_request: Callable[[str], Tuple[str, Optional[Dict[str, str]]]]) -> Dict[str, Any]:
+        """
+        使用key池中余量最多的key发起请求
+        
+        被限流(429)或配额耗尽的key会被冷却，然后换下一个key重试，最多尝试key的个数次
+        
+        Args:
+            build_request: 根据key构建 (url, params) 的函数
+            
+        Returns:
+            响应JSON
         """
-        搜索LinkedIn上的信息
+        for _ in range(len(self.key_pool)):
+            key = await self.key_pool.acquire()
+            url, params = build_request(key.value)
+            async with self._get_session().get(url, params=params) as response:
+                raw = await response.read()
+                count_upstream_response('google', response.status, len(raw))
+                if response.status in (403, 429):
+                    body = raw.decode('utf-8', errors='replace')
+                    if any(marker in body for marker in QUOTA_EXHAUSTED_MARKERS):
+                        self.key_pool.report_quota_exhausted(key)
+                        continue
+                    if response.status == 429:
+                        retry_after = response.headers.get('Retry-After')
+                        self.key_pool.report_rate_limited(key, float(retry_after) if retry_after and retry_after.isdigit() else None)
+                        continue
+                response.raise_for_status()
+            result = json.loads(raw)
+            self.key_pool.report_success(key)
+            return result
+        raise NoApiKeyAvailable("all Google API keys are rate limited or out of quota")
+    
+    async def async_search_linkedin(self, query: str, search_type: str = 'company') -> Dict[str, Any]:
+        """
+        异步搜索LinkedIn上的信息
         
         Args:
             query: 搜索查询
@@ -62,6 +162,8 @@ class GoogleSearchAPI:
         Returns:
             Google Custom Search API的响应结果
         """
+        import aiohttp
+        
         # 根据类型构建查询字符串
         if search_type == 'company':
             search_query = f"{query} site:linkedin.com/company"
@@ -71,25 +173,49 @@ class GoogleSearchAPI:
             search_query = f"{query} site:linkedin.com"
         
         # 构建请求参数
-        params = {
-            'key': self.api_key,
-            'cx': self.search_engine_id,
-            'q': search_query
-        }
+        def build_request(api_key: str) -> Tuple[str, Dict[str, str]]:
+            params = {
+                'key': api_key,
+                'cx': self.search_engine_id,
+                'q': search_query
+            }
+            return self.base_url, params
         
-        try:
-            log.info(f"Searching for {search_type}: {query}")
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            log.success(f"Successfully searched for {search_type}: {query}")
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            log.error(f"Error making request to Google Search API for {query}: {e}")
-            raise
+        with timed('search_linkedin'):
+            cached = await self.cache.async_get(search_type, query) if self.cache else None
+            if self.cache:
+                count_cache_lookup('google_search', cached is not None)
+            if cached is not None:
+                log.info(f"Search cache hit for {search_type}: {query}")
+                return cached
+            
+            try:
+                log.info(f"Searching for {search_type}: {query}")
+                result = await get_upstream('google', classify_google_error).call(lambda: self._get_json(build_request))
+                log.success(f"Successfully searched for {search_type}: {query}")
+                if self.cache:
+                    await self.cache.async_set(search_type, query, result)
+                return result
+            except (aiohttp.ClientError, asyncio.TimeoutError, NoApiKeyAvailable, CircuitOpen) as e:
+                log.error(f"Error making request to Google Search API for {query}: {e!r}")
+                raise
     
-    def search_general(self, query: str) -> List[Dict[str, Any]]:
+    def search_linkedin(self, query: str, search_type: str = 'company') -> Dict[str, Any]:
+        """
+        搜索LinkedIn上的信息（同步接口，见 async_search_linkedin）
+        
+        Args:
+            query: 搜索查询
+            search_type: 搜索类型，'company' 或 'person'
+            
+        Returns:
+            Google Custom Search API的响应结果
+        """
+        return self._run_sync(self.async_search_linkedin, query, search_type)
+    
+    async def async_search_general(self, query: str) -> List[Dict[str, Any]]:
         """
-        执行一般Google搜索，不限制LinkedIn站点
+        异步执行一般Google搜索，不限制LinkedIn站点
         
         Args:
             query: 搜索查询字符串
@@ -97,6 +223,8 @@ class GoogleSearchAPI:
         Returns:
             搜索结果列表（最多3个结果）
         """
+        import aiohttp
+        
         try:
             log.info(f"Searching general Google: {query}")
             # 输出原始查询字符串
@@ -104,15 +232,23 @@ class GoogleSearchAPI:
             
             # 直接构建非编码的URL（只编码key和cx，不编码q参数）
             non_encoded_query = query  # 不对q参数进行编码
-            search_url = f"{self.base_url}?key={self.api_key}&cx={self.search_engine_id}&q={non_encoded_query}"
+            def build_request(api_key: str) -> Tuple[str, None]:
+                return f"{self.base_url}?key={api_key}&cx={self.search_engine_id}&q={non_encoded_query}", None
             
-            # 输出调试URL
-            log.info(f"General search URL: {search_url}")
+            # 输出调试URL（不包含API key）
+            log.debug(f"General search URL: {build_request('<redacted>')[0]}")
             
-            # 直接请求完整URL
-            response = requests.get(search_url)
-            response.raise_for_status()
-            result = response.json()
+            with timed('search_general'):
+                result = await self.cache.async_get('general', query) if self.cache else None
+                if self.cache:
+                    count_cache_lookup('google_search', result is not None)
+                if result is not None:
+                    log.info(f"Search cache hit for general search: {query}")
+                else:
+                    # 直接请求完整URL
+                    result = await get_upstream('google', classify_google_error).call(lambda: self._get_json(build_request))
+                    if self.cache:
+                        await self.cache.async_set('general', query, result)
             
             # 检查是否有items字段且不为空
             if 'items' in result and result['items']:
@@ -124,10 +260,22 @@ class GoogleSearchAPI:
                 log.warning(f"No general search results found for '{query}'")
                 return []
                 
-        except requests.exceptions.RequestException as e:
-            log.error(f"Error making request to Google Search API for general search '{query}': {e}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, NoApiKeyAvailable, CircuitOpen) as e:
+            log.error(f"Error making request to Google Search API for general search '{query}': {e!r}")
             return []
     
+    def search_general(self, query: str) -> List[Dict[str, Any]]:
+        """
+        执行一般Google搜索，不限制LinkedIn站点（同步接口，见 async_search_general）
+        
+        Args:
+            query: 搜索查询字符串
+            
+        Returns:
+            搜索结果列表（最多3个结果）
+        """
+        return self._run_sync(self.async_search_general, query)
+    
     def get_general_search_url(self, query: str) -> str:
         """
         获取一般Google搜索的URL（用于调试）
@@ -171,7 +319,20 @@ class GoogleSearchAPI:
     
     def search_linkedin_get_top3(self, query: str, search_type: str = 'company') -> List[Dict[str, Any]]:
         """
-        搜索LinkedIn上的信息，并返回前3个结果
+        搜索LinkedIn上的信息，并返回前3个结果（同步接口，见 async_search_linkedin_get_top3）
+        
+        Args:
+            query: 搜索查询
+            search_type: 搜索类型，'company' 或 'person'
+            
+        Returns:
+            前3个搜索结果的列表，如果没有结果则返回空列表
+        """
+        return self._run_sync(self.async_search_linkedin_get_top3, query, search_type)
+    
+    async def async_search_linkedin_get_top3(self, query: str, search_type: str = 'company') -> List[Dict[str, Any]]:
+        """
+        异步搜索LinkedIn上的信息，并返回前3个结果
         
         Args:
             query: 搜索查询
@@ -181,7 +342,7 @@ class GoogleSearchAPI:
             前3个搜索结果的列表，如果没有结果则返回空列表
         """
         try:
-            result = self.search_linkedin(query, search_type)
+            result = await self.async_search_linkedin(query, search_type)
             
             # 检查是否有items字段且不为空
             if 'items' in result and result['items']:
@@ -269,8 +430,26 @@ class GoogleSearchAPI:
         
         return f"{self.base_url}?key={self.api_key}&cx={self.search_engine_id}&q={encoded_query}"
 
-# 创建全局实例
-search_api = GoogleSearchAPI()
+# 全局实例，首次使用时才创建（读取配置、打开缓存）
+_search_api: Optional[GoogleSearchAPI] = None
+
+def get_search_api() -> GoogleSearchAPI:
+    """
+    获取全局 GoogleSearchAPI 实例，首次调用时创建
+    
+    Returns:
+        进程内共享的 GoogleSearchAPI 实例
+    """
+    global _search_api
+    if _search_api is None:
+        _search_api = GoogleSearchAPI()
+    return _search_api
+
+def __getattr__(name: str):
+    """兼容旧代码中的 google_search.search_api 访问方式"""
+    if name == 'search_api':
+        return get_search_api()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def search_company_on_linkedin(company_name: str) -> Dict[str, Any]:
     """
@@ -282,7 +461,7 @@ def search_company_on_linkedin(company_name: str) -> Dict[str, Any]:
     Returns:
         Google Custom Search API的响应结果
     """
-    return search_api.search_company_linkedin(company_name)
+    return get_search_api().search_company_linkedin(company_name)
 
 def search_person_on_linkedin(person_name: str) -> Dict[str, Any]:
     """
@@ -294,7 +473,7 @@ def search_person_on_linkedin(person_name: str) -> Dict[str, Any]:
     Returns:
         Google Custom Search API的响应结果
     """
-    return search_api.search_person_linkedin(person_name)
+    return get_search_api().search_person_linkedin(person_name)
 
 def search_company_on_linkedin_get_link(company_name: str) -> Optional[str]:
     """
@@ -306,7 +485,7 @@ def search_company_on_linkedin_get_link(company_name: str) -> Optional[str]:
     Returns:
         第一个搜索结果的链接，如果没有结果则返回None
     """
-    return search_api.search_company_linkedin_get_link(company_name)
+    return get_search_api().search_company_linkedin_get_link(company_name)
 
 def search_company_on_linkedin_get_top3(company_name: str) -> List[Dict[str, Any]]:
     """
@@ -318,7 +497,7 @@ def search_company_on_linkedin_get_top3(company_name: str) -> List[Dict[str, Any
     Returns:
         前3个搜索结果的列表
     """
-    return search_api.search_company_linkedin_get_top3(company_name)
+    return get_search_api().search_company_linkedin_get_top3(company_name)
 
 def search_person_on_linkedin_get_top3(person_name: str) -> List[Dict[str, Any]]:
     """
@@ -330,7 +509,67 @@ def search_person_on_linkedin_get_top3(person_name: str) -> List[Dict[str, Any]]
     Returns:
         前3个搜索结果的列表
     """
-    return search_api.search_person_linkedin_get_top3(person_name)
+    return get_search_api().search_person_linkedin_get_top3(person_name)
+
+async def async_search_company_on_linkedin_get_top3(company_name: str) -> List[Dict[str, Any]]:
+    """
+    异步搜索公司在LinkedIn上的信息，并返回前3个结果
+    
+    Args:
+        company_name: 公司名称，如 "nokia", "microsoft"等
+        
+    Returns:
+        前3个搜索结果的列表
+    """
+    return await get_search_api().async_search_linkedin_get_top3(company_name, 'company')
+
+async def async_search_person_on_linkedin_get_top3(person_name: str) -> List[Dict[str, Any]]:
+    """
+    异步搜索个人在LinkedIn上的信息，并返回前3个结果
+    
+    Args:
+        person_name: 个人名称，如 "John Doe"
+        
+    Returns:
+        前3个搜索结果的列表
+    """
+    return await get_search_api().async_search_linkedin_get_top3(person_name, 'person')
+
+async def async_search_general_google(query: str) -> List[Dict[str, Any]]:
+    """
+    异步执行一般Google搜索，不限制LinkedIn站点
+    
+    Args:
+        query: 搜索查询字符串，如 "biogenex+site:biogenex.com/" 
+        
+    Returns:
+        搜索结果列表，如果没有结果则返回空列表
+    """
+    return await get_search_api().async_search_general(query)
+
+async def close_search_api() -> None:
+    """关闭全局实例在当前事件循环上的HTTP会话，实例尚未创建时不做任何事"""
+    if _search_api is not None:
+        await _search_api.close()
+
+def get_search_cache_stats() -> Optional[Dict[str, Any]]:
+    """
+    获取Google搜索缓存的命中/未命中统计
+    
+    Returns:
+        统计字典，未启用缓存时返回None
+    """
+    cache = get_search_api().cache
+    return cache.stats() if cache else None
+
+def get_key_pool_stats() -> List[Dict[str, Any]]:
+    """
+    获取每个Google API key的用量、令牌和冷却状态
+    
+    Returns:
+        每个key一项的统计列表
+    """
+    return get_search_api().key_pool.stats()
 
 def search_general_google(query: str) -> List[Dict[str, Any]]:
     """
@@ -342,7 +581,7 @@ def search_general_google(query: str) -> List[Dict[str, Any]]:
     Returns:
         搜索结果列表，如果没有结果则返回空列表
     """
-    return search_api.search_general(query)
+    return get_search_api().search_general(query)
 
 def get_search_url(query: str, search_type: str = 'company') -> str:
     """
@@ -355,4 +594,4 @@ def get_search_url(query: str, search_type: str = 'company') -> str:
     Returns:
         完整的搜索URL字符串
     """
-    return search_api.get_search_url(query, search_type)
+    return get_search_api().get_search_url(query, search_type)
@@ -0,0 +1,420 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime, timedelta, timezone, tzinfo
+from functools import lru_cache
+from typing import Dict, Any, Callable, List, Optional, Tuple, TypeVar
+from .custom_logger import get_logger
+
+# 为当前文件创建专用的logger
+log = get_logger('key_pool')
+
+# 默认限速：每个key每秒1个请求，最多累积5个
+DEFAULT_RATE_PER_SECOND = 1.0
+DEFAULT_BURST = 5
+# 默认冷却：首次被限流冷却30秒，连续限流时指数增长，最长1小时
+DEFAULT_COOLDOWN = 30
+DEFAULT_MAX_COOLDOWN = 3600
+# 没有可用token时最多等待的时间（秒）
+DEFAULT_MAX_WAIT = 30
+# 每日配额按该时区的零点重置（Google CSE 按太平洋时间重置）
+DEFAULT_QUOTA_TIMEZONE = 'America/Los_Angeles'
+# 毫秒，多进程并发更新用量时等待锁的时间
+USAGE_BUSY_TIMEOUT = 5000
+
+T = TypeVar('T')
+
+_USAGE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS key_usage (
+    pool           TEXT NOT NULL,
+    key_id         TEXT NOT NULL,
+    tokens         REAL NOT NULL,
+    updated        REAL NOT NULL,
+    day            TEXT NOT NULL,
+    used           INTEGER NOT NULL,
+    cooldown_until REAL NOT NULL,
+    PRIMARY KEY (pool, key_id)
+);
+"""
+
+class NoApiKeyAvailable(Exception):
+    """所有key都处于冷却中或当日配额已用完"""
+
+class TokenBucket:
+    """令牌桶：以固定速率补充令牌，最多累积 burst 个，时间为Unix时间戳（多进程共享时使用同一时钟）"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.time()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + max(0.0, now - self.updated) * self.rate)
+        self.updated = max(self.updated, now)
+
+    def available(self, now: float) -> float:
+        """当前可用的令牌数"""
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        """尝试取走一个令牌"""
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """距离下一个令牌可用还需等待的秒数"""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (1 - self.tokens) / self.rate
+
+@lru_cache(maxsize=None)
+def quota_zone(name: str) -> tzinfo:
+    """
+    配额重置使用的时区
+
+    Args:
+        name: IANA时区名，如 'America/Los_Angeles'
+
+    Returns:
+        时区；系统没有时区数据（Windows需要 pip install tzdata）时退回到固定的UTC-8
+    """
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        log.warning(f"Time zone {name} not available ({e}), quota days use UTC-8")
+        return timezone(timedelta(hours=-8))
+
+def quota_day(now: float, zone: tzinfo) -> str:
+    """配额时区中的日期，如 '2024-01-15'"""
+    return datetime.fromtimestamp(now, zone).strftime('%Y-%m-%d')
+
+def seconds_until_quota_reset(now: float, zone: tzinfo) -> float:
+    """距离配额时区下一个零点的秒数（夏令时切换当天也准确）"""
+    local = datetime.fromtimestamp(now, zone)
+    midnight = datetime.combine(local.date() + timedelta(days=1), dtime(0), tzinfo=zone)
+    return midnight.timestamp() - now
+
+class ApiKey:
+    """单个API key的限速、配额和冷却状态"""
+
+    def __init__(self, value: str, rate: float, burst: float, daily_quota: int,
+                 quota_timezone: str = DEFAULT_QUOTA_TIMEZONE):
+        self.value = value
+        self.bucket = TokenBucket(rate, burst)
+        self.daily_quota = daily_quota
+        self.zone = quota_zone(quota_timezone)
+        self.day = quota_day(time.time(), self.zone)
+        self.used_today = 0
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.counters = {"requests": 0, "rate_limited": 0, "quota_exhausted": 0}
+
+    @property
+    def label(self) -> str:
+        """日志中使用的key标识，不暴露完整key"""
+        return f"...{self.value[-4:]}" if len(self.value) > 4 else "..."
+
+    @property
+    def key_id(self) -> str:
+        """用量表中的key标识（key的哈希），不在数据库中保存完整key"""
+        import hashlib
+        return hashlib.sha256(self.value.encode('utf-8')).hexdigest()[:16]
+
+    def _roll_day(self) -> None:
+        today = quota_day(time.time(), self.zone)
+        if today != self.day:
+            self.day = today
+            self.used_today = 0
+
+    def load_usage(self, tokens: float, updated: float, day: str, used: int, cooldown_until: float) -> None:
+        """
+        合并共享用量表中的状态：令牌桶以表中为准，当日用量和冷却时间取较大值
+        （本进程在两次同步之间记录的限流和配额耗尽不会被覆盖）
+        """
+        self._roll_day()
+        self.bucket.tokens = tokens
+        self.bucket.updated = updated
+        if day == self.day:
+            self.used_today = max(self.used_today, used)
+        self.cooldown_until = max(self.cooldown_until, cooldown_until)
+
+    def usage(self) -> Tuple[float, float, str, int, float]:
+        """写入共享用量表的状态：(tokens, updated, day, used, cooldown_until)"""
+        self._roll_day()
+        return self.bucket.tokens, self.bucket.updated, self.day, self.used_today, self.cooldown_until
+
+    def remaining_quota(self) -> float:
+        """当日剩余配额，未配置配额时为无穷大"""
+        self._roll_day()
+        if self.daily_quota <= 0:
+            return float('inf')
+        return self.daily_quota - self.used_today
+
+    def usable(self, now: float) -> bool:
+        """不在冷却中且当日配额未用完"""
+        return now >= self.cooldown_until and self.remaining_quota() > 0
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        remaining = self.remaining_quota()
+        return {
+            "key": self.label,
+            "used_today": self.used_today,
+            "remaining_quota": None if remaining == float('inf') else remaining,
+            "tokens": round(self.bucket.available(now), 2),
+            "cooling_for": round(max(0.0, self.cooldown_until - now), 1),
+            **self.counters,
+        }
+
+class KeyUsageStore:
+    """
+    多进程共享的key用量表（SQLite）
+
+    每个 (池名, key哈希) 一行，保存令牌桶、当日用量和冷却截止时间；
+    KeyPool 在一个 BEGIN IMMEDIATE 事务中读取、取令牌并写回，同一节点上的所有爬虫进程共同遵守限速和每日配额
+    """
+
+    def __init__(self, path: str):
+        # 第一次创建时才导入sqlite3，不影响crawler的启动开销
+        import sqlite3
+        self.path = path
+        self._lock = threading.Lock()
+        # 单线程执行器：同一连接上的操作串行执行，不阻塞事件循环
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='key-usage')
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=USAGE_BUSY_TIMEOUT / 1000, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {USAGE_BUSY_TIMEOUT}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_USAGE_SCHEMA)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """在用量表专用的线程中执行 func(*args)"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def update(self, pool: str, keys: List[ApiKey], func: Callable[[], T]) -> T:
+        """
+        在一个事务中把共享用量合并到 keys，执行 func，再写回所有key的用量
+
+        Args:
+            pool: 池名，同一个文件可以保存多个池
+            keys: 池中的key
+            func: 读取或修改 keys 状态的函数
+
+        Returns:
+            func 的返回值；数据库出错时记录错误，func 只按本进程的状态执行
+        """
+        import sqlite3
+        with self._lock:
+            done, result = False, None
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                rows = self._conn.execute(
+                    "SELECT key_id, tokens, updated, day, used, cooldown_until FROM key_usage WHERE pool = ?",
+                    (pool,),
+                ).fetchall()
+                stored = {row[0]: row[1:] for row in rows}
+                for key in keys:
+                    if key.key_id in stored:
+                        key.load_usage(*stored[key.key_id])
+                result, done = func(), True
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO key_usage(pool, key_id, tokens, updated, day, used, cooldown_until) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(pool, key.key_id, *key.usage()) for key in keys],
+                )
+                self._conn.execute("COMMIT")
+                return result
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                log.error(f"Key usage store {self.path} failed, {pool} keys use process-local limits: {e}")
+        return result if done else func()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+# 进程内按路径共享的用量表（Google和Scrapfly可以使用同一个文件）
+_usage_stores: Dict[str, Optional[KeyUsageStore]] = {}
+
+def open_usage_store(path: str) -> Optional[KeyUsageStore]:
+    """打开（或复用）路径对应的用量表，打开失败时返回None，key池只在本进程内限速"""
+    if path not in _usage_stores:
+        import sqlite3
+        try:
+            _usage_stores[path] = KeyUsageStore(path)
+        except sqlite3.Error as e:
+            log.error(f"Failed to open key usage store at {path}, limits are enforced per process: {e}")
+            _usage_stores[path] = None
+    return _usage_stores[path]
+
+class KeyPool:
+    """
+    多个API key组成的池，每个key有独立的令牌桶和每日配额计数
+
+    acquire() 总是选择余量最多的key：优先当前有令牌的key，其次当日剩余配额最多、令牌最多的key；
+    被限流(429)或配额耗尽的key会自动冷却，冷却期间不会被选中。
+    配置了 store 时令牌桶、当日用量和冷却时间保存在共享的用量表中，每次 acquire 在一个事务中同步，
+    report_* 记录的冷却在本进程下一次 acquire 时写入；没有 store 时限速和配额只在本进程内有效
+    """
+
+    def __init__(self, name: str, keys: List[str], rate: float = DEFAULT_RATE_PER_SECOND,
+                 burst: float = DEFAULT_BURST, daily_quota: int = 0, cooldown: float = DEFAULT_COOLDOWN,
+                 max_cooldown: float = DEFAULT_MAX_COOLDOWN, max_wait: float = DEFAULT_MAX_WAIT,
+                 quota_timezone: str = DEFAULT_QUOTA_TIMEZONE, store: Optional[KeyUsageStore] = None):
+        self.name = name
+        self.keys = [ApiKey(key, rate, burst, daily_quota, quota_timezone) for key in keys]
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_wait = max_wait
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _best(self, now: float) -> Optional[ApiKey]:
+        """在可用的key中选择余量最多的一个（可能暂时没有令牌）"""
+        candidates = [key for key in self.keys if key.usable(now)]
+        if not candidates:
+            return None
+        return max(candidates, key=lambda k: (k.bucket.available(now) >= 1, k.remaining_quota(), k.bucket.available(now)))
+
+    async def acquire(self) -> ApiKey:
+        """
+        取得一个可用key并消耗一个令牌和一次配额
+
+        没有令牌时等待最早补充的令牌，所有key都在冷却时等待最早结束的冷却，
+        等待时间超过 max_wait 时抛出 NoApiKeyAvailable
+        """
+        deadline = time.time() + self.max_wait
+        while True:
+            if self.store is None:
+                key, wait = self._try_acquire()
+            else:
+                key, wait = await self.store.run(self.store.update, self.name, self.keys, self._try_acquire)
+            if key is not None:
+                return key
+
+            if time.time() + wait > deadline:
+                raise NoApiKeyAvailable(f"no {self.name} API key available: all keys are rate limited or out of quota")
+            await asyncio.sleep(max(wait, 0.01))
+
+    def _try_acquire(self) -> Tuple[Optional[ApiKey], float]:
+        """
+        尝试取走一个令牌和一次配额
+
+        Returns:
+            (取得的key, 0)，或 (None, 距离下一个令牌或冷却结束的秒数)
+        """
+        now = time.time()
+        key = self._best(now)
+        if key is not None and key.bucket.take(now):
+            key.used_today += 1
+            key.counters["requests"] += 1
+            return key, 0.0
+
+        if key is not None:
+            return None, key.bucket.wait_time(now)
+        cooling = [k.cooldown_until - now for k in self.keys if k.remaining_quota() > 0]
+        return None, min(cooling) if cooling else float('inf')
+
+    def report_success(self, key: ApiKey) -> None:
+        """请求成功，重置连续失败计数"""
+        key.consecutive_failures = 0
+
+    def report_rate_limited(self, key: ApiKey, retry_after: Optional[float] = None) -> None:
+        """key被限流(429)，按 Retry-After 或指数退避冷却"""
+        key.consecutive_failures += 1
+        key.counters["rate_limited"] += 1
+        delay = retry_after if retry_after else min(self.max_cooldown, self.cooldown * 2 ** (key.consecutive_failures - 1))
+        key.cooldown_until = time.time() + delay
+        log.warning(f"{self.name} key {key.label} rate limited, cooling down for {delay:.0f}s")
+
+    def report_quota_exhausted(self, key: ApiKey) -> None:
+        """key当日配额耗尽，冷却到配额时区的零点"""
+        key.counters["quota_exhausted"] += 1
+        if key.daily_quota > 0:
+            key.used_today = key.daily_quota
+        now = time.time()
+        key.cooldown_until = now + seconds_until_quota_reset(now, key.zone)
+        log.warning(f"{self.name} key {key.label} quota exhausted, disabled until midnight {key.zone}")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """每个key的用量和状态（共享用量为本进程最近一次同步时的值）"""
+        now = time.time()
+        return [key.stats(now) for key in self.keys]
+
+def parse_api_keys(env_name: str, section: Dict[str, Any]) -> List[str]:
+    """
+    读取API key列表：环境变量（逗号分隔）优先，其次配置中的 api_keys 列表或 api_key（字符串或列表）
+
+    Args:
+        env_name: 环境变量名，如 'GOOGLE_SEARCH_API_KEY'
+        section: 配置section
+
+    Returns:
+        去重后的key列表，保持原有顺序
+    """
+    env_value = os.getenv(env_name)
+    if env_value:
+        raw = env_value.split(',')
+    else:
+        raw = section.get('api_keys') or section.get('api_key') or []
+        if isinstance(raw, str):
+            raw = [raw]
+
+    keys = []
+    for key in raw:
+        key = str(key).strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+def build_key_pool(name: str, keys: List[str], section: Dict[str, Any], project_root: str = '') -> KeyPool:
+    """
+    根据配置section中的限速参数创建key池
+
+    Args:
+        name: 上游名称，用于日志和用量表中的池名
+        keys: API key列表
+        section: 配置section，读取 rate_per_second / burst / daily_quota / quota_timezone / cooldown / max_key_wait，
+            以及共享用量表的路径 usage_path（为空时限速和配额只在本进程内有效）
+        project_root: 项目根目录，用于解析相对路径
+    """
+    store = None
+    usage_path = section.get('usage_path')
+    if usage_path:
+        if not os.path.isabs(usage_path):
+            usage_path = os.path.join(project_root, usage_path)
+        store = open_usage_store(usage_path)
+    return KeyPool(
+        name,
+        keys,
+        rate=section.get('rate_per_second', DEFAULT_RATE_PER_SECOND),
+        burst=section.get('burst', DEFAULT_BURST),
+        daily_quota=section.get('daily_quota', 0),
+        cooldown=section.get('cooldown', DEFAULT_COOLDOWN),
+        max_cooldown=section.get('max_cooldown', DEFAULT_MAX_COOLDOWN),
+        max_wait=section.get('max_key_wait', DEFAULT_MAX_WAIT),
+        quota_timezone=section.get('quota_timezone', DEFAULT_QUOTA_TIMEZONE),
+        store=store,
+    )
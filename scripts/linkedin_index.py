@@ -0,0 +1,203 @@
+import asyncio
+import contextvars
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, TYPE_CHECKING
+from .candidate_ranking import country_code, normalize_name, task_domains
+from .custom_logger import get_logger
+from .metrics import REGISTRY
+from .settings import PROJECT_ROOT, get_section
+
+if TYPE_CHECKING:
+    from .search_cache import SearchCache
+
+# 为当前文件创建专用的logger
+log = get_logger('linkedin_index')
+
+# 条目默认保留90天，超过30天的条目命中后在后台重新验证
+DEFAULT_MAX_AGE = 90 * 24 * 3600
+DEFAULT_REFRESH_AFTER = 30 * 24 * 3600
+# 名称+国家不能唯一确定公司，同一映射被确认这么多次后才直接使用
+DEFAULT_NAME_MIN_CONFIRMATIONS = 2
+# 退出时等待后台刷新完成的最长时间（秒）
+DEFAULT_DRAIN_TIMEOUT = 10
+# 与 search_cache.DEFAULT_MAX_ENTRIES 一致，这里不导入search_cache以免导入crawler时加载sqlite3
+DEFAULT_MAX_ENTRIES = 200000
+
+class IndexHit(NamedTuple):
+    """索引命中：公司LinkedIn URL、命中的键类型（'domain' / 'name'）、是否需要刷新"""
+    url: str
+    source: str
+    stale: bool
+
+def name_query(name: str, country: str) -> str:
+    """名称+国家键：规范化分词排序后的名称，国家尽量转为ISO代码，如 "acme|US" """
+    tokens = ' '.join(sorted(normalize_name(name)))
+    if not tokens:
+        return ''
+    return f"{tokens}|{country_code(country) or (country or '').strip()}"
+
+class LinkedInIndex:
+    """
+    公司域名 / 名称+国家 -> LinkedIn公司主页的持久索引，从打分明确的成功任务中学习
+
+    条目存放在 SearchCache 中（共用存储、LRU淘汰和命中统计），区别在于：
+    - 键为 'domain:<网站或公司邮箱域名>' 和 'name:<规范化名称>|<国家>'
+    - 值为 {"url": 规范化URL, "confirmations": 被确认次数, "updated_at": 最近确认时间}
+    - 域名命中即可直接使用；名称命中需要被确认至少 name_min_confirmations 次
+    - 超过 refresh_after 的条目仍然使用，同时在后台重新搜索验证
+    """
+
+    def __init__(self, path: str, max_age: int = DEFAULT_MAX_AGE, refresh_after: int = DEFAULT_REFRESH_AFTER,
+                 name_min_confirmations: int = DEFAULT_NAME_MIN_CONFIRMATIONS, max_entries: int = DEFAULT_MAX_ENTRIES):
+        # 第一次创建索引时才导入sqlite3
+        from .search_cache import SearchCache
+        self.store: SearchCache = SearchCache(path, ttl=max_age, negative_ttl=0, max_entries=max_entries)
+        self.refresh_after = refresh_after
+        self.name_min_confirmations = name_min_confirmations
+        self._refreshing: Set[str] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+
+    def lookup(self, name: str, url: str = '', email: str = '', country: str = '') -> Optional[IndexHit]:
+        """
+        查找公司的LinkedIn主页，依次尝试网站域名、公司邮箱域名和名称+国家
+
+        Returns:
+            IndexHit，没有可信的映射时返回None
+        """
+        now = time.time()
+        for domain in task_domains(url, email):
+            entry = self.store.get('domain', domain)
+            if entry:
+                return IndexHit(entry['url'], 'domain', now - entry['updated_at'] > self.refresh_after)
+        query = name_query(name, country)
+        entry = self.store.get('name', query) if query else None
+        if entry and entry['confirmations'] >= self.name_min_confirmations:
+            return IndexHit(entry['url'], 'name', now - entry['updated_at'] > self.refresh_after)
+        return None
+
+    def learn(self, linkedin_url: str, name: str, url: str = '', email: str = '', country: str = '') -> None:
+        """
+        记录一次成功任务的映射：同一键再次指向同一URL时确认次数加1，指向其他URL时重新计数
+
+        Args:
+            linkedin_url: 抓取成功的公司主页规范化URL
+            name / url / email / country: 任务参数
+        """
+        keys = [('domain', domain) for domain in task_domains(url, email)]
+        query = name_query(name, country)
+        if query:
+            keys.append(('name', query))
+        now = time.time()
+        for kind, value in keys:
+            entry = self.store.get(kind, value)
+            confirmations = entry['confirmations'] + 1 if entry and entry['url'] == linkedin_url else 1
+            if entry and entry['url'] != linkedin_url:
+                log.info(f"LinkedIn index {kind}:{value} moved from {entry['url']} to {linkedin_url}")
+            self.store.put(self.store.make_key(kind, value),
+                           {"url": linkedin_url, "confirmations": confirmations, "updated_at": now}, negative=False)
+
+    async def async_lookup(self, *args: Any) -> Optional[IndexHit]:
+        """lookup 的异步版本，在存储专用的线程中执行，参数相同"""
+        return await self.store.run(self.lookup, *args)
+
+    async def async_learn(self, *args: Any) -> None:
+        """learn 的异步版本，在存储专用的线程中执行，参数相同"""
+        await self.store.run(self.learn, *args)
+
+    def schedule_refresh(self, key: str, refresh: Callable[[], Awaitable[None]]) -> None:
+        """
+        在后台执行一次刷新，同一键同时只刷新一次
+
+        刷新任务在空的上下文中运行，不继承当前任务的截止时间、耗时统计和流式事件输出
+
+        Args:
+            key: 去重用的键
+            refresh: 执行刷新的协程函数
+        """
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+
+        async def run() -> None:
+            try:
+                await refresh()
+            except Exception as e:
+                log.warning(f"LinkedIn index refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+
+        task = contextvars.Context().run(asyncio.ensure_future, run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def drain(self, timeout: float = DEFAULT_DRAIN_TIMEOUT) -> None:
+        """等待后台刷新完成，超过 timeout 秒的刷新被取消；timeout 为0时直接取消"""
+        tasks: List[asyncio.Task] = list(self._refresh_tasks)
+        if not tasks:
+            return
+        if timeout > 0:
+            await asyncio.wait(tasks, timeout=timeout)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+def build_linkedin_index(index_config: Dict[str, Any], project_root: str) -> Optional[LinkedInIndex]:
+    """
+    根据 [linkedin_index] 配置创建索引，未启用或创建失败时返回None
+
+    Args:
+        index_config: 配置字典
+        project_root: 项目根目录，用于解析相对路径
+
+    Returns:
+        LinkedInIndex实例或None
+    """
+    if not index_config.get('enabled', False):
+        return None
+
+    path = index_config.get('path', 'cache/linkedin_index.sqlite3')
+    if not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+
+    import sqlite3
+    try:
+        return LinkedInIndex(
+            path,
+            max_age=index_config.get('max_age', DEFAULT_MAX_AGE),
+            refresh_after=index_config.get('refresh_after', DEFAULT_REFRESH_AFTER),
+            name_min_confirmations=index_config.get('name_min_confirmations', DEFAULT_NAME_MIN_CONFIRMATIONS),
+            max_entries=index_config.get('max_entries', DEFAULT_MAX_ENTRIES),
+        )
+    except sqlite3.Error as e:
+        log.error(f"Failed to open LinkedIn index at {path}: {e}")
+        return None
+
+# 进程内共享的索引，首次使用时根据配置创建
+_linkedin_index: Optional[LinkedInIndex] = None
+_linkedin_index_loaded = False
+
+def get_linkedin_index() -> Optional[LinkedInIndex]:
+    """获取进程内共享的LinkedIn索引，未启用时返回None"""
+    global _linkedin_index, _linkedin_index_loaded
+    if not _linkedin_index_loaded:
+        _linkedin_index = build_linkedin_index(get_section('linkedin_index'), PROJECT_ROOT)
+        _linkedin_index_loaded = True
+    return _linkedin_index
+
+def count_index_lookup(hit: Optional[IndexHit]) -> None:
+    """记录一次索引查找的结果（domain / name / miss）"""
+    REGISTRY.inc('linkedin_index_lookups_total', help='LinkedIn index lookups by result',
+                 result=hit.source if hit else 'miss')
+
+async def close_linkedin_index(wait: bool = True) -> None:
+    """
+    退出前处理后台刷新：wait 为True时等待其完成（有超时），否则直接取消
+
+    Args:
+        wait: 是否等待，单任务模式下进程即将退出，不等待
+    """
+    if _linkedin_index is not None:
+        await _linkedin_index.drain(get_section('linkedin_index').get('drain_timeout', DEFAULT_DRAIN_TIMEOUT) if wait else 0)
+        # 写入存储中累积的命中统计和访问时间
+        await _linkedin_index.store.run(_linkedin_index.store.flush)
@@ -1,54 +1,144 @@
+from __future__ import annotations
+
 import json
-import jmespath
-from typing import Dict, List
-from scrapfly import ScrapeConfig, ScrapflyClient, ScrapeApiResponse
+from functools import partial
+from typing import Dict, List, Optional, Callable, TYPE_CHECKING
 import asyncio
 import os
-import toml
+import re
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from .custom_logger import get_logger
+from .deadline import remaining, wait_until_deadline
+from .key_pool import KeyPool, NoApiKeyAvailable, build_key_pool, parse_api_keys
+from .linkedin_urls import canonical_linkedin_url
+from .metrics import count_cache_lookup, count_upstream_response, record_stage, timed
+from .output_schema import FULL_SCHEMA, OutputSchema, get_output_schema
+from .parse_pool import parse_response
+from .resilience import CircuitOpen, FAIL, RETRY, get_upstream
+from .scrape_tiers import (ScrapeTierTracker, DEFAULT_NEGATIVE_TTL, DEFAULT_PROBE_INTERVAL, MISSING_STATUS_CODES,
+                           url_pattern)
+from .settings import PROJECT_ROOT, get_section
+
+# scrapfly 和 jmespath 导入较慢，只在真正抓取/解析时才导入
+if TYPE_CHECKING:
+    from scrapfly import ScrapeConfig, ScrapflyClient, ScrapeApiResponse
+    from .entity_cache import EntityCache
 
 # 为当前文件创建专用的logger
-log = get_logger()
+log = get_logger('linkedin_scraper')
+
+# 同时进行的Scrapfly请求数（所有key合计）
+DEFAULT_SCRAPE_CONCURRENCY = 5
 
 class ScrapflyConfig:
     def __init__(self):
         self.api_key = None
+        self.api_keys: List[str] = []
+        self.key_pool: Optional[KeyPool] = None
+        self.concurrency = DEFAULT_SCRAPE_CONCURRENCY
+        self.host: Optional[str] = None
+        self.tiers: Optional[ScrapeTierTracker] = None
+        self.cache: Optional[EntityCache] = None
         self._load_config()
     
     def _load_config(self) -> None:
         """从环境变量或配置文件加载配置"""
-        # 首先尝试从环境变量获取
-        self.api_key = os.getenv('SCRAPFLY_API_KEY')
+        # 从共享配置读取缓存等设置，环境变量不存在时也从中读取密钥
+        # SCRAPFLY_API_KEY 可以是逗号分隔的多个key，配置中可以使用 api_keys 列表
+        scrapfly_config = get_section('scrapfly')
+        self.api_keys = parse_api_keys('SCRAPFLY_API_KEY', scrapfly_config)
+        self.api_key = self.api_keys[0] if self.api_keys else None
+        self.concurrency = scrapfly_config.get('concurrency', DEFAULT_SCRAPE_CONCURRENCY)
+        # 压测时指向本地替身服务，见 benchmarks/upstream_stub.py；为空时使用SDK默认的API地址
+        self.host = os.getenv('SCRAPFLY_HOST') or scrapfly_config.get('host')
         
-        # 如果环境变量不存在，尝试从TOML配置文件读取
-        if not self.api_key:
-            try:
-                # 从项目根目录的 configs 文件夹查找 config.toml
-                current_dir = os.path.dirname(__file__)
-                project_root = os.path.dirname(current_dir)  # scripts 的父目录（项目根目录）
-                config_path = os.path.join(project_root, 'configs', 'config.toml')
-                
-                log.debug(f"Looking for config at: {config_path}")
-                
-                if os.path.exists(config_path):
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config = toml.load(f)
-                    
-                    scrapfly_config = config.get('scrapfly', {})
-                    self.api_key = scrapfly_config.get('api_key')
-                    log.debug(f"Loaded Scrapfly config: API Key exists: {bool(self.api_key)}")
-                else:
-                    log.warning(f"Config file not found at: {config_path}")
-            except Exception as e:
-                log.error(f"Failed to load config from TOML file: {e}")
+        tiers_config = scrapfly_config.get('tiers', {})
+        self.tiers = ScrapeTierTracker(
+            [name for name, _ in SCRAPE_TIERS],
+            enabled=tiers_config.get('enabled', True),
+            probe_interval=tiers_config.get('probe_interval', DEFAULT_PROBE_INTERVAL),
+            negative_ttl=tiers_config.get('negative_ttl', DEFAULT_NEGATIVE_TTL),
+        )
+        
+        cache_config = scrapfly_config.get('cache', {})
+        if cache_config.get('enabled', False):
+            from .entity_cache import build_entity_cache
+            self.cache = build_entity_cache(cache_config, PROJECT_ROOT)
+        log.debug(f"Loaded Scrapfly config: {len(self.api_keys)} API keys")
         
         # 验证配置是否完整
         if not self.api_key:
             raise ValueError("Scrapfly API key not found. Please set SCRAPFLY_API_KEY environment variable or add it to config.toml")
+        
+        self.key_pool = build_key_pool('Scrapfly', self.api_keys, scrapfly_config, PROJECT_ROOT)
+
+# Scrapfly配置和客户端（每个key一个），首次抓取时才创建
+_scrapfly_config: Optional[ScrapflyConfig] = None
+_scrapfly_clients: Dict[str, ScrapflyClient] = {}
+# 所有Scrapfly客户端共用的线程池：SDK的 async_scrape 在线程中执行同步请求，
+# 默认线程池只有 min(32, CPU数+4) 个线程，这里按 [scrapfly] concurrency 创建
+_scrapfly_executor: Optional[ThreadPoolExecutor] = None
+# 每个事件循环一个信号量，限制进程内所有任务合计同时进行的Scrapfly请求数
+_scrape_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = weakref.WeakKeyDictionary()
 
-# 初始化Scrapfly客户端
-scrapfly_config = ScrapflyConfig()
-SCRAPFLY = ScrapflyClient(key=scrapfly_config.api_key)
+def get_scrapfly_config() -> ScrapflyConfig:
+    """获取进程内共享的Scrapfly配置，首次调用时加载"""
+    global _scrapfly_config
+    if _scrapfly_config is None:
+        _scrapfly_config = ScrapflyConfig()
+    return _scrapfly_config
+
+def get_scrapfly_client(api_key: Optional[str] = None) -> ScrapflyClient:
+    """
+    获取进程内共享的Scrapfly客户端，首次调用时导入scrapfly并创建
+    
+    Args:
+        api_key: 使用的key，默认为第一个配置的key
+    """
+    api_key = api_key or get_scrapfly_config().api_key
+    client = _scrapfly_clients.get(api_key)
+    if client is None:
+        from scrapfly import ScrapflyClient
+        host = get_scrapfly_config().host
+        client = _scrapfly_clients[api_key] = ScrapflyClient(key=api_key, **({'host': host} if host else {}))
+        # 替换SDK自带的线程池（此时还没有创建线程），使同时执行的请求数与并发信号量一致
+        client.async_executor.shutdown(wait=False)
+        client.async_executor = get_scrapfly_executor()
+    return client
+
+def get_scrapfly_executor() -> ThreadPoolExecutor:
+    """获取Scrapfly请求共用的线程池，线程数为 [scrapfly] concurrency（线程按需创建）"""
+    global _scrapfly_executor
+    if _scrapfly_executor is None:
+        _scrapfly_executor = ThreadPoolExecutor(max_workers=max(1, get_scrapfly_config().concurrency),
+                                                thread_name_prefix='scrapfly')
+    return _scrapfly_executor
+
+def get_scrape_semaphore() -> asyncio.Semaphore:
+    """
+    获取当前事件循环上共享的Scrapfly并发信号量，大小为 [scrapfly] concurrency
+    
+    worker模式下多个任务同时抓取，也合计不超过该并发数；同步接口每次使用新的事件循环，各自一个信号量
+    """
+    loop = asyncio.get_running_loop()
+    semaphore = _scrape_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _scrape_semaphores[loop] = asyncio.Semaphore(max(1, get_scrapfly_config().concurrency))
+    return semaphore
+
+def get_entity_cache() -> Optional[EntityCache]:
+    """获取解析结果缓存，未启用时返回None"""
+    return get_scrapfly_config().cache
+
+def __getattr__(name: str):
+    """兼容旧代码中的 SCRAPFLY / ENTITY_CACHE 模块属性"""
+    if name == 'SCRAPFLY':
+        return get_scrapfly_client()
+    if name == 'ENTITY_CACHE':
+        return get_entity_cache()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 BASE_CONFIG = {
     # bypass linkedin.com web scraping blocking
@@ -62,16 +152,212 @@ BASE_CONFIG = {
     "proxy_pool": "public_residential_pool"    
 }
 
+# 抓取档位，按成本从低到高排列，每一档在 BASE_CONFIG 的基础上覆盖部分参数：
+# plain 不渲染、不绕过反爬，只用数据中心代理；asp 绕过反爬但不渲染；render 即完整的 BASE_CONFIG
+SCRAPE_TIERS = [
+    ("plain", {"asp": False, "render_js": False, "proxy_pool": "public_datacenter_pool"}),
+    ("asp", {"render_js": False}),
+    ("render", {}),
+]
+
+JSON_LD_MARKER = 'application/ld+json'
+
+def json_ld_text(html: str) -> Optional[str]:
+    """
+    find the first JSON-LD block straight from the page text, without decoding it
+    
+    script bodies are raw text in HTML, so slicing between the tag and </script>
+    gives the same string the selector path returns without building a DOM.
+    returns None when no JSON-LD script tag is present
+    """
+    position = html.find(JSON_LD_MARKER)
+    while position != -1:
+        tag_start = html.rfind('<', 0, position)
+        if html.startswith('<script', tag_start):
+            body_start = html.find('>', position) + 1
+            body_end = html.find('</script>', body_start)
+            if body_start > 0 and body_end != -1:
+                return html[body_start:body_end]
+        position = html.find(JSON_LD_MARKER, position + len(JSON_LD_MARKER))
+    return None
+
+def extract_json_ld(html: str) -> Optional[Dict]:
+    """decode the first JSON-LD block found by json_ld_text, None when the page has none"""
+    text = json_ld_text(html)
+    return json.loads(text) if text is not None else None
+
+def extract_json_ld_selector(response: ScrapeApiResponse) -> Optional[Dict]:
+    """decode the first JSON-LD block through the full parsel DOM (slow path)"""
+    script_element = response.selector.xpath("//script[@type='application/ld+json']/text()")
+    if not script_element:
+        return None
+    return json.loads(script_element.get())
+
+def read_json_ld(response: ScrapeApiResponse) -> Optional[Dict]:
+    """JSON-LD from the text fast path, falling back to the DOM if the fast path can't decode it"""
+    try:
+        data = extract_json_ld(response.content)
+        if data is not None:
+            return data
+    except ValueError:
+        log.debug("JSON-LD fast path failed to decode, falling back to selector")
+    return extract_json_ld_selector(response)
+
+def build_scrape_config(url: str, tier: int = -1) -> ScrapeConfig:
+    """build a ScrapeConfig for the given url, BASE_CONFIG with the overrides of SCRAPE_TIERS[tier]"""
+    from scrapfly import ScrapeConfig
+    return ScrapeConfig(url, **{**BASE_CONFIG, **SCRAPE_TIERS[tier][1]})
+
+def has_json_ld_node(response: ScrapeApiResponse, expected_type: str) -> bool:
+    """
+    check that the page carries a JSON-LD node of expected_type, e.g. Organization or Person
+    
+    runs on the event loop for every scraped tier, so it only searches the raw JSON-LD text
+    for the "@type" instead of decoding it; the parser decodes the block once, off the loop
+    """
+    text = json_ld_text(response.content or '')
+    return text is not None and re.search(r'"@type"\s*:\s*"%s"' % re.escape(expected_type), text) is not None
+
+async def scrape_with_pool(scrape_config: ScrapeConfig) -> ScrapeApiResponse:
+    """
+    使用key池中余量最多的key抓取一个页面
+    
+    被限流或配额耗尽的key会被冷却，然后换下一个key重试，最多尝试key的个数次；
+    所有Scrapfly请求（scrape_many 的各档位和 /life 页面）都在这里取得共享的并发信号量
+    """
+    from scrapfly.errors import (PaymentRequired, QuotaLimitReached, ScrapflyThrottleError,
+                                 TooManyConcurrentRequest, TooManyRequest)
+    key_pool = get_scrapfly_config().key_pool
+    for _ in range(len(key_pool)):
+        key = await key_pool.acquire()
+        try:
+            async with get_scrape_semaphore():
+                response = await get_scrapfly_client(key.value).async_scrape(scrape_config)
+        except (TooManyRequest, TooManyConcurrentRequest, ScrapflyThrottleError) as e:
+            key_pool.report_rate_limited(key, getattr(e, 'retry_delay', None))
+            continue
+        except (QuotaLimitReached, PaymentRequired):
+            key_pool.report_quota_exhausted(key)
+            continue
+        key_pool.report_success(key)
+        return response
+    raise NoApiKeyAvailable(f"all Scrapfly API keys are rate limited or out of quota for {scrape_config.url}")
+
+def classify_scrapfly_error(error: Exception) -> Optional[str]:
+    """
+    Scrapfly 请求错误分类，供重试/熔断层使用
+    
+    Returns:
+        RETRY 表示5xx或Scrapfly标记为可重试的错误；FAIL 表示网络错误（SDK内部已经退避重试过）；
+        None 表示限流、配额、反爬失败等不属于上游故障的错误
+    """
+    import requests
+    from scrapfly.errors import ApiHttpServerError, ScrapflyError
+    
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return FAIL
+    if isinstance(error, ApiHttpServerError) or (isinstance(error, ScrapflyError) and error.is_retryable):
+        return RETRY
+    return None
+
+async def scrape_with_retry(scrape_config: ScrapeConfig) -> ScrapeApiResponse:
+    """通过Scrapfly的熔断器抓取，暂时性故障按 [resilience] 配置退避重试"""
+    return await get_upstream('scrapfly', classify_scrapfly_error).call(lambda: scrape_with_pool(scrape_config))
+
+async def scrape_tiered(url: str, expected_type: str) -> ScrapeApiResponse:
+    """
+    从该URL模式记住的档位开始抓取，页面缺少期望的JSON-LD节点或请求失败时升级到下一档
+    
+    验证通过的档位会被记住，下次同类URL直接从该档位开始；所有档位都未通过验证时返回最后一档的响应。
+    上游返回404/410时页面不存在，不再升级；没有通过验证的页面被记住 negative_ttl 秒，
+    期间同一页面只请求最高档位一次，最坏情况与不分档时相同
+    
+    Args:
+        url: 页面URL
+        expected_type: 页面JSON-LD中必须包含的节点类型，如 'Organization' / 'Person'
+    """
+    tracker = get_scrapfly_config().tiers
+    pattern = url_pattern(url)
+    key = canonical_linkedin_url(url)
+    response = None
+    error: Optional[Exception] = None
+    
+    for tier in range(tracker.start(pattern, key), len(SCRAPE_TIERS)):
+        scrape_config = build_scrape_config(url, tier)
+        # 与 concurrent_scrape 一致，上游错误页面也返回响应而不是抛出
+        scrape_config.raise_on_upstream_error = False
+        started = time.monotonic()
+        try:
+            response, error = await scrape_with_retry(scrape_config), None
+        except (NoApiKeyAvailable, CircuitOpen):
+            raise
+        except Exception as e:
+            tracker.record(tier, 'errors', time.monotonic() - started)
+            record_stage('scrape', time.monotonic() - started, tier=SCRAPE_TIERS[tier][0])
+            count_upstream_response('scrapfly', 'error')
+            log.debug(f"{SCRAPE_TIERS[tier][0]} tier failed for {url}: {e!r}")
+            error = e
+            continue
+        
+        record_stage('scrape', time.monotonic() - started, tier=SCRAPE_TIERS[tier][0])
+        count_upstream_response('scrapfly', response.status_code, len(response.content or ''))
+        if has_json_ld_node(response, expected_type):
+            tracker.record(tier, 'successes', time.monotonic() - started)
+            tracker.remember(pattern, tier)
+            tracker.forget_failure(key)
+            return response
+        tracker.record(tier, 'invalid', time.monotonic() - started)
+        log.debug(f"{SCRAPE_TIERS[tier][0]} tier returned no {expected_type} JSON-LD for {url}")
+        if response.status_code in MISSING_STATUS_CODES:
+            log.debug(f"{url} returned {response.status_code}, not escalating")
+            break
+    
+    if error is not None:
+        raise error
+    tracker.remember_failure(key)
+    return response
+
+async def scrape_many(urls: List[str], expected_type: str):
+    """
+    并发抓取一组页面，按完成顺序产出响应，失败的请求产出异常（与 concurrent_scrape 相同）
+    
+    并发数由进程内共享的 [scrapfly] concurrency 信号量控制（见 get_scrape_semaphore），每个页面通过 scrape_tiered 选择档位；
+    到达任务截止时间时取消未完成的抓取并结束，调用方只拿到已完成的部分
+    """
+    pending = {asyncio.ensure_future(scrape_tiered(url, expected_type)) for url in urls}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                log.warning(f"Task deadline reached, cancelling {len(pending)} of {len(urls)} scrapes")
+                break
+            for task in done:
+                error = task.exception()
+                yield error if error is not None else task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+def get_tier_stats() -> Dict:
+    """获取每个抓取档位的成功率、耗时，以及每个URL模式记住的档位"""
+    return get_scrapfly_config().tiers.stats()
+
+def get_key_pool_stats() -> List[Dict]:
+    """获取每个Scrapfly key的用量、令牌和冷却状态"""
+    return get_scrapfly_config().key_pool.stats()
+
 def strip_text(text):
     """remove extra spaces while handling None values"""
     return text.strip() if text != None else text
 
 # ========== 公司相关函数 ==========
-def parse_company_life(response: ScrapeApiResponse) -> Dict:
-    """parse company life page"""
+def parse_company_life(response: ScrapeApiResponse, schema: OutputSchema = FULL_SCHEMA) -> Dict:
+    """parse company life page, lists the schema doesn't select are not parsed and the rest stop at its max_items"""
     selector = response.selector
     leaders = []
     for element in selector.xpath("//section[@data-test-id='leaders-at']/div/ul/li"):
+        if not schema.selects('company', 'life', 'leaders') or schema.filled(leaders):
+            break
         name = element.xpath(".//a/div/h3/text()").get()
         title = element.xpath(".//a/div/h4/text()").get()
         link = element.xpath(".//a/@href").get()
@@ -85,6 +371,8 @@ def parse_company_life(response: ScrapeApiResponse) -> Dict:
     
     affiliated_pages = []
     for element in selector.xpath("//section[@data-test-id='affiliated-pages']/div/div/ul/li"):
+        if not schema.selects('company', 'life', 'affiliatedPages') or schema.filled(affiliated_pages):
+            break
         name = element.xpath(".//a/div/h3/text()").get()
         industry = element.xpath(".//a/div/p[1]/text()").get()
         address = element.xpath(".//a/div/p[2]/text()").get()
@@ -100,6 +388,8 @@ def parse_company_life(response: ScrapeApiResponse) -> Dict:
     
     similar_pages = []
     for element in selector.xpath("//section[@data-test-id='similar-pages']/div/div/ul/li"):
+        if not schema.selects('company', 'life', 'similarPages') or schema.filled(similar_pages):
+            break
         name = element.xpath(".//a/div/h3/text()").get()
         industry = element.xpath(".//a/div/p[1]/text()").get()
         address = element.xpath(".//a/div/p[2]/text()").get()
@@ -117,20 +407,43 @@ def parse_company_life(response: ScrapeApiResponse) -> Dict:
     company_life["leaders"] = leaders
     company_life["affiliatedPages"] = affiliated_pages
     company_life["similarPages"] = similar_pages
-    return company_life
+    return schema.project('company', 'life', company_life)
 
-def parse_company_overview(response: ScrapeApiResponse) -> Dict:
-    """parse company main overview page"""
-    selector = response.selector
+def parse_company_about(response: ScrapeApiResponse, schema: OutputSchema = FULL_SCHEMA) -> Dict:
+    """parse the about-us dt/dd section, the DOM is only built when the page has one and values are only read for fields the schema selects"""
+    company_about = {}
+    if 'about-us' not in response.content:
+        return company_about
     
     try:
-        # 尝试获取JSON-LD数据
-        script_element = selector.xpath("//script[@type='application/ld+json']/text()")
-        if not script_element:
+        for element in response.selector.xpath("//div[contains(@data-test-id, 'about-us')]"):
+            name = element.xpath(".//dt/text()").get()
+            value = element.xpath(".//dd/text()").get()
+            
+            if name:
+                name = name.strip()
+                if not schema.selects('company', 'overview', name):
+                    continue
+                if not value:
+                    value = ' '.join(element.xpath(".//dd//text()").getall()).strip().split('\n')[0]
+                else:
+                    value = value.strip()
+                company_about[name] = value
+    except Exception as e:
+        log.error(f"Error parsing about section: {e}")
+    return company_about
+
+def parse_company_overview(response: ScrapeApiResponse, schema: OutputSchema = FULL_SCHEMA) -> Dict:
+    """parse company main overview page, projected to the overview fields of the output schema"""
+    import jmespath
+    
+    try:
+        # 尝试获取JSON-LD数据（直接从页面文本提取，不构建DOM）
+        _script_data = read_json_ld(response)
+        if _script_data is None:
             log.warning("No JSON-LD data found")
             return {}
             
-        _script_data = json.loads(script_element.get())
         _company_types = [item for item in _script_data.get('@graph', []) if item.get('@type') == 'Organization']
         
         if not _company_types:
@@ -152,72 +465,150 @@ def parse_company_overview(response: ScrapeApiResponse) -> Dict:
         log.error(f"Error parsing JSON-LD data: {e}")
         microdata = {}
     
-    company_about = {}
-    try:
-        for element in selector.xpath("//div[contains(@data-test-id, 'about-us')]"):
-            name = element.xpath(".//dt/text()").get()
-            value = element.xpath(".//dd/text()").get()
-            
-            if name:
-                name = name.strip()
-                if not value:
-                    value = ' '.join(element.xpath(".//dd//text()").getall()).strip().split('\n')[0]
-                else:
-                    value = value.strip()
-                company_about[name] = value
-    except Exception as e:
-        log.error(f"Error parsing about section: {e}")
-    
+    company_about = parse_company_about(response, schema)
     company_overview = {**microdata, **company_about}
     log.debug(f"Parsed company overview with {len(company_about)} about fields")
-    return company_overview
+    return schema.project('company', 'overview', company_overview)
 
 async def scrape_company(urls: List[str]) -> List[Dict]:
-    """scrape public linkedin company pages"""
+    """
+    scrape public linkedin company pages
+    
+    each /life page is scheduled as soon as its overview arrives, bounded by the shared Scrapfly semaphore,
+    and overview/life pairs are joined by company id once all life pages are done
+    """
     log.info(f"Starting to scrape {len(urls)} company pages")
-    to_scrape = [ScrapeConfig(url, **BASE_CONFIG) for url in urls]
-    data = []
+    schema = get_output_schema()
+    overviews: Dict[str, Dict] = {}
+    life_tasks: Dict[str, asyncio.Task] = {}
+    
+    async def scrape_life(company_id: str) -> Dict:
+        company_life_url = f"https://linkedin.com/company/{company_id}/life"
+        with timed('scrape', tier=SCRAPE_TIERS[-1][0]):
+            life_page_response = await scrape_with_retry(build_scrape_config(company_life_url))
+        count_upstream_response('scrapfly', life_page_response.status_code, len(life_page_response.content or ''))
+        with timed('parse_company_life'):
+            return await parse_response(partial(parse_company_life, schema=schema), life_page_response)
     
-    async for response in SCRAPFLY.concurrent_scrape(to_scrape):
+    async for response in scrape_many(urls, 'Organization'):
+        company_id = None
         try:
             # create the life page URL from the overview page response
             company_id = str(response.context["url"]).split("/")[-1]
-            company_life_url = f"https://linkedin.com/company/{company_id}/life"
+            if company_id in life_tasks:
+                continue
             
-            # request the company life page
-            life_page_response = await SCRAPFLY.async_scrape(ScrapeConfig(company_life_url, **BASE_CONFIG))
-            overview = parse_company_overview(response)
-            life = parse_company_life(life_page_response)
-            data.append({"overview": overview, "life": life})
-            log.info(f"Successfully scraped company: {overview.get('name', 'Unknown')}")
+            # request the company life page without waiting for it
+            life_tasks[company_id] = asyncio.create_task(scrape_life(company_id))
+            with timed('parse_company_overview'):
+                overviews[company_id] = await parse_response(partial(parse_company_overview, schema=schema), response)
         except Exception as e:
             log.error("An error occurred while scraping company pages", exc_info=True)
+            if company_id in life_tasks and company_id not in overviews:
+                life_tasks.pop(company_id).cancel()
+            continue
+    
+    data = []
+    # life pages still running at the task deadline are cancelled and their companies left out
+    await wait_until_deadline(life_tasks.values())
+    for company_id, life_task in life_tasks.items():
+        if life_task.cancelled():
+            log.warning(f"Life page of {company_id} cancelled at task deadline")
             continue
+        if life_task.exception() is not None:
+            log.error(f"An error occurred while scraping life page of {company_id}", exc_info=life_task.exception())
+            continue
+        overview = overviews[company_id]
+        data.append({"overview": overview, "life": life_task.result()})
+        log.info(f"Successfully scraped company: {overview.get('name', 'Unknown')}")
 
     log.success(f"scraped {len(data)} companies from Linkedin")
     return data
 
-async def scrape_company_overview(urls: List[str]) -> List[Dict]:
-    """scrape public linkedin company pages - overview only"""
-    log.info(f"Starting to scrape overview for {len(urls)} company pages")
-    to_scrape = [ScrapeConfig(url, **BASE_CONFIG) for url in urls]
-    data = []
+async def scrape_parsed(urls: List[str], kind: str, parse: Callable[[ScrapeApiResponse], Dict],
+                        expected_type: str, on_result: Optional[Callable[[int, Dict], None]] = None) -> List[Optional[Dict]]:
+    """
+    抓取并解析一组LinkedIn页面，优先使用解析结果缓存
+    
+    缓存命中的URL不再请求Scrapfly，只有未命中的URL交给 scrape_many，
+    结果按输入URL的顺序返回，抓取或解析失败的位置为None；
+    解析按当前任务的输出schema裁剪，裁剪后的结果按schema分别缓存
+    
+    Args:
+        urls: LinkedIn页面URL列表
+        kind: 缓存中的实体类型，如 'company_overview' / 'profile'
+        parse: 解析函数，如 parse_company_overview，接受 schema 关键字参数
+        expected_type: 页面JSON-LD中必须包含的节点类型，用于判断是否需要升级抓取档位
+        on_result: 每个页面解析完成（或缓存命中）时立即调用 on_result(URL下标, 解析结果)，
+            用于流式输出，调用顺序为完成顺序
+        
+    Returns:
+        与urls一一对应的解析结果列表
+    """
+    entity_cache = get_entity_cache()
+    schema = get_output_schema()
+    if not schema.full:
+        kind = f"{kind}@{schema.key}"
+    results: List[Optional[Dict]] = [None] * len(urls)
+    pending: Dict[str, List[int]] = {}
     
-    async for response in SCRAPFLY.concurrent_scrape(to_scrape):
+    for index, url in enumerate(urls):
+        cached = await entity_cache.async_get(kind, url) if entity_cache else None
+        if entity_cache:
+            count_cache_lookup('linkedin_entities', cached is not None)
+        if cached is not None:
+            results[index] = cached
+            if on_result:
+                on_result(index, cached)
+        else:
+            pending.setdefault(url, []).append(index)
+    
+    if entity_cache:
+        log.info(f"Entity cache: {len(urls) - sum(len(i) for i in pending.values())} hits, {len(pending)} to scrape for {kind}")
+    
+    if not pending:
+        return results
+    
+    async for response in scrape_many(list(pending), expected_type):
         try:
-            overview = parse_company_overview(response)
-            data.append({"overview": overview})
-            log.info(f"Successfully scraped company overview: {overview.get('name', 'Unknown')}")
+            if isinstance(response, Exception):
+                raise response
+            url = response.scrape_config.url
+            with timed(parse.__name__):
+                parsed = await parse_response(partial(parse, schema=schema), response)
+            for index in pending.get(url, []):
+                results[index] = parsed
+                if on_result:
+                    on_result(index, parsed)
+            if entity_cache:
+                await entity_cache.async_set(kind, url, parsed)
+        except CircuitOpen as e:
+            log.warning(f"Skipped {kind} page: {e}")
+            continue
         except Exception as e:
-            log.error("An error occurred while scraping company pages", exc_info=True)
+            log.error(f"An error occurred while scraping {kind} pages", exc_info=True)
             continue
+    
+    return results
+
+async def scrape_company_overview(urls: List[str], on_item: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+    """scrape public linkedin company pages - overview only, on_item(index, company) is called as each page is parsed"""
+    log.info(f"Starting to scrape overview for {len(urls)} company pages")
+    data = []
+    on_result = (lambda index, overview: on_item(index, {"overview": overview})) if on_item else None
+    
+    for overview in await scrape_parsed(urls, 'company_overview', parse_company_overview, 'Organization', on_result):
+        if overview is None:
+            continue
+        data.append({"overview": overview})
+        log.info(f"Successfully scraped company overview: {overview.get('name', 'Unknown')}")
 
     log.success(f"scraped {len(data)} companies from Linkedin")
     return data
 
 # ========== 个人资料相关函数 ==========
-def refine_profile(data: Dict) -> Dict: 
-    """refine and clean the parsed profile data"""
+def refine_profile(data: Dict, schema: OutputSchema = FULL_SCHEMA) -> Dict: 
+    """refine and clean the parsed profile data, keeping only what the output schema selects"""
     parsed_data = {}
     
     # 查找Person类型的数据
@@ -227,49 +618,45 @@ def refine_profile(data: Dict) -> Dict:
         # 如果worksFor存在且是列表，只取第一个工作经历
         if "worksFor" in profile_data and isinstance(profile_data["worksFor"], list) and profile_data["worksFor"]:
             profile_data["worksFor"] = [profile_data["worksFor"][0]]
-        parsed_data["profile"] = profile_data
+        parsed_data["profile"] = schema.project('person', 'profile', profile_data)
     else:
         parsed_data["profile"] = {}
     
-    # 查找文章/帖子数据
-    articles = [key for key in data.get("@graph", []) if key.get("@type") == "Article"]
-    parsed_data["posts"] = articles
+    # 查找文章/帖子数据，超过 max_items 的帖子不再处理
+    articles = []
+    if schema.includes('person', 'posts'):
+        articles = list(schema.limit(key for key in data.get("@graph", []) if key.get("@type") == "Article"))
+    parsed_data["posts"] = schema.project('person', 'posts', articles)
     
     return parsed_data
 
-def parse_profile(response: ScrapeApiResponse) -> Dict:
-    """parse profile data from hidden script tags"""
+def parse_profile(response: ScrapeApiResponse, schema: OutputSchema = FULL_SCHEMA) -> Dict:
+    """parse profile data from hidden script tags, projected to the output schema"""
     try:
-        selector = response.selector
-        script_element = selector.xpath("//script[@type='application/ld+json']/text()")
+        data = read_json_ld(response)
         
-        if not script_element:
+        if data is None:
             log.warning("No JSON-LD data found in profile page")
             return {"profile": {}, "posts": []}
             
-        data = json.loads(script_element.get())
-        refined_data = refine_profile(data)
+        refined_data = refine_profile(data, schema)
         return refined_data
         
     except Exception as e:
         log.error(f"Error parsing profile data: {e}")
         return {"profile": {}, "posts": []}
 
-async def scrape_profile(urls: List[str]) -> List[Dict]:
-    """scrape public linkedin profile pages"""
+async def scrape_profile(urls: List[str], on_item: Optional[Callable[[int, Dict], None]] = None) -> List[Dict]:
+    """scrape public linkedin profile pages, on_item(index, profile) is called as each page is parsed"""
     log.info(f"Starting to scrape {len(urls)} profile pages")
-    to_scrape = [ScrapeConfig(url, **BASE_CONFIG) for url in urls]
     data = []
     
-    # scrape the URLs concurrently
-    async for response in SCRAPFLY.concurrent_scrape(to_scrape):
-        try:
-            profile_data = parse_profile(response)
-            data.append(profile_data)
-            log.info(f"Successfully scraped profile")
-        except Exception as e:
-            log.error("An error occurred while scraping profile pages", exc_info=True)
+    # scrape the URLs concurrently, cached profiles are reused
+    for profile_data in await scrape_parsed(urls, 'profile', parse_profile, 'Person', on_item):
+        if profile_data is None:
             continue
+        data.append(profile_data)
+        log.info(f"Successfully scraped profile")
             
     log.success(f"scraped {len(data)} profiles from Linkedin")
     return data
@@ -0,0 +1,66 @@
+from typing import Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+# LinkedIn实体页面的第一段路径 -> 实体类型（与 --type 一致）
+# 其他路径（/posts/ 帖子、/showcase/、/school/、/pulse/ 文章、/jobs/view/ 等）都不是公司主页或个人资料
+ENTITY_PATHS = {'company': 'company', 'in': 'person'}
+ENTITY_PREFIXES = {kind: prefix for prefix, kind in ENTITY_PATHS.items()}
+
+# slug 重新编码时保留的字符
+SLUG_SAFE = "-_.~"
+
+def _parse(url: str):
+    url = url.strip()
+    return urlparse(url if '://' in url else f"https://{url}")
+
+def parse_linkedin_entity(url: str) -> Optional[Tuple[str, str]]:
+    """
+    解析LinkedIn公司主页/个人资料URL
+
+    - 接受任意 linkedin.com 子域名（uk.linkedin.com / de.linkedin.com 等）
+    - 忽略slug之后的子页面（/about、/jobs、/posts、/life、/recent-activity、语言后缀等）和查询参数
+    - slug 解码后转小写再统一编码，同一实体的不同写法得到相同的slug
+
+    Args:
+        url: 原始URL，如 "https://uk.linkedin.com/company/Nokia/about?trk=abc"
+
+    Returns:
+        (实体类型 'company'/'person', slug)，如 ('company', 'nokia')；
+        不是LinkedIn实体页面（帖子、showcase、学校页面、其他网站等）时返回None
+    """
+    parsed = _parse(url)
+    host = parsed.netloc.lower().split(':')[0]
+    if host != 'linkedin.com' and not host.endswith('.linkedin.com'):
+        return None
+
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    if len(segments) < 2:
+        return None
+    kind = ENTITY_PATHS.get(segments[0].lower())
+    slug = unquote(segments[1]).strip().lower()
+    if kind is None or not slug:
+        return None
+    return kind, quote(slug, safe=SLUG_SAFE)
+
+def entity_url(kind: str, slug: str) -> str:
+    """根据实体类型和slug构建规范URL，如 https://www.linkedin.com/company/nokia"""
+    return f"https://www.linkedin.com/{ENTITY_PREFIXES[kind]}/{slug}"
+
+def canonical_linkedin_url(url: str) -> str:
+    """
+    将LinkedIn URL规范化为 https://www.linkedin.com/<path> 形式，用作缓存键
+
+    - 公司主页/个人资料：见 parse_linkedin_entity，子页面和同一实体的不同写法得到相同的URL
+    - 其他页面：统一协议和主机名，去掉查询参数、锚点和结尾的 '/'，路径转为小写
+
+    Args:
+        url: 原始LinkedIn URL，如 "https://uk.linkedin.com/company/Nokia/?trk=abc"
+
+    Returns:
+        规范化后的URL，如 "https://www.linkedin.com/company/nokia"
+    """
+    entity = parse_linkedin_entity(url)
+    if entity is not None:
+        return entity_url(*entity)
+    path = _parse(url).path.rstrip('/').lower()
+    return f"https://www.linkedin.com{path}"
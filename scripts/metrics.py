@@ -0,0 +1,187 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from .custom_logger import get_logger
+
+# 为当前文件创建专用的logger
+log = get_logger('metrics')
+
+# 耗时直方图的桶（秒），覆盖从毫秒级解析到分钟级渲染抓取
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Histogram:
+    """按标签分组的累计直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, key: LabelKey, value: float) -> None:
+        # 每个序列为 [各桶计数..., sum, count]，桶计数在输出时再累加
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self, name: str) -> Iterator[str]:
+        for key, series in sorted(self.series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{name}_bucket{_format_labels(key, ('le', '+Inf'))} {series[-1]}"
+            yield f"{name}_sum{_format_labels(key)} {_format_value(series[-2])}"
+            yield f"{name}_count{_format_labels(key)} {series[-1]}"
+
+class MetricsRegistry:
+    """
+    进程内的计数器、直方图和采集时计算的gauge，输出为Prometheus文本格式
+
+    所有指标名自动加上 cy_crawler_ 前缀
+    """
+
+    PREFIX = 'cy_crawler_'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.help: Dict[str, Tuple[str, str]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.collectors: List[Callable[[], List[Tuple[str, str, Dict[str, Any], float]]]] = []
+
+    def inc(self, name: str, amount: float = 1, help: str = '', **labels) -> None:
+        """计数器累加"""
+        with self._lock:
+            self.help.setdefault(name, ('counter', help))
+            series = self.counters.setdefault(name, {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, help: str = '', **labels) -> None:
+        """直方图记录一个观测值"""
+        with self._lock:
+            self.help.setdefault(name, ('histogram', help))
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(_label_key(labels), value)
+
+    def add_collector(self, collector: Callable[[], List[Tuple[str, str, Dict[str, Any], float]]]) -> None:
+        """
+        注册采集时调用的gauge回调
+
+        Args:
+            collector: 返回 [(指标名, 说明, 标签, 值), ...] 的函数
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        """输出Prometheus文本格式"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                full = self.PREFIX + name
+                lines.append(f"# HELP {full} {self.help[name][1]}")
+                lines.append(f"# TYPE {full} counter")
+                lines.extend(f"{full}{_format_labels(key)} {_format_value(value)}" for key, value in sorted(series.items()))
+            for name, histogram in sorted(self.histograms.items()):
+                full = self.PREFIX + name
+                lines.append(f"# HELP {full} {self.help[name][1]}")
+                lines.append(f"# TYPE {full} histogram")
+                lines.extend(histogram.render(full))
+
+        gauges: Dict[str, Tuple[str, List[str]]] = {}
+        for collector in self.collectors:
+            try:
+                samples = collector()
+            except Exception as e:
+                log.error(f"Metrics collector failed: {e!r}")
+                continue
+            for name, help, labels, value in samples:
+                full = self.PREFIX + name
+                gauges.setdefault(full, (help, []))[1].append(
+                    f"{full}{_format_labels(_label_key(labels))} {_format_value(value)}")
+        for full, (help, samples) in sorted(gauges.items()):
+            lines.append(f"# HELP {full} {help}")
+            lines.append(f"# TYPE {full} gauge")
+            lines.extend(samples)
+        return '\n'.join(lines) + '\n'
+
+# 进程内共享的指标
+REGISTRY = MetricsRegistry()
+
+# 当前任务的分阶段耗时（毫秒），任务内创建的子协程自动继承
+_task_timing: ContextVar[Optional[Dict[str, float]]] = ContextVar('task_timing', default=None)
+
+def start_task_timing() -> Tuple[Token, Dict[str, float]]:
+    """开始记录当前任务的分阶段耗时，返回token和耗时字典"""
+    timing: Dict[str, float] = {}
+    return _task_timing.set(timing), timing
+
+def stop_task_timing(token: Token) -> None:
+    """结束当前任务的耗时记录"""
+    _task_timing.reset(token)
+
+def record_stage(stage: str, seconds: float, **labels) -> None:
+    """
+    记录一个阶段的耗时：写入 stage_seconds 直方图，并累加到当前任务的耗时字典
+
+    同一任务中并发执行的同名阶段（如多个页面的抓取）按累计耗时计
+    """
+    REGISTRY.observe('stage_seconds', seconds, help='Time spent in each crawler stage', stage=stage, **labels)
+    timing = _task_timing.get()
+    if timing is not None:
+        timing[stage] = round(timing.get(stage, 0) + seconds * 1000, 1)
+
+@contextmanager
+def timed(stage: str, **labels) -> Iterator[None]:
+    """统计 with 块的耗时，见 record_stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started, **labels)
+
+def count_upstream_response(upstream: str, status: Any, size: int = 0) -> None:
+    """记录一次上游响应的状态码和大小（Google为原始字节数，Scrapfly为页面字符数，不为统计而重新编码页面）"""
+    REGISTRY.inc('upstream_responses_total', help='Upstream responses by status code', upstream=upstream, status=status)
+    if size:
+        REGISTRY.inc('upstream_bytes_total', size, help='Bytes fetched from upstreams', upstream=upstream)
+
+def count_cache_lookup(cache: str, hit: bool) -> None:
+    """记录一次缓存查询的命中情况"""
+    REGISTRY.inc('cache_lookups_total', help='Cache lookups by result', cache=cache, result='hit' if hit else 'miss')
+
+def render_metrics() -> str:
+    """当前进程的全部指标（Prometheus文本格式）"""
+    return REGISTRY.render()
+
+def _collect_breakers() -> List[Tuple[str, str, Dict[str, Any], float]]:
+    from .resilience import CLOSED, HALF_OPEN, get_breaker_states
+    values = {CLOSED: 0, HALF_OPEN: 1}
+    return [('circuit_state', 'Circuit breaker state (0 closed, 1 half open, 2 open)', {'upstream': name}, values.get(state, 2))
+            for name, state in get_breaker_states().items()]
+
+REGISTRY.add_collector(_collect_breakers)
@@ -0,0 +1,96 @@
+import asyncio
+import os
+from typing import Optional
+from .custom_logger import get_logger
+from .metrics import render_metrics
+from .settings import PROJECT_ROOT, get_section
+
+# 为当前文件创建专用的logger
+log = get_logger('metrics_exporter')
+
+# 指标文件默认每隔多少秒写一次
+DEFAULT_FLUSH_INTERVAL = 15
+
+class MetricsExporter:
+    """
+    定期把指标写入Prometheus文本文件（供node_exporter textfile collector读取），
+    可选在 127.0.0.1:port 上提供 /metrics
+    """
+
+    def __init__(self, path: Optional[str], port: int, flush_interval: float):
+        self.path = path
+        self.port = port
+        self.flush_interval = flush_interval
+        self._task: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def write(self) -> None:
+        """原子地写入指标文件"""
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = f"{self.path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(render_metrics())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.error(f"Failed to write metrics file {self.path}: {e}")
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.write()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readuntil(b'\r\n\r\n')
+            body = render_metrics().encode('utf-8')
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self) -> None:
+        if self.path:
+            self._task = asyncio.create_task(self._flush_loop())
+        if self.port:
+            self._server = await asyncio.start_server(self._handle, '127.0.0.1', self.port)
+            log.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    async def stop(self) -> None:
+        """停止导出，并写入最后一次指标"""
+        if self._task:
+            self._task.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self.write()
+
+async def start_metrics_exporter() -> Optional[MetricsExporter]:
+    """
+    根据 [metrics] 配置启动指标导出，未启用时返回None
+
+    textfile 中的 {pid} 会被替换为进程号，多个worker进程各写各的文件
+    """
+    config = get_section('metrics')
+    if not config.get('enabled', False):
+        return None
+
+    path = config.get('textfile', '')
+    if path:
+        path = path.replace('{pid}', str(os.getpid()))
+        if not os.path.isabs(path):
+            path = os.path.join(PROJECT_ROOT, path)
+
+    exporter = MetricsExporter(path, config.get('port', 0), config.get('flush_interval', DEFAULT_FLUSH_INTERVAL))
+    try:
+        await exporter.start()
+    except OSError as e:
+        log.error(f"Failed to start metrics endpoint: {e}")
+    return exporter
@@ -0,0 +1,178 @@
+import json
+from contextvars import ContextVar, Token
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from .custom_logger import get_logger
+from .settings import get_section
+
+# 为当前文件创建专用的logger
+log = get_logger('output_schema')
+
+# 不做任何裁剪的内置schema，与原来的输出相同
+FULL = 'full'
+
+# 字段树：字段名 -> 子字段树，None 表示保留该字段的全部内容
+FieldTree = Dict[str, Optional['FieldTree']]
+
+def compile_fields(paths: List[str]) -> FieldTree:
+    """
+    把点分隔的字段路径编译为字段树，如 ["name", "address.addressCountry", "address.addressLocality"]
+    -> {"name": None, "address": {"addressCountry": None, "addressLocality": None}}
+
+    同时出现 "address" 和 "address.xxx" 时保留整个 address
+    """
+    tree: FieldTree = {}
+    for path in paths:
+        node = tree
+        parts = path.split('.')
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree
+
+class OutputSchema:
+    """
+    结果文档的输出schema：按任务类型和结果部分选择下游使用的字段，并限制列表长度和字符串长度
+
+    任务类型为 'company' / 'person'，结果部分为 google（通用搜索结果）、overview / life（公司页面）、
+    profile / posts（个人资料和帖子）；没有列出的部分保留全部字段，字段列表为空的部分不输出。
+    字段列表中的 "a.b" 表示只保留 a 中的 b，作用于列表时对每个元素生效。
+    裁剪在解析函数中进行，未选择的字段不会被构建、缓存和序列化
+
+    Args:
+        name: schema名称
+        fields: {任务类型: {结果部分: [字段路径]}}
+        max_items: 列表（帖子、搜索结果、领导人等）最多保留的元素数，0表示不限制
+        max_string: 字符串最多保留的字符数，0表示不限制
+    """
+
+    def __init__(self, name: str, fields: Optional[Dict[str, Dict[str, List[str]]]] = None,
+                 max_items: int = 0, max_string: int = 0):
+        self.name = name
+        self.fields = {
+            task_type: {section: compile_fields(paths) for section, paths in sections.items()}
+            for task_type, sections in (fields or {}).items()
+        }
+        self.max_items = max_items
+        self.max_string = max_string
+        self.full = not self.fields and max_items <= 0 and max_string <= 0
+        # 解析结果缓存按 key 区分不同的schema，定义变化后不会读到按旧定义裁剪的结果
+        if self.full:
+            self.key = name
+        else:
+            import hashlib
+            definition = json.dumps([fields, max_items, max_string], sort_keys=True)
+            self.key = f"{name}-{hashlib.sha1(definition.encode('utf-8')).hexdigest()[:8]}"
+
+    @classmethod
+    def from_config(cls, name: str, definition: Dict[str, Any]) -> 'OutputSchema':
+        """根据 [output.schemas.<name>] 配置创建schema"""
+        fields = {key: value for key, value in definition.items() if isinstance(value, dict)}
+        return cls(name, fields, definition.get('max_items', 0), definition.get('max_string', 0))
+
+    def includes(self, task_type: str, section: str) -> bool:
+        """是否输出该结果部分，字段列表为空表示不输出"""
+        return self.fields.get(task_type, {}).get(section) != {}
+
+    def selects(self, task_type: str, section: str, field: str) -> bool:
+        """该结果部分是否需要某个顶层字段，解析函数据此跳过不需要的字段"""
+        tree = self.fields.get(task_type, {}).get(section)
+        return tree is None or field in tree
+
+    def limit(self, items: Iterable[Any]) -> Iterator[Any]:
+        """按 max_items 截断迭代，解析函数据此提前停止构建列表元素"""
+        return islice(items, self.max_items) if self.max_items > 0 else iter(items)
+
+    def filled(self, items: List[Any]) -> bool:
+        """列表是否已达到 max_items"""
+        return 0 < self.max_items <= len(items)
+
+    def project(self, task_type: str, section: str, value: Any) -> Any:
+        """
+        按schema裁剪一个结果部分
+
+        Args:
+            task_type: 'company' / 'person'
+            section: 结果部分，如 'overview' / 'profile' / 'posts' / 'google'
+            value: 解析结果（字典或字典列表）
+
+        Returns:
+            裁剪后的新对象，full schema 时原样返回
+        """
+        if self.full:
+            return value
+        tree = self.fields.get(task_type, {}).get(section)
+        if tree == {}:
+            return type(value)()
+        return self._apply(value, tree)
+
+    def _apply(self, value: Any, tree: Optional[FieldTree]) -> Any:
+        if isinstance(value, dict):
+            if tree is None:
+                return {key: self._apply(item, None) for key, item in value.items()}
+            return {key: self._apply(value[key], subtree) for key, subtree in tree.items() if key in value}
+        if isinstance(value, list):
+            return [self._apply(item, tree) for item in self.limit(value)]
+        if isinstance(value, str) and 0 < self.max_string < len(value):
+            return value[:self.max_string]
+        return value
+
+FULL_SCHEMA = OutputSchema(FULL)
+
+@lru_cache(maxsize=None)
+def load_output_schemas() -> Dict[str, OutputSchema]:
+    """读取 [output.schemas] 配置，进程内只解析一次，总是包含内置的 full"""
+    schemas = {FULL: FULL_SCHEMA}
+    for name, definition in get_section('output').get('schemas', {}).items():
+        schemas[name] = OutputSchema.from_config(name, definition)
+    return schemas
+
+def resolve_output_schema(name: Optional[str] = None, tenant: Optional[str] = None) -> OutputSchema:
+    """
+    选择任务的输出schema：任务指定的schema > [output.tenants] 中租户的schema > [output] default
+
+    Args:
+        name: 任务消息中的 outputSchema
+        tenant: 任务消息中的 tenantId
+
+    Returns:
+        OutputSchema，未知的名称记录警告后使用默认schema
+    """
+    config = get_section('output')
+    schemas = load_output_schemas()
+    default = schemas.get(config.get('default', FULL), FULL_SCHEMA)
+    for candidate in (name, config.get('tenants', {}).get(tenant) if tenant else None):
+        if not candidate:
+            continue
+        if candidate in schemas:
+            return schemas[candidate]
+        log.warning(f"Unknown output schema {candidate!r}, using {default.name}")
+        return default
+    return default
+
+# 当前任务的输出schema，与截止时间一样使用 ContextVar 保存，任务内创建的子协程会自动继承
+_output_schema: ContextVar[OutputSchema] = ContextVar('output_schema', default=FULL_SCHEMA)
+
+def set_output_schema(schema: OutputSchema) -> Token:
+    """
+    设置当前任务的输出schema
+
+    Args:
+        schema: resolve_output_schema 选择的schema
+
+    Returns:
+        可传给 reset_output_schema 的token
+    """
+    return _output_schema.set(schema)
+
+def reset_output_schema(token: Token) -> None:
+    """恢复 set_output_schema 之前的输出schema"""
+    _output_schema.reset(token)
+
+def get_output_schema() -> OutputSchema:
+    """当前任务的输出schema，没有设置时为 full"""
+    return _output_schema.get()
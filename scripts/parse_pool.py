@@ -0,0 +1,149 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import Executor
+from functools import cached_property
+from typing import Any, Callable, Dict, Optional
+from .custom_logger import get_logger
+from .settings import get_section
+
+# 为当前文件创建专用的logger
+log = get_logger('parse_pool')
+
+# 解析执行器类型
+INLINE = 'inline'    # 在事件循环中直接解析（原来的行为）
+PROCESS = 'process'  # 进程池，多核并行解析，事件循环只负责收发
+THREAD = 'thread'    # 线程池，只在无GIL的Python（free-threaded）上能并行
+AUTO = 'auto'        # 无GIL时使用thread，否则使用process
+EXECUTORS = (INLINE, PROCESS, THREAD, AUTO)
+
+# workers 为0时的默认进程/线程数上限
+DEFAULT_MAX_WORKERS = 4
+
+def free_threaded() -> bool:
+    """当前解释器是否在无GIL模式下运行"""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+class HtmlPage:
+    """
+    在解析进程中代替 ScrapeApiResponse，只提供解析函数用到的 content 和 selector
+
+    Args:
+        content: 页面HTML
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+
+    @cached_property
+    def selector(self):
+        from parsel import Selector
+        return Selector(text=self.content)
+
+def parse_html(parse: Callable[[Any], Dict], content: str) -> Dict:
+    """在解析进程/线程中执行解析函数，parse 必须是模块级函数（按名称pickle）"""
+    return parse(HtmlPage(content))
+
+class ParseExecutor:
+    """
+    把HTML解析交给进程池或线程池执行，inline 时直接在调用方解析
+
+    进程池使用 forkserver（不可用时为 spawn）启动子进程，不从带有线程的事件循环进程fork；
+    进程池损坏（子进程被杀等）时重建进程池，当次解析在事件循环中完成
+    """
+
+    def __init__(self, kind: str = INLINE, workers: int = 0):
+        if kind == AUTO:
+            kind = THREAD if free_threaded() else PROCESS
+        if kind not in EXECUTORS:
+            log.warning(f"Unknown parse executor {kind!r}, parsing inline")
+            kind = INLINE
+        self.kind = kind
+        self.workers = workers if workers > 0 else min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+        self._executor: Optional[Executor] = None
+
+    def _create(self) -> Optional[Executor]:
+        if self.kind == PROCESS:
+            # multiprocessing 只在使用进程池时导入，不影响启动耗时
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            log.info(f"Starting parse process pool with {self.workers} workers ({method})")
+            return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+        if self.kind == THREAD:
+            from concurrent.futures import ThreadPoolExecutor
+            log.info(f"Starting parse thread pool with {self.workers} workers")
+            return ThreadPoolExecutor(self.workers, thread_name_prefix='parse')
+        return None
+
+    async def parse(self, parse: Callable[[Any], Dict], response: Any) -> Dict:
+        """
+        解析一个页面
+
+        Args:
+            parse: 模块级解析函数，如 parse_company_overview
+            response: ScrapeApiResponse，进程池模式下只把 response.content 发给子进程
+
+        Returns:
+            解析结果
+        """
+        if self.kind == INLINE:
+            return parse(response)
+        from concurrent.futures.process import BrokenProcessPool
+        if self._executor is None:
+            self._executor = self._create()
+        executor = self._executor
+
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(executor, parse_html, parse, response.content)
+        except BrokenProcessPool:
+            # 同时失败的多个解析只重建一次
+            if self._executor is executor:
+                log.error("Parse process pool is broken, restarting it")
+                executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            return parse(response)
+
+    def shutdown(self) -> None:
+        """关闭进程池/线程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+# 进程内共享的解析执行器，首次解析时根据 [parse] 配置创建
+_parse_executor: Optional[ParseExecutor] = None
+
+def configure_parse_executor(kind: Optional[str] = None, workers: Optional[int] = None) -> ParseExecutor:
+    """
+    创建解析执行器，参数为None时使用 [parse] 配置
+
+    Args:
+        kind: 'inline' / 'process' / 'thread' / 'auto'
+        workers: 进程/线程数，0表示 min(4, CPU数)
+    """
+    global _parse_executor
+    config = get_section('parse')
+    if _parse_executor is not None:
+        _parse_executor.shutdown()
+    _parse_executor = ParseExecutor(
+        kind if kind is not None else config.get('executor', INLINE),
+        workers if workers is not None else config.get('workers', 0),
+    )
+    return _parse_executor
+
+def get_parse_executor() -> ParseExecutor:
+    """获取进程内共享的解析执行器"""
+    if _parse_executor is None:
+        return configure_parse_executor()
+    return _parse_executor
+
+async def parse_response(parse: Callable[[Any], Dict], response: Any) -> Dict:
+    """用共享的解析执行器解析一个页面，见 ParseExecutor.parse"""
+    return await get_parse_executor().parse(parse, response)
+
+def shutdown_parse_executor() -> None:
+    """关闭共享的解析执行器"""
+    if _parse_executor is not None:
+        _parse_executor.shutdown()
@@ -0,0 +1,207 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+from .custom_logger import get_logger
+from .deadline import remaining
+from .settings import get_section
+
+# 为当前文件创建专用的logger
+log = get_logger('resilience')
+
+T = TypeVar('T')
+
+# 默认重试策略：最多3次，退避 0.5s, 1s, 2s ... 最长8秒，使用全抖动(full jitter)
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 8.0
+# 默认熔断策略：连续5次失败后打开30秒，之后放行1个半开探测请求
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_MAX = 1
+
+# classify() 的返回值
+RETRY = 'retry'      # 上游暂时性故障：计入熔断失败并重试
+FAIL = 'fail'        # 上游故障但不值得重试（如SDK已经重试过）：只计入熔断失败
+# 返回None表示不是上游的问题（如参数错误、key配额），既不重试也不影响熔断
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitOpen(Exception):
+    """上游熔断器处于打开状态，请求被直接拒绝"""
+
+class CircuitBreaker:
+    """
+    单个上游的熔断器
+
+    - closed: 正常放行，连续失败达到 failure_threshold 次后打开
+    - open: 直接拒绝请求，reset_timeout 秒后进入半开
+    - half_open: 最多放行 half_open_max 个探测请求，成功则关闭，失败则重新打开
+    """
+
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT, half_open_max: int = DEFAULT_HALF_OPEN_MAX):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max = half_open_max
+        self._state = CLOSED
+        self.opened_at = 0.0
+        self.consecutive_failures = 0
+        self.probes = 0
+        self.counters = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    @property
+    def state(self) -> str:
+        """当前状态，打开超过 reset_timeout 后自动转为半开"""
+        if self._state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self.probes = 0
+            log.info(f"Circuit for {self.name} is half open, probing")
+        return self._state
+
+    def before_call(self) -> None:
+        """请求前检查，熔断打开或半开探测名额已满时抛出 CircuitOpen"""
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self.probes >= self.half_open_max):
+            self.counters["rejected"] += 1
+            raise CircuitOpen(f"circuit for {self.name} is {state}")
+        if state == HALF_OPEN:
+            self.probes += 1
+
+    def record_success(self) -> None:
+        """请求成功，半开状态下关闭熔断"""
+        self.counters["successes"] += 1
+        self.consecutive_failures = 0
+        if self._state != CLOSED:
+            log.info(f"Circuit for {self.name} closed")
+        self._state = CLOSED
+
+    def record_failure(self) -> None:
+        """请求失败，达到阈值或半开探测失败时打开熔断"""
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        if self._state == HALF_OPEN or (self._state == CLOSED and self.consecutive_failures >= self.failure_threshold):
+            self._state = OPEN
+            self.opened_at = time.monotonic()
+            self.counters["opened"] += 1
+            log.warning(f"Circuit for {self.name} opened after {self.consecutive_failures} consecutive failures")
+
+    def release_probe(self) -> None:
+        """不计入成败的半开探测结束后归还名额"""
+        if self._state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self.consecutive_failures, **self.counters}
+
+class RetryPolicy:
+    """有上限的指数退避重试，等待时间在 [0, min(max_delay, base_delay * 2^n)] 内随机（full jitter）"""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次（从0开始）失败后的等待秒数"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+class Upstream:
+    """一个上游服务的重试策略、熔断器和错误分类"""
+
+    def __init__(self, name: str, policy: RetryPolicy, breaker: CircuitBreaker,
+                 classify: Callable[[Exception], Optional[str]]):
+        self.name = name
+        self.policy = policy
+        self.breaker = breaker
+        self.classify = classify
+        self.counters = {"calls": 0, "retries": 0}
+
+    async def call(self, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        通过熔断器调用上游，暂时性故障按重试策略退避重试
+
+        退避等待超过任务剩余时间时不再重试，直接抛出最后一次的异常
+
+        Args:
+            operation: 每次调用时创建新协程的函数
+
+        Returns:
+            operation 的结果
+        """
+        self.counters["calls"] += 1
+        for attempt in range(self.policy.max_attempts):
+            self.breaker.before_call()
+            try:
+                result = await operation()
+            except asyncio.CancelledError:
+                self.breaker.release_probe()
+                raise
+            except Exception as e:
+                kind = self.classify(e)
+                if kind is None:
+                    self.breaker.release_probe()
+                    raise
+                self.breaker.record_failure()
+                if kind != RETRY or attempt + 1 >= self.policy.max_attempts or self.breaker.state == OPEN:
+                    raise
+
+                delay = self.policy.delay(attempt)
+                left = remaining()
+                if left is not None and delay >= left:
+                    raise
+                self.counters["retries"] += 1
+                log.warning(f"{self.name} call failed ({e!r}), retry {attempt + 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            self.breaker.record_success()
+            return result
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.breaker.stats(), **self.counters}
+
+# 每个上游一个实例，同一进程内的所有任务共享
+_upstreams: Dict[str, Upstream] = {}
+
+def get_upstream(name: str, classify: Callable[[Exception], Optional[str]]) -> Upstream:
+    """
+    获取上游的重试/熔断实例，首次调用时根据 [resilience] 和 [resilience.<name>] 配置创建
+
+    Args:
+        name: 上游名称，如 'google' / 'scrapfly'
+        classify: 错误分类函数，返回 RETRY / FAIL / None
+    """
+    upstream = _upstreams.get(name)
+    if upstream is None:
+        section = get_section('resilience')
+        config = {key: value for key, value in section.items() if not isinstance(value, dict)}
+        config.update(section.get(name, {}))
+        upstream = _upstreams[name] = Upstream(
+            name,
+            RetryPolicy(
+                max_attempts=config.get('max_attempts', DEFAULT_MAX_ATTEMPTS),
+                base_delay=config.get('base_delay', DEFAULT_BASE_DELAY),
+                max_delay=config.get('max_delay', DEFAULT_MAX_DELAY),
+            ),
+            CircuitBreaker(
+                name,
+                failure_threshold=config.get('failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+                reset_timeout=config.get('reset_timeout', DEFAULT_RESET_TIMEOUT),
+                half_open_max=config.get('half_open_max', DEFAULT_HALF_OPEN_MAX),
+            ),
+            classify,
+        )
+    return upstream
+
+def get_breaker_states() -> Dict[str, str]:
+    """所有已使用的上游当前的熔断状态"""
+    return {name: upstream.breaker.state for name, upstream in _upstreams.items()}
+
+def get_resilience_stats() -> Dict[str, Dict[str, Any]]:
+    """所有已使用的上游的熔断状态、成败计数和重试次数"""
+    return {name: upstream.stats() for name, upstream in _upstreams.items()}
@@ -2,6 +2,33 @@
 import subprocess
 import sys
 import os
+import time
+
+# 子进程超过 --deadline 之后再等待的秒数，crawler.py 正常情况下会在截止时间前返回部分结果
+DEADLINE_GRACE = 3
+# 结果帧模式下子进程失败或超时的退出码：子进程可能已经写出结果帧，包装器无法知道，
+# 由Go侧判断（见 processor/framing.go 的 scriptFailedExitCode），已有结果帧时使用该帧，否则按空结果处理
+CHILD_FAILED_EXIT = 3
+
+def get_timeout(argv):
+    """根据 --deadline 参数计算子进程的超时时间，没有该参数时不限时"""
+    if '--deadline' not in argv:
+        return None
+    index = argv.index('--deadline')
+    try:
+        return max(0.0, float(argv[index + 1]) - time.time()) + DEADLINE_GRACE
+    except (IndexError, ValueError):
+        return None
+
+def get_result_fd(argv):
+    """--result-fd 参数指定的结果描述符，没有该参数时返回None"""
+    if '--result-fd' not in argv:
+        return None
+    index = argv.index('--result-fd')
+    try:
+        return int(argv[index + 1])
+    except (IndexError, ValueError):
+        return None
 
 def main():
     """包装器脚本，确保没有任何日志输出到控制台"""
@@ -11,6 +38,8 @@ def main():
     
     # 构建命令
     cmd = [sys.executable, 'scripts/crawler.py'] + sys.argv[1:]
+    # 结果帧由 crawler.py 直接写入继承的描述符
+    result_fd = get_result_fd(sys.argv[1:])
     
     try:
         # 运行命令，捕获输出
@@ -19,18 +48,29 @@ def main():
             capture_output=True,
             text=True,
             env=env,
-            check=True
+            check=True,
+            timeout=get_timeout(sys.argv[1:]),
+            pass_fds=() if result_fd is None else (result_fd,)
         )
         
+        if result_fd is not None:
+            return
+        
         # 只输出标准输出（应该是纯净的JSON）
         if result.stdout.strip():
             print(result.stdout.strip())
         else:
             print("{}")
             
-    except subprocess.CalledProcessError as e:
-        # 如果出错，输出空JSON
-        print("{}")
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        # 出错或超时：结果帧模式下不写空结果，避免覆盖子进程已经写出的结果帧
+        if result_fd is not None:
+            sys.exit(CHILD_FAILED_EXIT)
+        # stdout模式下子进程已经输出的结果仍然有效，没有输出时才输出空JSON
+        output = e.stdout or ''
+        if isinstance(output, bytes):
+            output = output.decode('utf-8', errors='replace')
+        print(output.strip() or "{}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
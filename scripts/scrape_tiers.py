@@ -0,0 +1,157 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List
+from urllib.parse import urlparse
+from .custom_logger import get_logger
+
+# 为当前文件创建专用的logger
+log = get_logger('scrape_tiers')
+
+# 记住的档位不是最便宜的档位时，每隔多少次请求从最便宜的档位重新尝试一次
+DEFAULT_PROBE_INTERVAL = 20
+# 所有档位都没有通过验证的URL（登录墙、已删除的页面），在这段时间内只尝试最高档位（秒）
+DEFAULT_NEGATIVE_TTL = 6 * 3600
+# 最多记住的失败URL数，超出时丢弃最早记录的
+MAX_NEGATIVE_URLS = 10000
+# 上游返回这些状态码说明页面不存在，升级档位也不会得到内容
+MISSING_STATUS_CODES = (404, 410)
+
+def url_pattern(url: str) -> str:
+    """
+    提取URL的模式（域名 + 第一段路径），同一模式的页面通常需要相同的抓取档位
+
+    Args:
+        url: 页面URL，如 "https://www.linkedin.com/company/biogenex"
+
+    Returns:
+        URL模式，如 "linkedin.com/company"
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().split(':')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    segment = parsed.path.strip('/').split('/')[0].lower()
+    return f"{host}/{segment}"
+
+class ScrapeTierTracker:
+    """
+    记录每个URL模式上次成功的抓取档位，以及每个档位的成功率和耗时
+
+    - 档位按成本从低到高排列，start() 返回本次应首先尝试的档位
+    - 记住的档位高于最低档位时，每 probe_interval 次请求从最低档位重新尝试，
+      使LinkedIn放宽限制后可以回到便宜的档位
+    - 未启用时总是直接使用最高档位（即原来的完整配置）
+    - 所有档位都没有通过验证的URL在 negative_ttl 秒内直接使用最高档位，
+      反复失败的页面每次只花一次请求，与不分档时相同
+    """
+
+    def __init__(self, tiers: List[str], enabled: bool = True, probe_interval: int = DEFAULT_PROBE_INTERVAL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.tiers = tiers
+        self.enabled = enabled
+        self.probe_interval = probe_interval
+        self.negative_ttl = negative_ttl
+        self.remembered: Dict[str, int] = {}
+        self.since_probe: Dict[str, int] = {}
+        # 规范URL -> 失败记录的过期时间
+        self.failed: 'OrderedDict[str, float]' = OrderedDict()
+        self.negative_hits = 0
+        self.counters = {
+            name: {"attempts": 0, "successes": 0, "invalid": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0}
+            for name in tiers
+        }
+
+    def start(self, pattern: str, key: str = '') -> int:
+        """
+        本次请求首先尝试的档位
+
+        Args:
+            pattern: url_pattern() 返回的URL模式
+            key: 页面的规范URL，最近所有档位都失败过的页面直接使用最高档位
+
+        Returns:
+            档位下标
+        """
+        if not self.enabled:
+            return len(self.tiers) - 1
+        if key and self.failed_recently(key):
+            self.negative_hits += 1
+            return len(self.tiers) - 1
+
+        tier = self.remembered.get(pattern, 0)
+        if tier > 0 and self.probe_interval > 0:
+            count = self.since_probe.get(pattern, 0) + 1
+            if count >= self.probe_interval:
+                self.since_probe[pattern] = 0
+                log.debug(f"Probing cheapest tier again for {pattern}")
+                return 0
+            self.since_probe[pattern] = count
+        return tier
+
+    def remember(self, pattern: str, tier: int) -> None:
+        """记录该URL模式本次验证通过的档位"""
+        if self.remembered.get(pattern) != tier:
+            log.info(f"Scrape tier for {pattern} is now {self.tiers[tier]}")
+        self.remembered[pattern] = tier
+
+    def failed_recently(self, key: str) -> bool:
+        """该页面是否在 negative_ttl 内所有档位都没有通过验证"""
+        expires_at = self.failed.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self.failed[key]
+            return False
+        return True
+
+    def remember_failure(self, key: str) -> None:
+        """记录所有档位都没有通过验证（或页面不存在）的页面"""
+        if self.negative_ttl <= 0:
+            return
+        self.failed.pop(key, None)
+        self.failed[key] = time.time() + self.negative_ttl
+        while len(self.failed) > MAX_NEGATIVE_URLS:
+            self.failed.popitem(last=False)
+
+    def forget_failure(self, key: str) -> None:
+        """页面重新通过验证时删除失败记录"""
+        self.failed.pop(key, None)
+
+    def record(self, tier: int, outcome: str, elapsed: float) -> None:
+        """
+        记录一次抓取结果
+
+        Args:
+            tier: 档位下标
+            outcome: 'successes'（验证通过）/ 'invalid'（页面缺少期望的数据）/ 'errors'（请求异常）
+            elapsed: 耗时（秒）
+        """
+        counters = self.counters[self.tiers[tier]]
+        counters["attempts"] += 1
+        counters[outcome] += 1
+        counters["latency_total"] += elapsed
+        counters["latency_max"] = max(counters["latency_max"], elapsed)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回每个档位的统计和每个URL模式记住的档位
+
+        Returns:
+            {"tiers": {档位: {attempts, successes, invalid, errors, success_rate, avg_latency, max_latency}},
+             "patterns": {URL模式: 档位}, "negative": {"urls": 记住的失败页面数, "hits": 直接使用最高档位的次数}}
+        """
+        tiers = {}
+        for name, counters in self.counters.items():
+            attempts = counters["attempts"]
+            tiers[name] = {
+                "attempts": attempts,
+                "successes": counters["successes"],
+                "invalid": counters["invalid"],
+                "errors": counters["errors"],
+                "success_rate": round(counters["successes"] / attempts, 3) if attempts else None,
+                "avg_latency": round(counters["latency_total"] / attempts, 3) if attempts else None,
+                "max_latency": round(counters["latency_max"], 3),
+            }
+        patterns = {pattern: self.tiers[tier] for pattern, tier in self.remembered.items()}
+        return {"tiers": tiers, "patterns": patterns,
+                "negative": {"urls": len(self.failed), "hits": self.negative_hits}}
@@ -0,0 +1,293 @@
+import asyncio
+import atexit
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, TypeVar
+from .custom_logger import get_logger
+
+# 为当前文件创建专用的logger
+log = get_logger('search_cache')
+
+# 默认缓存配置
+DEFAULT_TTL = 7 * 24 * 3600          # 有结果的响应保留7天
+DEFAULT_NEGATIVE_TTL = 12 * 3600     # 没有items的响应只保留12小时
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_BUSY_TIMEOUT = 5000          # 毫秒，多进程并发写时等待锁的时间
+DEFAULT_FLUSH_INTERVAL = 10          # 秒，命中统计和访问时间在内存中累积后批量写入的间隔
+# 内存中待写入的访问时间超过这么多条时提前写入
+MAX_PENDING_ACCESSES = 5000
+
+T = TypeVar('T')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    negative    INTEGER NOT NULL,
+    expires_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries(last_access);
+CREATE INDEX IF NOT EXISTS idx_entries_expires_at ON entries(expires_at);
+CREATE TABLE IF NOT EXISTS stats (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def normalize_query(query: str) -> str:
+    """
+    规范化查询字符串，使大小写、多余空白和 '+' 连接方式不同的相同查询命中同一个缓存条目
+
+    Args:
+        query: 原始查询字符串，如 "BioGenex+site:biogenex.com"
+
+    Returns:
+        规范化后的查询字符串，如 "biogenex site:biogenex.com"
+    """
+    return re.sub(r"[\s+]+", " ", query or "").strip().lower()
+
+class SearchCache:
+    """
+    Google CSE 响应的磁盘缓存（SQLite）
+
+    - 键为 搜索类型 + 规范化查询
+    - 有结果和无结果（negative）的响应分别使用不同的TTL
+    - 超过 max_entries 时按最近访问时间淘汰（LRU）
+    - 使用WAL模式和busy_timeout，同一节点上的多个爬虫进程可以共享同一个文件
+    - 命中/未命中计数和访问时间先记在内存中，每 flush_interval 秒（以及退出时）在一个事务中写入数据库，
+      过期条目的清理和容量淘汰也在这时进行，查询本身只读
+    - 异步代码使用 async_get / async_set / run，数据库操作在缓存专用的线程中执行，不阻塞事件循环
+    """
+
+    def __init__(self, path: str, ttl: int = DEFAULT_TTL, negative_ttl: int = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.counters = {"hits": 0, "negative_hits": 0, "misses": 0, "expired": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        # 尚未写入数据库的计数增量、条目最近访问时间和写入次数
+        self._pending_counts: Dict[str, int] = {}
+        self._pending_access: Dict[str, float] = {}
+        self._pending_stores = 0
+        self._last_flush = time.monotonic()
+        # 单线程执行器：同一连接上的操作串行执行
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search-cache')
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=DEFAULT_BUSY_TIMEOUT / 1000, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout = {DEFAULT_BUSY_TIMEOUT}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # 进程退出前写入内存中的计数和访问时间
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(search_type: str, query: str) -> str:
+        """根据搜索类型和查询构建缓存键"""
+        return f"{search_type}:{normalize_query(query)}"
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """累加进程内计数，增量在下次 flush 时写入共享的计数器，调用方持有 self._lock"""
+        self.counters[name] += amount
+        self._pending_counts[name] = self._pending_counts.get(name, 0) + amount
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """在缓存专用的线程中执行 func(*args)，用于从事件循环中调用会访问数据库的方法"""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def async_get(self, *args: Any) -> Optional[Dict[str, Any]]:
+        """get 的异步版本，参数相同"""
+        return await self.run(self.get, *args)
+
+    async def async_set(self, *args: Any) -> None:
+        """set 的异步版本，参数相同"""
+        await self.run(self.set, *args)
+
+    def get(self, search_type: str, query: str) -> Optional[Dict[str, Any]]:
+        """
+        查询缓存
+
+        Args:
+            search_type: 搜索类型，'company' / 'person' / 'general' 等
+            query: 查询字符串
+
+        Returns:
+            缓存的Google CSE响应，未命中或已过期时返回None
+        """
+        key = self.make_key(search_type, query)
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT value, negative, expires_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is None:
+                    self._count("misses")
+                    return None
+
+                value, negative, expires_at = row
+                if expires_at <= now:
+                    # 过期条目在 flush 时统一清理，或被下一次写入覆盖
+                    self._count("expired")
+                    self._count("misses")
+                    return None
+
+                self._pending_access[key] = now
+                self._count("negative_hits" if negative else "hits")
+            log.debug(f"Cache hit for {key}")
+            return json.loads(value)
+        except sqlite3.Error as e:
+            log.error(f"Cache lookup failed for {key}: {e}")
+            return None
+        finally:
+            self._maybe_flush()
+
+    def set(self, search_type: str, query: str, response: Dict[str, Any]) -> None:
+        """
+        写入缓存，没有items的响应使用较短的negative TTL
+
+        Args:
+            search_type: 搜索类型
+            query: 查询字符串
+            response: Google CSE的原始响应
+        """
+        self.put(self.make_key(search_type, query), response, negative=not response.get('items'))
+
+    def put(self, key: str, value: Any, negative: bool) -> None:
+        """按已经构建好的键写入一个条目，超出容量的条目在下次 flush 时淘汰"""
+        now = time.time()
+        expires_at = now + (self.negative_ttl if negative else self.ttl)
+        data = json.dumps(value, ensure_ascii=False)
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries(key, value, negative, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, data, int(negative), expires_at, now),
+                )
+                self._pending_access.pop(key, None)
+                self._pending_stores += 1
+                self._count("stores")
+        except sqlite3.Error as e:
+            log.error(f"Cache store failed for {key}: {e}")
+        finally:
+            self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        """距离上次写入超过 flush_interval 秒或待写入的访问时间过多时执行 flush"""
+        if (time.monotonic() - self._last_flush >= self.flush_interval
+                or len(self._pending_access) >= MAX_PENDING_ACCESSES):
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        在一个事务中写入内存中累积的访问时间和计数增量，有新写入时清理过期条目并按容量淘汰
+
+        写入失败时丢弃这批访问时间（只影响LRU顺序），计数增量保留到下次
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not (self._pending_counts or self._pending_access or self._pending_stores):
+                return
+            access, self._pending_access = self._pending_access, {}
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany(
+                    "UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?",
+                    [(accessed_at, key) for key, accessed_at in access.items()],
+                )
+                if self._pending_stores:
+                    self._evict()
+                self._conn.executemany(
+                    "INSERT INTO stats(name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    list(self._pending_counts.items()),
+                )
+                self._conn.execute("COMMIT")
+                self._pending_counts = {}
+                self._pending_stores = 0
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                log.error(f"Cache flush failed for {self.path}: {e}")
+
+    def _evict(self) -> None:
+        """清理过期条目，超过容量时按最近访问时间淘汰最旧的条目，调用方持有 self._lock 并已开启事务"""
+        evicted = self._conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),)).rowcount
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        overflow = total - self.max_entries
+        if overflow > 0:
+            evicted += self._conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            ).rowcount
+        if evicted:
+            # 直接计入本次写入的增量
+            self.counters["evictions"] += evicted
+            self._pending_counts["evictions"] = self._pending_counts.get("evictions", 0) + evicted
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        返回缓存统计
+
+        Returns:
+            {"process": 本进程计数, "shared": 所有共享该文件的进程的累计计数, "entries": 当前条目数}
+        """
+        self.flush()
+        with self._lock:
+            shared = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return {"process": dict(self.counters), "shared": shared, "entries": entries}
+
+    def close(self) -> None:
+        """写入内存中的统计后关闭数据库连接"""
+        self.flush()
+        atexit.unregister(self.flush)
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+def build_search_cache(cache_config: Dict[str, Any], project_root: str) -> Optional[SearchCache]:
+    """
+    根据 [google_search.cache] 配置创建缓存，未启用或创建失败时返回None
+
+    Args:
+        cache_config: 配置字典
+        project_root: 项目根目录，用于解析相对路径
+
+    Returns:
+        SearchCache实例或None
+    """
+    if not cache_config.get('enabled', False):
+        return None
+
+    path = cache_config.get('path', 'cache/google_search.sqlite3')
+    if not os.path.isabs(path):
+        path = os.path.join(project_root, path)
+
+    try:
+        return SearchCache(
+            path,
+            ttl=cache_config.get('ttl', DEFAULT_TTL),
+            negative_ttl=cache_config.get('negative_ttl', DEFAULT_NEGATIVE_TTL),
+            max_entries=cache_config.get('max_entries', DEFAULT_MAX_ENTRIES),
+        )
+    except sqlite3.Error as e:
+        log.error(f"Failed to open search cache at {path}: {e}")
+        return None
@@ -0,0 +1,45 @@
+import os
+from functools import lru_cache
+from typing import Dict, Any
+from .custom_logger import get_logger
+
+# 为当前文件创建专用的logger
+log = get_logger('settings')
+
+# 项目根目录（scripts 的父目录）和配置文件路径，CY_CRAWLER_CONFIG 可以指定其他配置文件（如压测用的配置）
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.getenv('CY_CRAWLER_CONFIG') or os.path.join(PROJECT_ROOT, 'configs', 'config.toml')
+
+@lru_cache(maxsize=None)
+def load_config() -> Dict[str, Any]:
+    """
+    读取 configs/config.toml，进程内只解析一次，所有模块共享同一份结果
+
+    Returns:
+        配置字典，文件不存在或解析失败时返回空字典
+    """
+    log.debug(f"Looking for config at: {CONFIG_PATH}")
+
+    if not os.path.exists(CONFIG_PATH):
+        log.warning(f"Config file not found at: {CONFIG_PATH}")
+        return {}
+
+    try:
+        import toml
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return toml.load(f)
+    except Exception as e:
+        log.error(f"Failed to load config from TOML file: {e}")
+        return {}
+
+def get_section(name: str) -> Dict[str, Any]:
+    """
+    获取配置中的一个section，如 'google_search' / 'scrapfly'
+
+    Args:
+        name: section名称
+
+    Returns:
+        section字典，不存在时返回空字典
+    """
+    return load_config().get(name, {})
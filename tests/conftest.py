@@ -0,0 +1,7 @@
+"""Python单元测试共用配置：把项目根目录加入路径，以 scripts.xxx 的形式导入被测模块"""
+import os
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from scripts import crawler, metrics_exporter
+from scripts.crawler import iter_batch_tasks, run_batch, task_to_args
+
+class FakePipeline:
+    """代替 process_task：按任务名称延迟返回，名称为 fail 时抛出异常，并记录同时处理的任务数"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self.names = []
+
+    async def __call__(self, args):
+        self.names.append(args.name)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(0.01 if args.name != 'slow' else 0.05)
+            if args.name == 'fail':
+                raise RuntimeError('upstream exploded')
+            return {"sources": {"google": [args.name], "linkedin": []}}
+        finally:
+            self.active -= 1
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    pipeline = FakePipeline()
+
+    async def no_exporter():
+        return None
+
+    async def noop(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(crawler, 'process_task', pipeline)
+    monkeypatch.setattr(crawler, 'close_search_api', noop)
+    monkeypatch.setattr(metrics_exporter, 'start_metrics_exporter', no_exporter)
+    return pipeline
+
+def write_tasks(path, lines):
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return str(path)
+
+def read_results(path):
+    return [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+
+def test_iter_batch_tasks_skips_blank_and_invalid_lines(tmp_path):
+    path = write_tasks(tmp_path / 'tasks.jsonl', ['{"id": 1}', '', '   ', 'not json', '[1, 2]', '{"id": 2}'])
+    stats = {'invalid': 0}
+    assert list(iter_batch_tasks(path, stats)) == [{'id': 1}, {'id': 2}]
+    assert stats['invalid'] == 2
+
+def test_task_to_args_accepts_mq_messages():
+    args = task_to_args({'type': 2, 'companyName': 'Acme', 'contactPersonName': 'Jane Doe',
+                         'emailAddress': 'jane@acme.com', 'location': 'DE', 'deadline': 1700000000})
+    assert (args.type, args.name, args.email, args.country, args.deadline) == (
+        'person', 'Jane Doe', 'jane@acme.com', 'DE', 1700000000)
+    assert task_to_args({'type': 'company', 'name': 'Acme'}).url == ''
+
+def test_run_batch_writes_one_line_per_task_in_completion_order(pipeline, tmp_path):
+    path = write_tasks(tmp_path / 'tasks.jsonl', [
+        '{"requestId": "r1", "type": "company", "name": "slow"}',
+        '{"id": "r2", "type": "company", "name": "fast"}',
+        '{"requestId": "r3", "type": "person", "name": "fail"}',
+        'garbage',
+    ])
+    output = tmp_path / 'results.jsonl'
+    stats = asyncio.run(run_batch(path, str(output), concurrency=3))
+    assert {key: stats[key] for key in ('submitted', 'succeeded', 'failed', 'invalid')} == {
+        'submitted': 3, 'succeeded': 2, 'failed': 1, 'invalid': 1}
+    assert stats['tasks_per_second'] > 0
+
+    results = read_results(output)
+    # 慢任务最后完成；requestId 缺失时使用 id
+    assert [result['requestId'] for result in results][-1] == 'r1'
+    by_id = {result['requestId']: result for result in results}
+    assert by_id['r2']['sources']['google'] == ['fast']
+    assert by_id['r3'] == {'requestId': 'r3', 'sources': {'google': [], 'linkedin': []},
+                           'error': 'upstream exploded'}
+
+def test_run_batch_respects_concurrency(pipeline, tmp_path):
+    path = write_tasks(tmp_path / 'tasks.jsonl',
+                       [json.dumps({'requestId': i, 'type': 'company', 'name': f'n{i}'}) for i in range(20)])
+    output = tmp_path / 'results.jsonl'
+    stats = asyncio.run(run_batch(path, str(output), concurrency=4))
+    assert stats['succeeded'] == 20
+    assert pipeline.max_active == 4
+    assert sorted(result['requestId'] for result in read_results(output)) == list(range(20))
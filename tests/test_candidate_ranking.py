@@ -0,0 +1,100 @@
+import pytest
+
+from scripts import candidate_ranking
+from scripts.candidate_ranking import (CandidateScorer, country_code, domain_of, normalize_name, select_candidates,
+                                       task_domains, unique_candidates)
+
+def company(link, title, website='', country=''):
+    organization = {}
+    if website:
+        organization['url'] = website
+    if country:
+        organization['addresscountry'] = country
+    return {'link': link, 'title': f"{title} | LinkedIn",
+            'pagemap': {'organization': [organization]} if organization else {}}
+
+@pytest.fixture
+def ranking_config(monkeypatch):
+    config = {'enabled': True, 'min_score': 0.6, 'margin': 0.1, 'max_candidates': 3}
+    monkeypatch.setattr(candidate_ranking, 'get_section', lambda name: config)
+    return config
+
+def test_normalize_name_strips_accents_punctuation_and_suffixes():
+    assert normalize_name('Société Générale S.A.') == ['societe', 'generale']
+    assert normalize_name('Acme, Inc.') == ['acme']
+    assert normalize_name('Fiat S.p.A.') == ['fiat']
+    # 只有后缀时保留原词
+    assert normalize_name('Company Ltd') == ['company', 'ltd']
+
+def test_domains_and_countries():
+    assert domain_of('https://www.Acme.com/about') == 'acme.com'
+    assert domain_of('jane@acme.co.uk') == 'acme.co.uk'
+    assert task_domains('acme.com', 'jane@gmail.com') == {'acme.com'}
+    assert task_domains('', 'jane@acme.de') == {'acme.de'}
+    assert country_code('United Kingdom') == 'GB'
+    assert country_code('uk') == 'GB'
+    assert country_code('de') == 'DE'
+    assert country_code('Atlantis') is None
+
+def test_unique_candidates_keeps_best_ranked_entity_of_the_type():
+    items = [
+        {'link': 'https://www.linkedin.com/company/acme/about'},
+        {'link': 'https://www.linkedin.com/posts/acme_activity-1'},
+        {'link': 'https://uk.linkedin.com/company/Acme'},
+        {'link': 'https://www.linkedin.com/in/jane'},
+        {'link': 'https://www.linkedin.com/company/acme-labs'},
+    ]
+    assert [url for url, _ in unique_candidates(items, 'company')] == [
+        'https://www.linkedin.com/company/acme',
+        'https://www.linkedin.com/company/acme-labs',
+    ]
+    assert [url for url, _ in unique_candidates(items, 'person')] == ['https://www.linkedin.com/in/jane']
+
+def test_scorer_signals():
+    scorer = CandidateScorer('company', 'Acme Inc', url='https://acme.com', country='Germany')
+    match = company('https://de.linkedin.com/company/acme', 'Acme', website='https://www.acme.com')
+    other = company('https://www.linkedin.com/company/acme-foods', 'Acme Foods', website='acmefoods.com',
+                    country='US')
+    assert scorer.name_score(match) == 1.0
+    assert scorer.name_score(other) < 1.0
+    assert scorer.domain_score(match) == 1.0
+    assert scorer.domain_score(other) == 0.0
+    assert scorer.country_score(match) == 1.0
+    assert scorer.country_score(other) == 0.0
+    assert scorer.score(match, 1, 2) > scorer.score(other, 0, 2)
+
+def test_snippet_contributes_a_discounted_name_signal():
+    scorer = CandidateScorer('company', 'Globex Corporation')
+    truncated = {'link': 'https://www.linkedin.com/company/globex', 'title': 'Overview | LinkedIn',
+                 'snippet': 'Globex Corporation | 12,345 followers on LinkedIn. We make things.'}
+    unrelated = {'link': 'https://www.linkedin.com/company/initech', 'title': 'Overview | LinkedIn',
+                 'snippet': 'Initech | 42 followers on LinkedIn. Software for banks.'}
+    assert scorer.name_score(truncated) == pytest.approx(candidate_ranking.SNIPPET_NAME_FACTOR)
+    assert scorer.name_score(unrelated) < 0.5
+    # 标题已经匹配时摘要不会降低得分
+    truncated['title'] = 'Globex | LinkedIn'
+    assert scorer.name_score(truncated) == 1.0
+
+def test_confident_selection_picks_the_best_match(ranking_config):
+    items = [
+        company('https://www.linkedin.com/company/acme-foods', 'Acme Foods', website='acmefoods.com'),
+        company('https://www.linkedin.com/company/acme', 'Acme', website='acme.com'),
+    ]
+    urls, decision = select_candidates(items, 'company', 'Acme', url='acme.com')
+    assert decision == 'confident'
+    assert urls == ['https://www.linkedin.com/company/acme']
+
+def test_ambiguous_selection_keeps_close_candidates(ranking_config):
+    ranking_config['max_candidates'] = 2
+    items = [company(f'https://www.linkedin.com/company/acme-{i}', 'Acme') for i in range(4)]
+    urls, decision = select_candidates(items, 'company', 'Acme')
+    assert decision == 'ambiguous'
+    assert len(urls) == 2
+
+def test_unranked_when_disabled_or_without_name(ranking_config):
+    items = [company('https://www.linkedin.com/company/b', 'B'), company('https://www.linkedin.com/company/a', 'A')]
+    assert select_candidates(items, 'company', '') == (
+        ['https://www.linkedin.com/company/b', 'https://www.linkedin.com/company/a'], 'unranked')
+    ranking_config['enabled'] = False
+    assert select_candidates(items, 'company', 'A')[1] == 'unranked'
+    assert select_candidates([], 'company', 'A') == ([], 'unranked')
@@ -0,0 +1,58 @@
+import logging
+import queue
+
+from scripts.custom_logger import NonBlockingQueueHandler, SamplingFilter
+
+def make_record(level=logging.INFO, name='test', lineno=10, msg='message'):
+    return logging.LogRecord(name, level, __file__, lineno, msg, None, None)
+
+def test_sampling_filter_reports_suppressed_count(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('scripts.custom_logger.time.monotonic', lambda: now[0])
+    log_filter = SamplingFilter(rate=1, burst=2)
+    kept = [log_filter.filter(make_record()) for _ in range(5)]
+    assert kept == [True, True, False, False, False]
+    # 其他调用位置有独立的令牌桶，WARNING不受限速影响
+    assert log_filter.filter(make_record(lineno=11))
+    assert log_filter.filter(make_record(level=logging.WARNING))
+    # 令牌补充后，下一条保留的日志带上被抑制的条数
+    now[0] += 1
+    record = make_record()
+    assert log_filter.filter(record)
+    assert record.msg == 'message (suppressed 3 similar messages)'
+    now[0] += 1
+    record = make_record()
+    assert log_filter.filter(record)
+    assert record.msg == 'message'
+
+def test_sampling_filter_samples_by_logger_name():
+    log_filter = SamplingFilter(rate=0, sample_rates={'noisy': 0.0})
+    assert not log_filter.filter(make_record(name='noisy'))
+    assert log_filter.filter(make_record(name='noisy', level=logging.ERROR))
+    assert log_filter.filter(make_record(name='quiet'))
+
+def test_queue_handler_drops_when_full_and_reports_drops():
+    log_queue = queue.Queue(2)
+    handler = NonBlockingQueueHandler(log_queue)
+    for i in range(5):
+        handler.emit(make_record(msg=f'record {i}'))
+    assert handler.dropped == 3
+    assert [log_queue.get_nowait().msg for _ in range(2)] == ['record 0', 'record 1']
+
+    handler.emit(make_record(msg='record 5'))
+    notice, record = log_queue.get_nowait(), log_queue.get_nowait()
+    assert notice.levelno == logging.WARNING
+    assert notice.msg == 'Dropped 3 log records, log queue was full'
+    assert record.msg == 'record 5'
+    assert handler.dropped == 0
+
+def test_queue_handler_keeps_count_when_notice_does_not_fit():
+    log_queue = queue.Queue(1)
+    handler = NonBlockingQueueHandler(log_queue)
+    handler.emit(make_record())
+    handler.emit(make_record())
+    log_queue.get_nowait()
+    handler.emit(make_record(msg='fits'))
+    # 只有通知放得下，计数清零；随后的记录被丢弃并重新计数
+    assert log_queue.get_nowait().levelno == logging.WARNING
+    assert handler.dropped == 1
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from scripts.entity_cache import EntityCache, build_entity_cache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EntityCache(str(tmp_path / 'entities.sqlite3'), freshness=60, max_entries=10)
+    yield cache
+    cache.close()
+
+def test_variants_of_the_same_page_share_an_entry(cache):
+    cache.set('profile', 'https://uk.linkedin.com/in/Jane-Doe/?trk=abc', {'profile': {'name': 'Jane'}})
+    assert cache.get('profile', 'https://www.linkedin.com/in/jane-doe') == {'profile': {'name': 'Jane'}}
+    assert cache.get('company_overview', 'https://www.linkedin.com/in/jane-doe') is None
+
+def test_empty_results_are_not_cached(cache):
+    cache.set('profile', 'https://www.linkedin.com/in/empty', {})
+    cache.set('profile', 'https://www.linkedin.com/in/blank', {'profile': {}, 'posts': []})
+    assert cache.get('profile', 'https://www.linkedin.com/in/empty') is None
+    assert cache.get('profile', 'https://www.linkedin.com/in/blank') is None
+    assert cache.counters['stores'] == 0
+
+def test_async_roundtrip(cache):
+    async def run():
+        await cache.async_set('company_overview', 'https://www.linkedin.com/company/acme/about', {'name': 'Acme'})
+        return await cache.async_get('company_overview', 'https://linkedin.com/company/acme')
+
+    assert asyncio.run(run()) == {'name': 'Acme'}
+
+def test_build_entity_cache(tmp_path):
+    assert build_entity_cache({'enabled': False}, str(tmp_path)) is None
+    cache = build_entity_cache({'enabled': True, 'path': 'cache/entities.sqlite3', 'freshness': 5}, str(tmp_path))
+    try:
+        assert cache.path == str(tmp_path / 'cache' / 'entities.sqlite3')
+        assert cache.ttl == 5
+    finally:
+        cache.close()
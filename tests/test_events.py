@@ -0,0 +1,19 @@
+from scripts import events
+
+def test_source_collector_orders_linkedin_by_rank():
+    collector = events.SourceCollector()
+    collector({"event": events.LINKEDIN, "index": 2, "item": {"name": "c"}})
+    collector({"event": events.GOOGLE, "items": [{"link": "g"}]})
+    collector({"event": events.LINKEDIN, "index": 0, "item": {"name": "a"}})
+    assert collector.sources() == {"google": [{"link": "g"}], "linkedin": [{"name": "a"}, {"name": "c"}]}
+
+def test_source_collector_forwards_events():
+    forwarded = []
+    collector = events.SourceCollector(forwarded.append)
+    token = events.set_event_emitter(collector)
+    try:
+        events.emit_event(events.GOOGLE, items=[])
+    finally:
+        events.reset_event_emitter(token)
+    assert forwarded == [{"event": events.GOOGLE, "items": []}]
+    assert collector.sources() == {"google": [], "linkedin": []}
@@ -0,0 +1,58 @@
+import io
+import json
+import os
+import zlib
+
+import pytest
+
+from scripts.framing import (CODEC_JSON, CODEC_JSON_ZLIB, FRAME_HEADER, MAX_FRAME_SIZE, FrameWriter, LineWriter,
+                             dumps, encode_frame)
+
+def decode_frame(frame: bytes):
+    codec, size = FRAME_HEADER.unpack_from(frame)
+    payload = frame[FRAME_HEADER.size:]
+    assert len(payload) == size
+    return codec, payload
+
+def test_dumps_is_compact_utf8():
+    data = dumps({"name": "Société", "items": [1, 2]})
+    assert b" " not in data
+    assert json.loads(data) == {"name": "Société", "items": [1, 2]}
+    assert "Société".encode('utf-8') in data
+
+def test_small_payload_is_not_compressed():
+    codec, payload = decode_frame(encode_frame(b'{"a":1}', compress_threshold=1024))
+    assert codec == CODEC_JSON
+    assert payload == b'{"a":1}'
+
+def test_large_payload_is_compressed():
+    data = dumps({"text": "x" * 10000})
+    codec, payload = decode_frame(encode_frame(data, compress_threshold=1024))
+    assert codec == CODEC_JSON_ZLIB
+    assert zlib.decompress(payload) == data
+
+def test_zero_threshold_disables_compression():
+    data = b"x" * 100000
+    codec, _ = decode_frame(encode_frame(data, compress_threshold=0))
+    assert codec == CODEC_JSON
+
+def test_oversized_frame_is_rejected():
+    with pytest.raises(ValueError):
+        encode_frame(os.urandom(16) * (MAX_FRAME_SIZE // 16 + 1), compress_threshold=0)
+
+def test_frame_writer_writes_whole_frames():
+    read_fd, write_fd = os.pipe()
+    writer = FrameWriter(write_fd, compress_threshold=0)
+    writer.write(b'{"id":1}')
+    writer.write(b'{"id":2}')
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as reader:
+        stream = reader.read()
+    first = FRAME_HEADER.size + len(b'{"id":1}')
+    assert decode_frame(stream[:first]) == (CODEC_JSON, b'{"id":1}')
+    assert decode_frame(stream[first:]) == (CODEC_JSON, b'{"id":2}')
+
+def test_line_writer_appends_newline():
+    stream = io.BytesIO()
+    LineWriter(stream).write(b'{"id":1}')
+    assert stream.getvalue() == b'{"id":1}\n'
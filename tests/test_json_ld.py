@@ -0,0 +1,63 @@
+import os
+from functools import cached_property
+
+import pytest
+from parsel import Selector
+
+from scripts.linkedin_scraper import extract_json_ld, extract_json_ld_selector, json_ld_text, read_json_ld
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+class Page:
+    """模拟 ScrapeApiResponse，记录是否构建了DOM"""
+
+    def __init__(self, content):
+        self.content = content
+        self.selector_built = False
+
+    @cached_property
+    def selector(self):
+        self.selector_built = True
+        return Selector(text=self.content)
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+@pytest.mark.parametrize('name', ['company_overview.html', 'company_life.html', 'profile.html'])
+def test_fast_path_matches_dom_on_fixtures(name):
+    html = load_fixture(name)
+    assert extract_json_ld(html) == extract_json_ld_selector(Page(html))
+
+@pytest.mark.parametrize('name', ['company_overview.html', 'profile.html'])
+def test_read_json_ld_does_not_build_the_dom(name):
+    page = Page(load_fixture(name))
+    assert read_json_ld(page) is not None
+    assert not page.selector_built
+
+@pytest.mark.parametrize('html', [
+    '<html><body>no structured data</body></html>',
+    # 标记只出现在正文和非script标签中
+    '<html><head><link rel="alternate" type="application/ld+json" href="/x.json"></head>'
+    '<body><p>we publish application/ld+json</p></body></html>',
+])
+def test_pages_without_json_ld(html):
+    assert json_ld_text(html) is None
+    assert extract_json_ld(html) is None
+    assert extract_json_ld_selector(Page(html)) is None
+    assert read_json_ld(Page(html)) is None
+
+def test_marker_outside_a_script_tag_is_skipped():
+    html = ('<html><head><link type="application/ld+json" href="/x.json">'
+            '<script type="application/ld+json">{"@type": "Person", "name": "Jane <b>Doe</b>"}</script>'
+            '<script type="application/ld+json">{"@type": "Organization"}</script></head></html>')
+    assert extract_json_ld(html) == {"@type": "Person", "name": "Jane <b>Doe</b>"}
+    assert extract_json_ld(html) == extract_json_ld_selector(Page(html))
+
+def test_read_json_ld_falls_back_to_the_dom_when_the_fast_path_cannot_decode():
+    # 快速路径取到的是属性中含有标记的普通脚本，DOM路径按 type 属性找到真正的JSON-LD
+    html = ('<html><head><script data-kind="application/ld+json">var x = 1;</script>'
+            '<script type="application/ld+json">{"@type": "Organization", "name": "Acme"}</script></head></html>')
+    page = Page(html)
+    assert read_json_ld(page) == {"@type": "Organization", "name": "Acme"}
+    assert page.selector_built
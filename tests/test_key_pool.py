@@ -0,0 +1,152 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from scripts.key_pool import (KeyPool, KeyUsageStore, NoApiKeyAvailable, TokenBucket, build_key_pool,
+                              parse_api_keys, quota_day, quota_zone, seconds_until_quota_reset)
+
+def test_token_bucket_refills_up_to_burst():
+    bucket = TokenBucket(rate=2, burst=2)
+    now = bucket.updated
+    assert bucket.take(now) and bucket.take(now)
+    assert not bucket.take(now)
+    assert bucket.wait_time(now) == pytest.approx(0.5)
+    # 补充速率为每秒2个，10秒后也只累积到 burst
+    assert bucket.available(now + 10) == 2
+
+def test_token_bucket_without_rate_never_refills():
+    bucket = TokenBucket(rate=0, burst=1)
+    now = bucket.updated
+    assert bucket.take(now)
+    assert bucket.wait_time(now + 100) == float('inf')
+
+def test_acquire_prefers_key_with_tokens_and_quota():
+    pool = KeyPool('test', ['key-a', 'key-b'], rate=0, burst=1, daily_quota=10)
+
+    async def run():
+        return [(await pool.acquire()).value for _ in range(2)]
+
+    assert sorted(asyncio.run(run())) == ['key-a', 'key-b']
+    assert all(key.used_today == 1 for key in pool.keys)
+
+def test_acquire_raises_when_all_keys_exhausted():
+    pool = KeyPool('test', ['key-a'], rate=0, burst=1, max_wait=0.05)
+
+    async def run():
+        await pool.acquire()
+        await pool.acquire()
+
+    with pytest.raises(NoApiKeyAvailable):
+        asyncio.run(run())
+
+def test_rate_limited_key_cools_down_with_backoff():
+    pool = KeyPool('test', ['key-a', 'key-b'], burst=5, cooldown=10, max_cooldown=25)
+    key = pool.keys[0]
+    pool.report_rate_limited(key)
+    first = key.cooldown_until
+    pool.report_rate_limited(key)
+    pool.report_rate_limited(key)
+    # 10s -> 20s -> 25s（上限）
+    assert key.cooldown_until - first == pytest.approx(15, abs=1)
+    assert key.counters['rate_limited'] == 3
+
+    async def run():
+        return (await pool.acquire()).value
+
+    assert asyncio.run(run()) == 'key-b'
+    pool.report_success(key)
+    assert key.consecutive_failures == 0
+
+def test_retry_after_overrides_backoff():
+    pool = KeyPool('test', ['key-a'], cooldown=10)
+    key = pool.keys[0]
+    pool.report_rate_limited(key, retry_after=2)
+    assert key.cooldown_until - key.bucket.updated == pytest.approx(2, abs=1)
+
+def test_quota_exhausted_key_is_unusable():
+    pool = KeyPool('test', ['key-a'], daily_quota=100)
+    key = pool.keys[0]
+    pool.report_quota_exhausted(key)
+    assert key.remaining_quota() == 0
+    assert not key.usable(key.bucket.updated)
+    assert pool.stats()[0]['remaining_quota'] == 0
+
+def test_stats_do_not_expose_full_key():
+    pool = KeyPool('test', ['secret-key-1234'])
+    assert pool.stats()[0]['key'] == '...1234'
+
+def test_parse_api_keys_prefers_env(monkeypatch):
+    monkeypatch.setenv('TEST_API_KEYS', 'a, b,a,,c')
+    assert parse_api_keys('TEST_API_KEYS', {'api_keys': ['x']}) == ['a', 'b', 'c']
+    monkeypatch.delenv('TEST_API_KEYS')
+    assert parse_api_keys('TEST_API_KEYS', {'api_keys': ['x', 'y', 'x']}) == ['x', 'y']
+    assert parse_api_keys('TEST_API_KEYS', {'api_key': 'z'}) == ['z']
+    assert parse_api_keys('TEST_API_KEYS', {}) == []
+
+def test_build_key_pool_reads_section():
+    pool = build_key_pool('google', ['a'], {'rate_per_second': 3, 'burst': 7, 'daily_quota': 100, 'max_key_wait': 1})
+    assert len(pool) == 1
+    assert pool.keys[0].bucket.rate == 3
+    assert pool.keys[0].bucket.burst == 7
+    assert pool.keys[0].daily_quota == 100
+    assert pool.max_wait == 1
+
+def test_quota_resets_at_pacific_midnight():
+    zone = quota_zone('America/Los_Angeles')
+    # 2024-01-15 07:30 UTC 是太平洋标准时间 1月14日 23:30
+    winter = datetime(2024, 1, 15, 7, 30, tzinfo=timezone.utc).timestamp()
+    assert quota_day(winter, zone) == '2024-01-14'
+    assert seconds_until_quota_reset(winter, zone) == pytest.approx(1800)
+    # 夏令时：2024-07-15 06:30 UTC 是太平洋夏令时 7月14日 23:30
+    summer = datetime(2024, 7, 15, 6, 30, tzinfo=timezone.utc).timestamp()
+    assert quota_day(summer, zone) == '2024-07-14'
+    assert seconds_until_quota_reset(summer, zone) == pytest.approx(1800)
+
+def test_shared_store_enforces_limits_across_processes(tmp_path):
+    path = str(tmp_path / 'usage.sqlite3')
+    # 两个用量表实例模拟两个进程
+    stores = [KeyUsageStore(path), KeyUsageStore(path)]
+    first, second = [KeyPool('test', ['key-a'], rate=0, burst=2, daily_quota=3, max_wait=0.05, store=store)
+                     for store in stores]
+
+    async def acquire(pool):
+        return (await pool.acquire()).value
+
+    try:
+        assert asyncio.run(acquire(first)) == 'key-a'
+        assert asyncio.run(acquire(second)) == 'key-a'
+        # 两个进程合计只有 burst 个令牌
+        with pytest.raises(NoApiKeyAvailable):
+            asyncio.run(acquire(first))
+        assert second.keys[0].used_today == 2
+    finally:
+        for store in stores:
+            store.close()
+
+def test_shared_store_propagates_cooldown(tmp_path):
+    path = str(tmp_path / 'usage.sqlite3')
+    stores = [KeyUsageStore(path), KeyUsageStore(path)]
+    first, second = [KeyPool('test', ['key-a', 'key-b'], rate=0, burst=5, max_wait=0.05, store=store)
+                     for store in stores]
+
+    async def acquire(pool):
+        return (await pool.acquire()).value
+
+    try:
+        asyncio.run(acquire(first))
+        first.report_quota_exhausted(first.keys[0])
+        # 冷却在下一次 acquire 时写入共享用量表，之后另一个进程也不再使用该key
+        assert asyncio.run(acquire(first)) == 'key-b'
+        assert [asyncio.run(acquire(second)) for _ in range(2)] == ['key-b', 'key-b']
+        assert not second.keys[0].usable(time.time())
+    finally:
+        for store in stores:
+            store.close()
+
+def test_build_key_pool_opens_usage_store(tmp_path):
+    pool = build_key_pool('google', ['a'], {'usage_path': 'usage.sqlite3'}, str(tmp_path))
+    assert pool.store is not None
+    assert pool.store.path == str(tmp_path / 'usage.sqlite3')
+    assert build_key_pool('google', ['a'], {}).store is None
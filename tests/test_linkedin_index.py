@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from scripts.linkedin_index import LinkedInIndex, build_linkedin_index, name_query
+
+ACME = 'https://www.linkedin.com/company/acme'
+
+@pytest.fixture
+def index(tmp_path):
+    index = LinkedInIndex(str(tmp_path / 'index.sqlite3'), refresh_after=100, name_min_confirmations=2)
+    yield index
+    index.store.close()
+
+def test_name_query_is_order_and_suffix_insensitive():
+    assert name_query('Acme Labs Inc.', 'Germany') == name_query('labs acme', 'DE') == 'acme labs|DE'
+    assert name_query('Acme', 'Atlantis') == 'acme|Atlantis'
+    assert name_query('', 'DE') == ''
+
+def test_domain_hit_is_trusted_immediately(index):
+    index.learn(ACME, 'Acme', url='https://www.acme.com', email='jane@acme.de')
+    for url, email in (('acme.com', ''), ('', 'bob@acme.de')):
+        hit = index.lookup('Something Else', url=url, email=email)
+        assert hit is not None
+        assert (hit.url, hit.source, hit.stale) == (ACME, 'domain', False)
+
+def test_free_email_domains_are_not_learned(index):
+    index.learn(ACME, 'Acme', email='jane@gmail.com')
+    assert index.lookup('Other', email='bob@gmail.com') is None
+
+def test_name_hit_needs_confirmations(index):
+    index.learn(ACME, 'Acme', country='US')
+    assert index.lookup('Acme', country='United States') is None
+    index.learn(ACME, 'Acme', country='US')
+    hit = index.lookup('Acme', country='United States')
+    assert (hit.url, hit.source) == (ACME, 'name')
+
+def test_moved_mapping_restarts_confirmations(index):
+    index.learn(ACME, 'Acme', country='US')
+    index.learn(ACME, 'Acme', country='US')
+    index.learn('https://www.linkedin.com/company/acme-new', 'Acme', country='US')
+    assert index.lookup('Acme', country='US') is None
+
+def test_old_entries_are_stale(index, monkeypatch):
+    index.learn(ACME, 'Acme', url='acme.com')
+    now = time.time()
+    monkeypatch.setattr('scripts.linkedin_index.time.time', lambda: now + 101)
+    assert index.lookup('Acme', url='acme.com').stale
+
+def test_async_lookup_and_learn(index):
+    async def run():
+        await index.async_learn(ACME, 'Acme', 'acme.com')
+        return await index.async_lookup('Acme', 'acme.com')
+
+    assert asyncio.run(run()).url == ACME
+
+def test_schedule_refresh_deduplicates_and_drains(index):
+    calls = []
+
+    async def run():
+        async def refresh():
+            await asyncio.sleep(0)
+            calls.append(1)
+
+        index.schedule_refresh('domain:acme.com', refresh)
+        index.schedule_refresh('domain:acme.com', refresh)
+        await index.drain(timeout=1)
+
+    asyncio.run(run())
+    assert calls == [1]
+
+def test_build_linkedin_index(tmp_path):
+    assert build_linkedin_index({'enabled': False}, str(tmp_path)) is None
+    index = build_linkedin_index({'enabled': True, 'path': 'index.sqlite3', 'name_min_confirmations': 3}, str(tmp_path))
+    try:
+        assert index.store.path == str(tmp_path / 'index.sqlite3')
+        assert index.name_min_confirmations == 3
+    finally:
+        index.store.close()
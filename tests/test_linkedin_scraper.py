@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from scripts import linkedin_scraper
+from scripts.key_pool import KeyPool
+from scripts.linkedin_scraper import (SCRAPE_TIERS, ScrapflyConfig, get_scrapfly_client, has_json_ld_node, scrape_many,
+                                     scrape_tiered)
+from scripts.scrape_tiers import ScrapeTierTracker
+
+LOGIN_WALL_PAGE = '<html><body><form action="/uas/login-submit"></form></body></html>'
+ORGANIZATION_PAGE = ('<html><head><script type="application/ld+json">'
+                     '{"@graph": [{"@type": "Organization", "name": "Acme"}]}</script></head></html>')
+
+class FakeResponse:
+    def __init__(self, url, content=ORGANIZATION_PAGE, status_code=200):
+        self.content = content
+        self.status_code = status_code
+        self.context = {"url": url}
+
+class FakeClient:
+    """记录同时进行的请求数，按URL返回预设的页面"""
+
+    def __init__(self, delay=0.01):
+        self.delay = delay
+        self.pages = {}
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+
+    async def async_scrape(self, scrape_config):
+        self.calls.append(scrape_config)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        content, status_code = self.pages.get(scrape_config.url, (ORGANIZATION_PAGE, 200))
+        return FakeResponse(scrape_config.url, content, status_code)
+
+@pytest.fixture
+def scrapfly(monkeypatch):
+    """不读取配置、不请求Scrapfly的抓取环境，返回 (配置, 假客户端)"""
+    config = ScrapflyConfig.__new__(ScrapflyConfig)
+    config.api_key = 'test-key'
+    config.api_keys = ['test-key']
+    config.key_pool = KeyPool('Scrapfly', ['test-key'], rate=1e6, burst=1e6)
+    config.concurrency = 2
+    config.host = None
+    config.tiers = ScrapeTierTracker([name for name, _ in SCRAPE_TIERS], enabled=False)
+    config.cache = None
+    client = FakeClient()
+    monkeypatch.setattr(linkedin_scraper, '_scrapfly_config', config)
+    monkeypatch.setattr(linkedin_scraper, '_scrapfly_clients', {'test-key': client})
+    return config, client
+
+def test_scrape_concurrency_is_shared_between_tasks(scrapfly):
+    config, client = scrapfly
+
+    async def task(prefix):
+        urls = [f"https://www.linkedin.com/company/{prefix}-{i}" for i in range(4)]
+        return [response async for response in scrape_many(urls, 'Organization')]
+
+    async def run():
+        return await asyncio.gather(task('a'), task('b'))
+
+    results = asyncio.run(run())
+    assert [len(responses) for responses in results] == [4, 4]
+    # 两个任务合计不超过 [scrapfly] concurrency
+    assert client.max_active == config.concurrency
+    assert len(client.calls) == 8
+
+def test_clients_share_executor_sized_from_concurrency(scrapfly, monkeypatch):
+    config, _ = scrapfly
+    config.concurrency = 12
+    monkeypatch.setattr(linkedin_scraper, '_scrapfly_clients', {})
+    monkeypatch.setattr(linkedin_scraper, '_scrapfly_executor', None)
+    first, second = get_scrapfly_client('key-a'), get_scrapfly_client('key-b')
+    try:
+        assert first.async_executor is second.async_executor
+        assert first.async_executor._max_workers == 12
+    finally:
+        first.async_executor.shutdown()
+
+def test_has_json_ld_node():
+    assert has_json_ld_node(FakeResponse('u'), 'Organization')
+    assert not has_json_ld_node(FakeResponse('u'), 'Person')
+    assert not has_json_ld_node(FakeResponse('u', LOGIN_WALL_PAGE), 'Organization')
+    assert not has_json_ld_node(FakeResponse('u', None), 'Organization')
+
+def test_tiered_scrape_escalates_until_valid(scrapfly):
+    config, client = scrapfly
+    config.tiers.enabled = True
+    url = 'https://www.linkedin.com/company/acme'
+    client.pages[url] = (LOGIN_WALL_PAGE, 200)
+    original = client.async_scrape
+
+    async def wall_until_render(scrape_config):
+        # 只有完整配置（渲染）才能拿到页面
+        if scrape_config.render_js:
+            client.pages.pop(url, None)
+        return await original(scrape_config)
+
+    client.async_scrape = wall_until_render
+    response = asyncio.run(scrape_tiered(url, 'Organization'))
+    assert has_json_ld_node(response, 'Organization')
+    assert len(client.calls) == 3
+    assert config.tiers.stats()['patterns'] == {'linkedin.com/company': 'render'}
+
+def test_page_failing_every_tier_costs_one_request_next_time(scrapfly):
+    config, client = scrapfly
+    config.tiers.enabled = True
+    url, variant = 'https://www.linkedin.com/company/walled', 'https://uk.linkedin.com/company/Walled/?trk=x'
+    client.pages[url] = client.pages[variant] = (LOGIN_WALL_PAGE, 200)
+    asyncio.run(scrape_tiered(url, 'Organization'))
+    assert len(client.calls) == 3
+    # 同一页面（不同写法）在 negative_ttl 内只请求最高档位
+    response = asyncio.run(scrape_tiered(variant, 'Organization'))
+    assert not has_json_ld_node(response, 'Organization')
+    assert len(client.calls) == 4
+    assert client.calls[-1].render_js
+    # 其他页面不受影响
+    asyncio.run(scrape_tiered('https://www.linkedin.com/company/acme', 'Organization'))
+    assert not client.calls[-1].render_js
+
+def test_missing_page_is_not_escalated(scrapfly):
+    config, client = scrapfly
+    config.tiers.enabled = True
+    url = 'https://www.linkedin.com/in/deleted-profile'
+    client.pages[url] = ('<html>Page not found</html>', 404)
+    response = asyncio.run(scrape_tiered(url, 'Person'))
+    assert response.status_code == 404
+    assert len(client.calls) == 1
+    assert config.tiers.failed_recently(url)
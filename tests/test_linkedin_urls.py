@@ -0,0 +1,38 @@
+import pytest
+
+from scripts.linkedin_urls import canonical_linkedin_url, entity_url, parse_linkedin_entity
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.linkedin.com/company/nokia', ('company', 'nokia')),
+    ('https://uk.linkedin.com/company/Nokia/about?trk=abc', ('company', 'nokia')),
+    ('linkedin.com/company/nokia/', ('company', 'nokia')),
+    ('http://de.linkedin.com:443/in/Jane-Doe/recent-activity/', ('person', 'jane-doe')),
+    ('https://www.linkedin.com/in/J%C3%BCrgen-M%C3%BCller', ('person', 'j%C3%BCrgen-m%C3%BCller')),
+    ('https://www.linkedin.com/in/Jürgen-Müller', ('person', 'j%C3%BCrgen-m%C3%BCller')),
+])
+def test_parse_linkedin_entity(url, expected):
+    assert parse_linkedin_entity(url) == expected
+
+@pytest.mark.parametrize('url', [
+    'https://www.linkedin.com/posts/nokia_activity-123',
+    'https://www.linkedin.com/showcase/nokia-bell-labs',
+    'https://www.linkedin.com/school/mit/',
+    'https://www.linkedin.com/company/',
+    'https://notlinkedin.com/company/nokia',
+    'https://example.com/in/jane',
+    '',
+])
+def test_non_entity_pages(url):
+    assert parse_linkedin_entity(url) is None
+
+def test_entity_url():
+    assert entity_url('company', 'nokia') == 'https://www.linkedin.com/company/nokia'
+    assert entity_url('person', 'jane-doe') == 'https://www.linkedin.com/in/jane-doe'
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://uk.linkedin.com/company/Nokia/?trk=abc', 'https://www.linkedin.com/company/nokia'),
+    ('https://www.linkedin.com/company/nokia/life', 'https://www.linkedin.com/company/nokia'),
+    ('https://de.linkedin.com/Posts/Nokia_Activity/?x=1#top', 'https://www.linkedin.com/posts/nokia_activity'),
+])
+def test_canonical_linkedin_url(url, expected):
+    assert canonical_linkedin_url(url) == expected
@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from scripts import metrics, metrics_exporter
+from scripts.metrics import MetricsRegistry, record_stage, start_task_timing, stop_task_timing, timed
+from scripts.metrics_exporter import MetricsExporter, start_metrics_exporter
+
+@pytest.fixture
+def registry(monkeypatch):
+    """替换进程内共享的 REGISTRY，测试之间互不影响"""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, 'REGISTRY', registry)
+    return registry
+
+def test_counters_render_sorted_series_with_escaped_labels(registry):
+    registry.inc('upstream_responses_total', help='Upstream responses', upstream='google', status=200)
+    registry.inc('upstream_responses_total', upstream='google', status=200)
+    registry.inc('upstream_responses_total', upstream='google', status=429)
+    registry.inc('upstream_bytes_total', 1.5, help='Bytes', upstream='say "hi"\n')
+    assert registry.render().splitlines() == [
+        '# HELP cy_crawler_upstream_bytes_total Bytes',
+        '# TYPE cy_crawler_upstream_bytes_total counter',
+        'cy_crawler_upstream_bytes_total{upstream="say \\"hi\\"\\n"} 1.5',
+        '# HELP cy_crawler_upstream_responses_total Upstream responses',
+        '# TYPE cy_crawler_upstream_responses_total counter',
+        'cy_crawler_upstream_responses_total{status="200",upstream="google"} 2',
+        'cy_crawler_upstream_responses_total{status="429",upstream="google"} 1',
+    ]
+
+def test_histogram_buckets_are_cumulative(registry):
+    for value in (0.003, 0.02, 0.02, 200):
+        registry.observe('stage_seconds', value, help='Stage time', stage='parse')
+    lines = registry.render().splitlines()
+    assert lines[:2] == ['# HELP cy_crawler_stage_seconds Stage time', '# TYPE cy_crawler_stage_seconds histogram']
+    assert 'cy_crawler_stage_seconds_bucket{stage="parse",le="0.005"} 1' in lines
+    assert 'cy_crawler_stage_seconds_bucket{stage="parse",le="0.025"} 3' in lines
+    # 超过最大桶的观测值只计入 +Inf
+    assert 'cy_crawler_stage_seconds_bucket{stage="parse",le="120"} 3' in lines
+    assert 'cy_crawler_stage_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+    assert 'cy_crawler_stage_seconds_sum{stage="parse"} 200.043' in lines
+    assert lines[-1] == 'cy_crawler_stage_seconds_count{stage="parse"} 4'
+
+def test_collectors_render_gauges_and_failures_are_skipped(registry):
+    def broken():
+        raise RuntimeError('boom')
+
+    registry.add_collector(broken)
+    registry.add_collector(lambda: [('circuit_state', 'Breaker state', {'upstream': 'scrapfly'}, 2),
+                                    ('circuit_state', 'Breaker state', {'upstream': 'google'}, 0)])
+    assert registry.render() == ('# HELP cy_crawler_circuit_state Breaker state\n'
+                                 '# TYPE cy_crawler_circuit_state gauge\n'
+                                 'cy_crawler_circuit_state{upstream="scrapfly"} 2\n'
+                                 'cy_crawler_circuit_state{upstream="google"} 0\n')
+
+def test_stage_timing_accumulates_into_the_current_task(registry):
+    token, timing = start_task_timing()
+    try:
+        record_stage('scrape', 0.25)
+        record_stage('scrape', 0.5)
+        with timed('parse'):
+            pass
+    finally:
+        stop_task_timing(token)
+    assert timing['scrape'] == 750.0
+    assert 'parse' in timing
+    # 任务结束后的记录只进入直方图
+    record_stage('scrape', 1)
+    assert timing['scrape'] == 750.0
+    assert registry.histograms['stage_seconds'].series[(('stage', 'scrape'),)][-1] == 3
+
+def test_exporter_writes_the_textfile_atomically(registry, tmp_path):
+    registry.inc('tasks_total', help='Tasks')
+    path = tmp_path / 'metrics' / 'crawler.prom'
+    MetricsExporter(str(path), 0, 15).write()
+    assert path.read_text(encoding='utf-8') == registry.render()
+    assert not (tmp_path / 'metrics' / 'crawler.prom.tmp').exists()
+
+def test_exporter_serves_metrics_over_http(registry):
+    registry.inc('tasks_total', help='Tasks')
+
+    async def run():
+        exporter = MetricsExporter(None, 0, 15)
+        server = await asyncio.start_server(exporter._handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return response
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    head, body = asyncio.run(run()).split(b'\r\n\r\n', 1)
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    assert b'Content-Type: text/plain; version=0.0.4' in head
+    assert body.decode('utf-8') == registry.render()
+
+def test_start_metrics_exporter_reads_config(registry, tmp_path, monkeypatch):
+    config = {'enabled': False, 'textfile': 'metrics/crawler-{pid}.prom', 'flush_interval': 3600}
+    monkeypatch.setattr(metrics_exporter, 'get_section', lambda name: config)
+    monkeypatch.setattr(metrics_exporter, 'PROJECT_ROOT', str(tmp_path))
+    monkeypatch.setattr(metrics_exporter.os, 'getpid', lambda: 1234)
+
+    async def run():
+        exporter = await start_metrics_exporter()
+        if exporter:
+            await exporter.stop()
+        return exporter
+
+    assert asyncio.run(run()) is None
+    config['enabled'] = True
+    exporter = asyncio.run(run())
+    assert exporter.path == str(tmp_path / 'metrics' / 'crawler-1234.prom')
+    # stop() 写入最后一次指标
+    assert (tmp_path / 'metrics' / 'crawler-1234.prom').exists()
@@ -0,0 +1,80 @@
+import pytest
+
+from scripts import output_schema
+from scripts.output_schema import (FULL, FULL_SCHEMA, OutputSchema, compile_fields, get_output_schema,
+                                   reset_output_schema, resolve_output_schema, set_output_schema)
+
+@pytest.fixture
+def output_config(monkeypatch):
+    config = {
+        'default': 'slim',
+        'schemas': {
+            'slim': {'max_items': 2, 'company': {'overview': ['name'], 'google': []}},
+            'wide': {'max_string': 4},
+        },
+        'tenants': {'tenant-a': 'wide'},
+    }
+    monkeypatch.setattr(output_schema, 'get_section', lambda name: config)
+    output_schema.load_output_schemas.cache_clear()
+    yield config
+    output_schema.load_output_schemas.cache_clear()
+
+def test_compile_fields():
+    assert compile_fields(['name', 'address.addressCountry', 'address.addressLocality']) == {
+        'name': None, 'address': {'addressCountry': None, 'addressLocality': None}}
+    # 整个字段和子字段同时出现时保留整个字段
+    assert compile_fields(['address', 'address.addressCountry']) == {'address': None}
+
+def test_full_schema_returns_value_unchanged():
+    value = {'name': 'Acme', 'posts': [1, 2, 3]}
+    assert FULL_SCHEMA.full
+    assert FULL_SCHEMA.project('company', 'overview', value) is value
+    assert FULL_SCHEMA.key == FULL
+
+def test_project_selects_nested_fields_in_lists():
+    schema = OutputSchema('s', {'person': {'posts': ['headline', 'author.name']}})
+    posts = [{'headline': 'a', 'body': 'x', 'author': {'name': 'Jane', 'url': 'u'}}, {'body': 'y'}]
+    assert schema.project('person', 'posts', posts) == [{'headline': 'a', 'author': {'name': 'Jane'}}, {}]
+    # 没有列出的部分保留全部字段
+    assert schema.project('person', 'profile', {'name': 'Jane'}) == {'name': 'Jane'}
+
+def test_empty_field_list_drops_section():
+    schema = OutputSchema('s', {'company': {'google': []}})
+    assert not schema.includes('company', 'google')
+    assert schema.project('company', 'google', [{'title': 'x'}]) == []
+    assert schema.project('company', 'overview', {'name': 'Acme'}) == {'name': 'Acme'}
+
+def test_limits_lists_and_strings():
+    schema = OutputSchema('s', max_items=2, max_string=3)
+    assert schema.project('person', 'posts', [{'headline': 'abcdef'}] * 5) == [{'headline': 'abc'}] * 2
+    assert list(schema.limit(range(10))) == [0, 1]
+    assert schema.filled([1, 2]) and not schema.filled([1])
+
+def test_selects():
+    schema = OutputSchema('s', {'company': {'overview': ['name']}})
+    assert schema.selects('company', 'overview', 'name')
+    assert not schema.selects('company', 'overview', 'description')
+    assert schema.selects('company', 'life', 'anything')
+
+def test_key_changes_with_definition():
+    first = OutputSchema('s', {'company': {'overview': ['name']}})
+    second = OutputSchema('s', {'company': {'overview': ['name', 'url']}})
+    assert first.key.startswith('s-')
+    assert first.key != second.key
+    assert first.key == OutputSchema('s', {'company': {'overview': ['name']}}).key
+
+def test_resolve_output_schema(output_config):
+    assert resolve_output_schema().name == 'slim'
+    assert resolve_output_schema(tenant='tenant-a').name == 'wide'
+    assert resolve_output_schema('full', tenant='tenant-a').name == FULL
+    # 未知的名称使用默认schema
+    assert resolve_output_schema('missing', tenant='tenant-a').name == 'slim'
+    assert resolve_output_schema(tenant='unknown').name == 'slim'
+
+def test_output_schema_context():
+    schema = OutputSchema('s', max_items=1)
+    assert get_output_schema() is FULL_SCHEMA
+    token = set_output_schema(schema)
+    assert get_output_schema() is schema
+    reset_output_schema(token)
+    assert get_output_schema() is FULL_SCHEMA
@@ -0,0 +1,94 @@
+import asyncio
+import os
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from scripts import parse_pool
+from scripts.linkedin_scraper import parse_company_overview
+from scripts.parse_pool import (INLINE, PROCESS, THREAD, HtmlPage, ParseExecutor, configure_parse_executor,
+                                get_parse_executor, shutdown_parse_executor)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures')
+
+@pytest.fixture(scope='module')
+def overview_html():
+    with open(os.path.join(FIXTURE_DIR, 'company_overview.html'), 'r', encoding='utf-8') as f:
+        return f.read()
+
+class BrokenExecutor(Executor):
+    """模拟子进程被杀后的进程池：每次提交都以 BrokenProcessPool 失败"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.shutdowns = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted += 1
+        future = Future()
+        future.set_exception(BrokenProcessPool('a child process terminated abruptly'))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shutdowns += 1
+
+def parse_in(executor, parse, *pages):
+    async def run():
+        return await asyncio.gather(*(executor.parse(parse, page) for page in pages))
+    return asyncio.run(run())
+
+def test_unknown_or_auto_kind(monkeypatch):
+    assert ParseExecutor('gpu').kind == INLINE
+    monkeypatch.setattr(parse_pool, 'free_threaded', lambda: False)
+    assert ParseExecutor('auto').kind == PROCESS
+    monkeypatch.setattr(parse_pool, 'free_threaded', lambda: True)
+    assert ParseExecutor('auto').kind == THREAD
+    assert ParseExecutor(THREAD, workers=3).workers == 3
+    assert 1 <= ParseExecutor(THREAD).workers <= parse_pool.DEFAULT_MAX_WORKERS
+
+@pytest.mark.parametrize('kind', [INLINE, THREAD, PROCESS])
+def test_executors_parse_like_inline(kind, overview_html):
+    expected = parse_company_overview(HtmlPage(overview_html))
+    executor = ParseExecutor(kind, workers=2)
+    try:
+        results = parse_in(executor, parse_company_overview, HtmlPage(overview_html), HtmlPage(overview_html))
+    finally:
+        executor.shutdown()
+    assert results == [expected, expected]
+    assert executor._executor is None
+
+def test_broken_process_pool_falls_back_to_inline_and_restarts_once(monkeypatch, overview_html):
+    executor = ParseExecutor(PROCESS, workers=2)
+    pools = []
+
+    def create():
+        pools.append(BrokenExecutor())
+        return pools[-1]
+
+    monkeypatch.setattr(executor, '_create', create)
+    expected = parse_company_overview(HtmlPage(overview_html))
+    results = parse_in(executor, parse_company_overview, *(HtmlPage(overview_html) for _ in range(3)))
+    # 当次解析在事件循环中完成，同时失败的解析只关闭一次进程池
+    assert results == [expected] * 3
+    assert len(pools) == 1
+    assert pools[0].submitted == 3
+    assert pools[0].shutdowns == 1
+    assert executor._executor is None
+
+    # 下一次解析重建进程池
+    parse_in(executor, parse_company_overview, HtmlPage(overview_html))
+    assert len(pools) == 2
+
+def test_shared_executor_follows_config(monkeypatch):
+    monkeypatch.setattr(parse_pool, 'get_section', lambda name: {'executor': THREAD, 'workers': 2})
+    monkeypatch.setattr(parse_pool, '_parse_executor', None)
+    try:
+        shared = get_parse_executor()
+        assert (shared.kind, shared.workers) == (THREAD, 2)
+        assert get_parse_executor() is shared
+        # 参数优先于配置
+        assert configure_parse_executor(INLINE, 1).kind == INLINE
+        assert get_parse_executor() is not shared
+    finally:
+        shutdown_parse_executor()
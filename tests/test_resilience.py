@@ -0,0 +1,126 @@
+import asyncio
+
+import pytest
+
+from scripts.resilience import (CLOSED, FAIL, HALF_OPEN, OPEN, RETRY, CircuitBreaker, CircuitOpen,
+                                RetryPolicy, Upstream)
+
+class UpstreamError(Exception):
+    pass
+
+class BadRequest(Exception):
+    pass
+
+def classify(error):
+    if isinstance(error, UpstreamError):
+        return RETRY
+    if isinstance(error, ConnectionError):
+        return FAIL
+    return None
+
+def make_upstream(max_attempts=3, failure_threshold=5, reset_timeout=30.0):
+    return Upstream('test', RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0),
+                    CircuitBreaker('test', failure_threshold=failure_threshold, reset_timeout=reset_timeout),
+                    classify)
+
+def flaky(failures, error=UpstreamError):
+    """前 failures 次调用抛出 error，之后返回调用次数"""
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise error()
+        return len(calls)
+
+    return operation, calls
+
+def test_retry_delay_is_capped_full_jitter():
+    policy = RetryPolicy(max_attempts=3, base_delay=0.5, max_delay=2)
+    for attempt in range(6):
+        assert 0 <= policy.delay(attempt) <= min(2, 0.5 * 2 ** attempt)
+    assert RetryPolicy(max_attempts=0).max_attempts == 1
+
+def test_transient_failures_are_retried():
+    upstream = make_upstream()
+    operation, calls = flaky(2)
+    assert asyncio.run(upstream.call(operation)) == 3
+    assert upstream.counters == {'calls': 1, 'retries': 2}
+    assert upstream.breaker.state == CLOSED
+    assert upstream.breaker.consecutive_failures == 0
+
+def test_gives_up_after_max_attempts():
+    upstream = make_upstream(max_attempts=2)
+    operation, calls = flaky(5)
+    with pytest.raises(UpstreamError):
+        asyncio.run(upstream.call(operation))
+    assert len(calls) == 2
+
+def test_fail_is_counted_but_not_retried():
+    upstream = make_upstream()
+    operation, calls = flaky(5, ConnectionError)
+    with pytest.raises(ConnectionError):
+        asyncio.run(upstream.call(operation))
+    assert len(calls) == 1
+    assert upstream.breaker.consecutive_failures == 1
+
+def test_unclassified_errors_do_not_affect_breaker():
+    upstream = make_upstream()
+    operation, calls = flaky(5, BadRequest)
+    with pytest.raises(BadRequest):
+        asyncio.run(upstream.call(operation))
+    assert len(calls) == 1
+    assert upstream.breaker.counters['failures'] == 0
+
+def test_breaker_opens_rejects_and_half_opens(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('scripts.resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=10, half_open_max=1)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    assert breaker.counters['rejected'] == 1
+
+    clock[0] += 10
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    # 半开状态只放行 half_open_max 个探测
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_failed_probe_reopens_breaker(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('scripts.resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.counters['opened'] == 2
+
+def test_released_probe_frees_the_slot(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('scripts.resilience.time.monotonic', lambda: clock[0])
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=10)
+    breaker.record_failure()
+    clock[0] += 10
+    breaker.before_call()
+    breaker.release_probe()
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+def test_open_breaker_stops_retries():
+    upstream = make_upstream(max_attempts=5, failure_threshold=2)
+    operation, calls = flaky(10)
+    with pytest.raises(UpstreamError):
+        asyncio.run(upstream.call(operation))
+    assert len(calls) == 2
+    with pytest.raises(CircuitOpen):
+        asyncio.run(upstream.call(operation))
+    assert len(calls) == 2
@@ -0,0 +1,53 @@
+import time
+
+from scripts.scrape_tiers import ScrapeTierTracker, url_pattern
+
+TIERS = ['plain', 'asp', 'render']
+
+def test_url_pattern():
+    assert url_pattern('https://www.linkedin.com/company/biogenex') == 'linkedin.com/company'
+    assert url_pattern('https://uk.linkedin.com:443/in/Jane-Doe/') == 'uk.linkedin.com/in'
+
+def test_start_uses_remembered_tier_and_probes_cheapest():
+    tracker = ScrapeTierTracker(TIERS, probe_interval=3)
+    assert tracker.start('linkedin.com/company') == 0
+    tracker.remember('linkedin.com/company', 1)
+    # 每 probe_interval 次请求从最便宜的档位重新尝试一次
+    assert [tracker.start('linkedin.com/company') for _ in range(3)] == [1, 1, 0]
+    assert tracker.stats()['patterns'] == {'linkedin.com/company': 'asp'}
+
+def test_disabled_tracker_always_uses_full_config():
+    tracker = ScrapeTierTracker(TIERS, enabled=False)
+    assert tracker.start('linkedin.com/company') == 2
+
+def test_failed_url_goes_straight_to_last_tier(monkeypatch):
+    tracker = ScrapeTierTracker(TIERS, negative_ttl=60)
+    key = 'https://www.linkedin.com/company/gone'
+    tracker.remember_failure(key)
+    assert tracker.start('linkedin.com/company', key) == 2
+    assert tracker.start('linkedin.com/company', 'https://www.linkedin.com/company/other') == 0
+    assert tracker.stats()['negative'] == {'urls': 1, 'hits': 1}
+    # 过期后重新从记住的档位开始
+    now = time.time()
+    monkeypatch.setattr('scripts.scrape_tiers.time.time', lambda: now + 61)
+    assert tracker.start('linkedin.com/company', key) == 0
+    assert not tracker.failed
+
+def test_forget_failure_and_zero_ttl():
+    tracker = ScrapeTierTracker(TIERS)
+    tracker.remember_failure('a')
+    tracker.forget_failure('a')
+    assert not tracker.failed_recently('a')
+    tracker = ScrapeTierTracker(TIERS, negative_ttl=0)
+    tracker.remember_failure('a')
+    assert not tracker.failed_recently('a')
+
+def test_record_counts_outcomes():
+    tracker = ScrapeTierTracker(TIERS)
+    tracker.record(0, 'invalid', 0.5)
+    tracker.record(0, 'successes', 1.5)
+    stats = tracker.stats()['tiers']['plain']
+    assert stats['attempts'] == 2
+    assert stats['success_rate'] == 0.5
+    assert stats['avg_latency'] == 1.0
+    assert stats['max_latency'] == 1.5
@@ -0,0 +1,91 @@
+import asyncio
+import sqlite3
+import time
+
+import pytest
+
+from scripts.search_cache import SearchCache, normalize_query
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SearchCache(str(tmp_path / 'search.sqlite3'), ttl=60, negative_ttl=10, max_entries=3,
+                        flush_interval=3600)
+    yield cache
+    cache.close()
+
+def shared_stats(cache):
+    """直接读取数据库中的共享计数，不经过 stats()（它会先 flush）"""
+    conn = sqlite3.connect(cache.path)
+    try:
+        return dict(conn.execute("SELECT name, value FROM stats").fetchall())
+    finally:
+        conn.close()
+
+def test_normalize_query():
+    assert normalize_query("BioGenex+site:biogenex.com") == "biogenex site:biogenex.com"
+    assert normalize_query("  Acme   Corp \t") == "acme corp"
+    assert normalize_query(None) == ""
+
+def test_get_set_roundtrip_uses_normalized_key(cache):
+    cache.set('company', 'Acme+Corp', {'items': [1]})
+    assert cache.get('company', 'acme corp') == {'items': [1]}
+    assert cache.get('person', 'acme corp') is None
+
+def test_expired_entry_is_a_miss(cache, monkeypatch):
+    cache.set('company', 'acme', {'items': [1]})
+    cache.set('company', 'empty', {})
+    now = time.time()
+    monkeypatch.setattr('scripts.search_cache.time.time', lambda: now + 30)
+    # 有结果的条目60秒过期，negative条目10秒过期
+    assert cache.get('company', 'acme') == {'items': [1]}
+    assert cache.get('company', 'empty') is None
+    assert cache.counters['expired'] == 1
+
+def test_counters_are_flushed_in_batches(cache):
+    cache.set('company', 'acme', {'items': [1]})
+    cache.get('company', 'acme')
+    cache.get('company', 'missing')
+    assert cache.counters['hits'] == 1
+    assert cache.counters['misses'] == 1
+    # flush 之前查询和写入不更新共享计数
+    assert shared_stats(cache) == {}
+    cache.flush()
+    assert shared_stats(cache) == {'stores': 1, 'hits': 1, 'misses': 1}
+    # 再次 flush 不会重复累加
+    cache.flush()
+    assert shared_stats(cache)['hits'] == 1
+
+def test_flush_evicts_least_recently_used(cache):
+    for i in range(3):
+        cache.set('company', f'q{i}', {'items': [i]})
+    cache.flush()
+    # q0 最近被访问，q1 是最久未访问的条目
+    cache.get('company', 'q0')
+    cache.set('company', 'q3', {'items': [3]})
+    cache.flush()
+    assert cache.get('company', 'q1') is None
+    assert cache.get('company', 'q0') == {'items': [0]}
+    assert cache.counters['evictions'] == 1
+    assert cache.stats()['entries'] == 3
+
+def test_stats_includes_pending_counts(cache):
+    cache.get('company', 'missing')
+    stats = cache.stats()
+    assert stats['process']['misses'] == 1
+    assert stats['shared']['misses'] == 1
+    assert stats['entries'] == 0
+
+def test_async_methods_run_off_the_loop(cache):
+    async def run():
+        await cache.async_set('general', 'acme', {'items': ['a']})
+        return await cache.async_get('general', 'acme')
+
+    assert asyncio.run(run()) == {'items': ['a']}
+
+def test_entries_are_shared_between_instances(cache):
+    cache.set('company', 'acme', {'items': [1]})
+    other = SearchCache(cache.path, flush_interval=3600)
+    try:
+        assert other.get('company', 'acme') == {'items': [1]}
+    finally:
+        other.close()